@@ -1,56 +1,134 @@
-from sqlalchemy import event
+from sqlalchemy import event, inspect, insert
 from app.models.audit_log import AuditLog
 from datetime import datetime, date
 from decimal import Decimal
-def get_model_data(instance):
-    def safe_value(val):
-        if isinstance(val, (datetime, date)):
-            return val.isoformat()
-        if isinstance(val, Decimal):
-            return float(val)  # ou str(val), se preferir
-        return val
 
+# Modelos auditados -> nome da tabela. Busca O(1) por type(obj) no listener.
+AUDITED_MODELS = {}
+_registered_sessions = set()
+
+
+def safe_value(val):
+    if isinstance(val, (datetime, date)):
+        return val.isoformat()
+    if isinstance(val, Decimal):
+        return float(val)  # ou str(val), se preferir
+    return val
+
+
+def get_model_data(instance):
     return {
         col.name: safe_value(getattr(instance, col.name))
         for col in instance.__table__.columns
     }
+
+
+def get_changed_data(instance):
+    '''
+    Retorna (antes, depois) apenas das colunas alteradas, lidos do histórico
+    de atributos do SQLAlchemy. Deve ser chamado dentro do after_flush, antes
+    do histórico ser resetado.
+    '''
+    state = inspect(instance)
+    old_data, new_data = {}, {}
+    for attr in state.mapper.column_attrs:
+        history = state.attrs[attr.key].history
+        if not history.has_changes():
+            continue
+        name = attr.columns[0].name
+        # Atributo expirado e sobrescrito sem leitura prévia: valor anterior desconhecido
+        if history.deleted:
+            old_data[name] = safe_value(history.deleted[0])
+        new_data[name] = safe_value(history.added[0]) if history.added else None
+    return old_data, new_data
+
+
+def get_entity_id(instance):
+    identity = inspect(instance).mapper.primary_key_from_instance(instance)
+    return identity[0] if identity else None
+
+
 def get_user_id(session):
     id = session.info.get("user", None)
-    id = int(id)
-    return int(id)
+    return int(id) if id is not None else None
+
+
+def audit_after_flush(session, flush_context):
+    user = get_user_id(session)
+    rows = []
+
+    for obj in session.new:
+        table_name = AUDITED_MODELS.get(type(obj))
+        if table_name:
+            rows.append({
+                "table_name": table_name,
+                "entity_id": get_entity_id(obj),
+                "operation": "INSERT",
+                "old_data": None,
+                "new_data": get_model_data(obj),
+                "user": user,
+            })
+
+    for obj in session.dirty:
+        table_name = AUDITED_MODELS.get(type(obj))
+        if table_name and session.is_modified(obj):
+            # Apenas as colunas alteradas; o estado completo é reconstruído
+            # reaplicando os diffs sobre o snapshot do INSERT (app/crud/audit.py)
+            old_data, new_data = get_changed_data(obj)
+            if not new_data:
+                continue
+            rows.append({
+                "table_name": table_name,
+                "entity_id": get_entity_id(obj),
+                "operation": "UPDATE",
+                "old_data": old_data,  # dados antes
+                "new_data": new_data,  # dados depois
+                "user": user,
+            })
+
+    for obj in session.deleted:
+        table_name = AUDITED_MODELS.get(type(obj))
+        if table_name:
+            rows.append({
+                "table_name": table_name,
+                "entity_id": get_entity_id(obj),
+                "operation": "DELETE",
+                "old_data": get_model_data(obj),
+                "new_data": None,
+                "user": user,
+            })
+
+    # Um único INSERT (executemany) por flush, sem passar pela unit of work
+    if rows:
+        session.connection().execute(insert(AuditLog), rows)
+
+
+def audit_bulk_changes(session, model_class, operation, changes):
+    '''
+    Registra auditoria de alterações feitas com UPDATE/INSERT em massa, que não
+    passam pelo after_flush. `changes` é uma lista de (entity_id, old_data,
+    new_data) no mesmo formato compacto do listener. Um único INSERT.
+    '''
+    table_name = AUDITED_MODELS.get(model_class)
+    if not table_name or not changes:
+        return
+    user = get_user_id(session)
+    rows = [
+        {
+            "table_name": table_name,
+            "entity_id": entity_id,
+            "operation": operation,
+            "old_data": {k: safe_value(v) for k, v in old_data.items()} if old_data is not None else None,
+            "new_data": {k: safe_value(v) for k, v in new_data.items()} if new_data is not None else None,
+            "user": user,
+        }
+        for entity_id, old_data, new_data in changes
+    ]
+    session.connection().execute(insert(AuditLog), rows)
+
 
 def register_auditing_for_model(model_class, Session):
-    @event.listens_for(Session, "after_flush")
-    def after_flush(session, flush_context):
-        for obj in session.new:
-            if isinstance(obj, model_class):
-                log = AuditLog(
-                    table_name=obj.__tablename__,
-                    operation="INSERT",
-                    old_data=None,
-                    new_data=get_model_data(obj),
-                    user=get_user_id(session)
-                )
-                session.add(log)
-
-        for obj in session.dirty:
-            if isinstance(obj, model_class) and session.is_modified(obj):
-                log = AuditLog(
-                    table_name=obj.__tablename__,
-                    operation="UPDATE",
-                    old_data=get_model_data(obj),  # dados antes
-                    new_data=get_model_data(obj),  # dados depois
-                    user=get_user_id(session)
-                )
-                session.add(log)
-
-        for obj in session.deleted:
-            if isinstance(obj, model_class):
-                log = AuditLog(
-                    table_name=obj.__tablename__,
-                    operation="DELETE",
-                    old_data=get_model_data(obj),
-                    new_data=None,
-                    user=get_user_id(session)
-                )
-                session.add(log)
+    AUDITED_MODELS[model_class] = model_class.__tablename__
+    if Session not in _registered_sessions:
+        event.listen(Session, "after_flush", audit_after_flush)
+        _registered_sessions.add(Session)
@@ -0,0 +1,70 @@
+from sqlalchemy import event
+
+# Tabelas alteradas por cada transação da sessão. Os interessados são
+# avisados depois do COMMIT: com a conexão da sessão, para uma transação
+# curta própria (versões das tabelas para ETag, sem travar a linha do
+# contador durante a escrita), ou só com as tabelas (cache em memória).
+_commit_connection_callbacks = []
+_commit_callbacks = []
+
+
+def on_tables_committed_connection(callback):
+    _commit_connection_callbacks.append(callback)
+    return callback
+
+
+def on_tables_committed(callback):
+    _commit_callbacks.append(callback)
+    return callback
+
+
+def track_flushed_tables(session, flush_context):
+    changed = session.info.setdefault("changed_tables", set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        changed.add(obj.__table__.name)
+
+
+def track_bulk_statements(orm_execute_state):
+    # UPDATE/DELETE/INSERT em massa não passam pelo flush
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None:
+            orm_execute_state.session.info.setdefault("changed_tables", set()).add(mapper.local_table.name)
+
+
+def mark_tables_changed(session, *tables):
+    # Para escritas que não passam pelo ORM (COPY, SQL direto na conexão DBAPI)
+    session.info.setdefault("changed_tables", set()).update(tables)
+
+
+def keep_commit_connection(session):
+    # O before_commit roda antes do último flush: força o flush para saber todas as tabelas
+    session.flush()
+    if session.info.get("changed_tables"):
+        # A sessão não executa SQL no after_commit; a conexão dela sim
+        session.info["commit_connection"] = session.connection()
+
+
+def notify_committed_tables(session):
+    changed = session.info.pop("changed_tables", None)
+    connection = session.info.pop("commit_connection", None)
+    if changed:
+        if connection is not None:
+            for callback in _commit_connection_callbacks:
+                callback(connection, changed)
+        for callback in _commit_callbacks:
+            callback(changed)
+
+
+def discard_rolled_back_tables(session):
+    # O que foi desfeito não pode avisar o próximo commit da mesma sessão
+    session.info.pop("changed_tables", None)
+    session.info.pop("commit_connection", None)
+
+
+def register_change_tracking(Session):
+    event.listen(Session, "after_flush", track_flushed_tables)
+    event.listen(Session, "do_orm_execute", track_bulk_statements)
+    event.listen(Session, "before_commit", keep_commit_connection)
+    event.listen(Session, "after_commit", notify_committed_tables)
+    event.listen(Session, "after_rollback", discard_rolled_back_tables)
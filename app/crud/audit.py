@@ -0,0 +1,117 @@
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.models.audit_log import AuditLog
+
+
+def filter_audit_logs(
+        query,
+        table_name: Optional[str] = None,
+        operation: Optional[str] = None,
+        user: Optional[int] = None,
+        entity_id: Optional[int] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ):
+    if table_name is not None:
+        query = query.filter(AuditLog.table_name == table_name)
+    if operation is not None:
+        query = query.filter(AuditLog.operation == operation.upper())
+    if user is not None:
+        query = query.filter(AuditLog.user == user)
+    if entity_id is not None:
+        query = query.filter(AuditLog.entity_id == entity_id)
+    if start is not None:
+        query = query.filter(AuditLog.timestamp >= start)
+    if end is not None:
+        query = query.filter(AuditLog.timestamp < end)
+    return query
+
+
+def list_audit_logs(db: Session, cursor: Optional[int] = None, limit: int = 100, **filters):
+    '''
+    Paginação por keyset (id decrescente): o cursor é o último id recebido,
+    então o custo não cresce com a profundidade da página.
+    '''
+    query = filter_audit_logs(db.query(AuditLog), **filters)
+    if cursor is not None:
+        query = query.filter(AuditLog.id < cursor)
+    logs = query.order_by(AuditLog.id.desc()).limit(limit + 1).all()
+
+    next_cursor = logs[limit - 1].id if len(logs) > limit else None
+    return {"items": logs[:limit], "next_cursor": next_cursor}
+
+
+def stream_audit_logs(db: Session, cursor: Optional[int] = None, batch_size: int = 1000, **filters):
+    query = filter_audit_logs(db.query(AuditLog), **filters)
+    if cursor is not None:
+        query = query.filter(AuditLog.id < cursor)
+    query = query.order_by(AuditLog.id.desc()).yield_per(batch_size)
+    for log in query:
+        yield log
+
+
+def get_entity_history(db: Session, table_name: str, entity_id: int, at: Optional[datetime] = None):
+    query = db.query(AuditLog).filter(
+        AuditLog.table_name == table_name,
+        AuditLog.entity_id == entity_id,
+    )
+    if at is not None:
+        query = query.filter(AuditLog.timestamp <= at)
+    return query.order_by(AuditLog.id).all()
+
+
+def get_import_snapshot(db: Session, table_name: str, entity_id: int, at: Optional[datetime] = None):
+    '''
+    Procura a carga em lote (IMPORT) que inseriu o registro e devolve
+    (timestamp, linha inserida), ou None. Só as faixas de ids de cada carga
+    são lidas; a linha do registro sai da carga encontrada.
+    '''
+    query = db.query(AuditLog.id, AuditLog.timestamp, AuditLog.new_data["id_ranges"]).filter(
+        AuditLog.table_name == table_name,
+        AuditLog.operation == "IMPORT",
+    )
+    if at is not None:
+        query = query.filter(AuditLog.timestamp <= at)
+    for log_id, timestamp, ranges in query.order_by(AuditLog.id):
+        if any(first <= entity_id <= last for first, last in ranges or []):
+            snapshot = db.query(AuditLog.new_data[("snapshots", str(entity_id))]).filter(AuditLog.id == log_id).scalar()
+            return (timestamp, snapshot) if snapshot is not None else None
+    return None
+
+
+def replay_audit_logs(logs, state: Optional[dict] = None) -> Optional[dict]:
+    '''
+    Reaplica os registros de auditoria em ordem, a partir de `state` (a linha
+    de uma carga IMPORT, quando o registro veio de uma). INSERT traz a linha
+    completa, UPDATE apenas as colunas alteradas e DELETE encerra o histórico
+    (None). Registros antigos com snapshot completo no UPDATE também
+    funcionam, pois o dict.update apenas sobrescreve todas as colunas.
+    '''
+    for log in logs:
+        if log.operation == "INSERT":
+            state = dict(log.new_data or {})
+        elif log.operation == "UPDATE":
+            state = {**(state or {}), **(log.new_data or {})}
+        elif log.operation == "DELETE":
+            state = None
+    return state
+
+
+def reconstruct_entity_state(db: Session, table_name: str, entity_id: int, at: Optional[datetime] = None):
+    logs = get_entity_history(db, table_name, entity_id, at)
+    imported = get_import_snapshot(db, table_name, entity_id, at) if not logs or logs[0].operation != "INSERT" else None
+    if not logs and imported is None:
+        raise HTTPException(status_code=404, detail="Nenhum registro de auditoria encontrado para a entidade.")
+
+    state = replay_audit_logs(logs, dict(imported[1]) if imported else None)
+    return {
+        "table_name": table_name,
+        "entity_id": entity_id,
+        "at": at or (logs[-1].timestamp if logs else imported[0]),
+        "deleted": state is None,
+        "state": state,
+    }
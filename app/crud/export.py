@@ -0,0 +1,60 @@
+import csv
+import io
+import json
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import models, order, order_item
+
+# Tabelas exportáveis: nome na URL -> modelo. Exporta as colunas da tabela,
+# ordenadas pela chave primária.
+EXPORTABLE_MODELS = {
+    "products": models.Product,
+    "stocks": models.Stock,
+    "movements": models.StockMovement,
+    "orders": order.Order,
+    "order-items": order_item.OrderItem,
+}
+
+EXPORT_BATCH_SIZE = 2000
+
+
+def export_statement(name: str):
+    model = EXPORTABLE_MODELS.get(name)
+    if model is None:
+        raise HTTPException(status_code=404, detail=f"Exportação '{name}' não existe")
+    table = model.__table__
+    # Colunas em vez de entidades: nada passa pelo identity map da sessão
+    return select(*table.columns).order_by(*table.primary_key.columns)
+
+
+def stream_export(db: Session, name: str, format: str = "ndjson", batch_size: int = EXPORT_BATCH_SIZE):
+    '''
+    Gera o conteúdo da exportação em blocos de `batch_size` linhas. Usa cursor
+    no servidor (stream_results) e yield_per, então a memória não depende do
+    tamanho da tabela.
+    '''
+    result = db.execute(
+        export_statement(name).execution_options(stream_results=True, yield_per=batch_size)
+    )
+    columns = list(result.keys())
+
+    if format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for rows in result.partitions():
+            writer.writerows(rows)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+        return
+
+    for rows in result.partitions():
+        yield "".join(
+            json.dumps(dict(zip(columns, row)), default=str, ensure_ascii=False) + "\n"
+            for row in rows
+        )
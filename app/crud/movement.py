@@ -1,18 +1,44 @@
 from sqlalchemy.orm import Session
+from sqlalchemy import tuple_, update
+from app.audit import audit_bulk_changes
 from app.models import models
+from app.pagination import PageParams, paginate
 from app.schemas import movement as schemas
 from fastapi import HTTPException
 from datetime import date
 
+def copy_product_to_stock(origin_product, id_stock: int, quantity: int):
+    return models.Product(
+        name=origin_product.name,
+        sku=origin_product.sku,
+        description=origin_product.description,
+        price=origin_product.price,
+        image=origin_product.image,
+        category=origin_product.category,
+        quantity=quantity,
+        id_stock=id_stock,
+        creation_date=date.today(),
+        created_by=origin_product.created_by
+    )
+
 def create_stock_movement(db: Session, movement: schemas.StockMovementCreate, user_data: dict):
     user_id = int(user_data.get("user_id"))
     '''
     Transfere produto de um estoque para outro (sai de um, entra em outro).
+
+    A baixa é um UPDATE condicional (quantity >= solicitado), então duas
+    transferências concorrentes nunca deixam a origem negativa. Os UPDATEs de
+    origem e destino são executados em ordem de id_product, e a criação de um
+    produto novo no destino trava antes a linha do estoque destino: a ordem
+    de locks é a mesma em todas as transações, sem deadlock.
     '''
 
     if movement.id_stock_origin == movement.id_stock_destination:
         raise HTTPException(status_code=406, detail="Estoque de origem e destino são iguais.")
 
+    if movement.quantity <= 0:
+        raise HTTPException(status_code=400, detail="Quantidade da transferência deve ser positiva.")
+
     # Busca produto no estoque de origem
     origin_product = db.query(models.Product).filter_by(
         id_product=movement.id_product,
@@ -22,50 +48,176 @@ def create_stock_movement(db: Session, movement: schemas.StockMovementCreate, us
     if not origin_product:
         raise HTTPException(status_code=400, detail="Produto não encontrado no estoque de origem.")
 
-    if origin_product.quantity < movement.quantity:
-        raise HTTPException(status_code=400, detail="Estoque de origem insuficiente para transferência.")
-
     # Busca produto equivalente no estoque de destino (mesmo SKU)
-    destination_product = db.query(models.Product).filter_by(
-        sku=origin_product.sku,
-        id_stock=movement.id_stock_destination
-    ).first()
-
-    # Atualiza estoque origem
-    origin_product.quantity -= movement.quantity
-    origin_product.last_update_date = date.today()
-
-    # Atualiza ou cria produto no destino
-    if destination_product:
-        destination_product.quantity += movement.quantity
-        destination_product.last_update_date = date.today()
-    else:
-        destination_product = models.Product(
-            name=origin_product.name,
-            sku=origin_product.sku,
-            description=origin_product.description,
-            price=origin_product.price,
-            image=origin_product.image,
-            category=origin_product.category,
-            quantity=movement.quantity,
-            id_stock=movement.id_stock_destination,
-            creation_date=date.today(),
-            created_by=origin_product.created_by
+    destination_product = find_destination_product(db, origin_product.sku, movement.id_stock_destination)
+    if not destination_product:
+        # Serializa a criação do produto no destino
+        stock = (
+            db.query(models.Stock)
+            .filter(models.Stock.id_stock == movement.id_stock_destination)
+            .with_for_update()
+            .first()
         )
-        db.add(destination_product)
+        if not stock:
+            raise HTTPException(status_code=404, detail="Estoque de destino não encontrado.")
+        destination_product = find_destination_product(db, origin_product.sku, movement.id_stock_destination)
 
-    # Registra movimentação
-    db_movement = models.StockMovement(**movement.model_dump())
-    db_movement.created_by = user_id
-    db.add(db_movement)
-    db.commit()
+    changes = []
+    try:
+        steps = [(origin_product.id_product, -movement.quantity)]
+        if destination_product:
+            steps.append((destination_product.id_product, movement.quantity))
+
+        for id_product, delta in sorted(steps):
+            new_quantity = adjust_product_quantity(db, id_product, delta)
+            if new_quantity is None:
+                raise HTTPException(status_code=400, detail="Estoque de origem insuficiente para transferência.")
+            changes.append((id_product, {"quantity": new_quantity - delta}, {"quantity": new_quantity}))
+
+        if not destination_product:
+            destination_product = copy_product_to_stock(origin_product, movement.id_stock_destination, movement.quantity)
+            db.add(destination_product)
+
+        audit_bulk_changes(db, models.Product, "UPDATE", changes)
+
+        # Registra movimentação
+        db_movement = models.StockMovement(**movement.model_dump())
+        db_movement.created_by = user_id
+        db.add(db_movement)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
     db.refresh(db_movement)
 
     return db_movement
 
 
-def get_all_stock_movements(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.StockMovement).offset(skip).limit(limit).all()
+def find_destination_product(db: Session, sku: str, id_stock: int):
+    return db.query(models.Product).filter_by(sku=sku, id_stock=id_stock).first()
+
+
+def find_destination_products(db: Session, pairs: set):
+    destinations = {}
+    if pairs:
+        for p in db.query(models.Product).filter(tuple_(models.Product.sku, models.Product.id_stock).in_(pairs)).all():
+            destinations.setdefault((p.sku, p.id_stock), p)
+    return destinations
+
+
+def adjust_product_quantity(db: Session, id_product: int, delta: int):
+    '''
+    Soma `delta` à quantidade em um UPDATE atômico. Baixas só são aplicadas se
+    houver saldo; retorna a nova quantidade ou None se nada foi alterado.
+    '''
+    stmt = update(models.Product).where(models.Product.id_product == id_product)
+    if delta < 0:
+        stmt = stmt.where(models.Product.quantity >= -delta)
+    stmt = (
+        stmt.values(quantity=models.Product.quantity + delta)
+        .returning(models.Product.quantity)
+        .execution_options(synchronize_session=False)
+    )
+    return db.execute(stmt).scalar()
+
+
+def create_stock_movements_batch(db: Session, movements: list, user_data: dict):
+    '''
+    Aplica várias transferências com queries em conjunto: uma para os produtos
+    de origem, uma para os de destino (sku + estoque), uma para travar todos
+    eles em ordem de id e um único commit.
+    Cada transferência é validada individualmente e o resultado informado
+    por posição; as que falham não impedem as demais.
+    '''
+    user_id = int(user_data.get("user_id"))
+    results = [None] * len(movements)
+
+    # Produtos de origem
+    origin_ids = {m.id_product for m in movements}
+    origins = {
+        p.id_product: p
+        for p in db.query(models.Product).filter(models.Product.id_product.in_(origin_ids)).all()
+    }
+
+    # Produtos de destino pelo par (sku, estoque destino)
+    pairs = {
+        (origins[m.id_product].sku, m.id_stock_destination)
+        for m in movements
+        if m.id_product in origins
+    }
+    destinations = find_destination_products(db, pairs)
+
+    # Mesma ordem de locks da transferência individual: primeiro os estoques
+    # que vão receber produto novo, depois todos os produtos por id
+    missing = pairs - destinations.keys()
+    missing_stocks = set()
+    if missing:
+        wanted_stocks = {id_stock for _, id_stock in missing}
+        locked_stocks = {
+            id_stock for id_stock, in
+            db.query(models.Stock.id_stock)
+            .filter(models.Stock.id_stock.in_(wanted_stocks))
+            .order_by(models.Stock.id_stock)
+            .with_for_update()
+            .all()
+        }
+        # Sem a linha do estoque o produto novo falharia na FK e derrubaria o lote
+        missing_stocks = wanted_stocks - locked_stocks
+        destinations.update(find_destination_products(db, missing))
+
+    locked_ids = set(origins) | {p.id_product for p in destinations.values()}
+    if locked_ids:
+        (
+            db.query(models.Product)
+            .filter(models.Product.id_product.in_(locked_ids))
+            .order_by(models.Product.id_product)
+            .with_for_update()
+            .populate_existing()
+            .all()
+        )
+
+    db_movements = []
+    for index, movement in enumerate(movements):
+        origin_product = origins.get(movement.id_product)
+        if movement.id_stock_origin == movement.id_stock_destination:
+            results[index] = {"index": index, "success": False, "detail": "Estoque de origem e destino são iguais."}
+            continue
+        if movement.id_stock_destination in missing_stocks:
+            results[index] = {"index": index, "success": False, "detail": "Estoque de destino não encontrado."}
+            continue
+        if not origin_product or origin_product.id_stock != movement.id_stock_origin:
+            results[index] = {"index": index, "success": False, "detail": "Produto não encontrado no estoque de origem."}
+            continue
+        if movement.quantity <= 0 or origin_product.quantity < movement.quantity:
+            results[index] = {"index": index, "success": False, "detail": "Estoque de origem insuficiente para transferência."}
+            continue
+
+        origin_product.quantity -= movement.quantity
+        key = (origin_product.sku, movement.id_stock_destination)
+        destination_product = destinations.get(key)
+        if destination_product:
+            destination_product.quantity += movement.quantity
+        else:
+            # Criado uma vez; transferências seguintes para o mesmo destino reutilizam
+            destination_product = copy_product_to_stock(origin_product, movement.id_stock_destination, movement.quantity)
+            destinations[key] = destination_product
+            db.add(destination_product)
+
+        db_movement = models.StockMovement(**movement.model_dump())
+        db_movement.created_by = user_id
+        db_movements.append((index, db_movement))
+
+    db.add_all([m for _, m in db_movements])
+    db.flush()  # ids lidos antes do commit expirar os objetos
+
+    for index, db_movement in db_movements:
+        results[index] = {"index": index, "success": True, "id_movement": db_movement.id_movement}
+    db.commit()
+    return results
+
+
+def get_all_stock_movements(db: Session, params: PageParams):
+    return paginate(db.query(models.StockMovement), [models.StockMovement.id_movement], params)
 
 def get_stock_movement(db: Session, movement_id: int):
     return db.query(models.StockMovement).filter(models.StockMovement.id_movement == movement_id).first()
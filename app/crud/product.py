@@ -1,12 +1,21 @@
 
 from sqlalchemy.orm import Session, joinedload
 from app.models import models
-from app.utils.file_utils import save_upload_file, validate_file, UPLOAD_FOLDER
+from app.utils.file_utils import StagedUpload, save_upload_file
 from app.schemas import product as schemas
 from fastapi import HTTPException, UploadFile, File, Form
 from typing import Optional
 from datetime import date
-from sqlalchemy.orm import selectinload
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.loading import loading_options
+from app.pagination import PageParams, apply_page, paginate, split_page
+from app.audit import audit_bulk_changes, safe_value
+from app.change_tracking import mark_tables_changed
+from pydantic import ValidationError
+import csv
+import io
+import json
 
 # -----------------------
 # CRUD de Produto
@@ -21,7 +30,7 @@ def create_product(
         category: str,
         creation_date: date,
         id_stock: int,
-        image: Optional[UploadFile] = File(None),
+        image: Optional[StagedUpload] = None,
         quantity: Optional[int] = Form(1),
     ):
     user_id = int(user_data.get('user_id'))
@@ -43,36 +52,27 @@ def create_product(
     db.commit()
     db.refresh(db_product)
     if image:
-        ext = validate_file(image)
-        filename = f"product_{db_product.id_product}.{ext}"
-        filepath = save_upload_file(upload_file=image, folder=UPLOAD_FOLDER, filename=filename, old_image=db_product.image or "")
-        db_product.image = filename
+        db_product.image = save_upload_file(image)
         db.commit()
+        db.refresh(db_product)
     return db_product
 
 
-def get_products_with_userid(db: Session, user_data: dict, skip: int = 0, limit: int = 100):
+def get_products_with_userid(db: Session, user_data: dict, params: PageParams):
     user_id = int(user_data.get("user_id"))
 
-    # INNER JOIN manual
-    results = (
-        db.query(models.Product, models.Stock)
-        .join(models.Stock, models.Product.id_stock == models.Stock.id_stock)
+    query = (
+        db.query(models.Product)
+        .options(*loading_options("product_with_stock"))
         .filter(models.Product.created_by == user_id)
-        .offset(skip)
-        .limit(limit)
-        .all()
     )
+    page = paginate(query, [models.Product.id_product], params)
 
-    if not results:
+    if not page.items:
         raise HTTPException(status_code=404, detail="Nenhum produto encontrado!")
-    
-    print("Resultados do JOIN:", results)  # Debugging line
-    for p, s in results:
-        print(f"Produto: {p.name}, Estoque: {s.name}")
 
     # Correção: preenche todos os campos de estoque vindos do join
-    return [
+    return page._replace(items=[
         {
             "id_product": p.id_product,
             "id_stock": p.id_stock,
@@ -86,57 +86,67 @@ def get_products_with_userid(db: Session, user_data: dict, skip: int = 0, limit:
             "creation_date": p.creation_date,
             "stocks": [
                 {
-                    "id_stock": s.id_stock,
+                    "id_stock": p.stock.id_stock,
                     "quantity": p.quantity,
-                    "name": s.name,
-                    "city": s.city,
-                    "uf": s.uf,
-                    "zip_code": s.zip_code,
-                    "address": s.address,
-                    "creation_date": s.creation_date,
+                    "name": p.stock.name,
+                    "city": p.stock.city,
+                    "uf": p.stock.uf,
+                    "zip_code": p.stock.zip_code,
+                    "address": p.stock.address,
+                    "creation_date": p.stock.creation_date,
                 }
             ]
         }
-        for p, s in results
-    ]
-
-def get_all_products_with_stock(db: Session, skip: int = 0, limit: int = 100):
-    products = (
-        db.query(models.Product)
-        .options(selectinload(models.Product.stock))
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+        for p in page.items
+    ])
 
-    return [
-        {
-            "id_product": p.id_product,
-            "id_stock": p.id_stock,
-            "name": p.name,
-            "image": p.image,
-            "description": p.description,
-            "price": p.price,
-            "sku": p.sku,
-            "category": p.category,
-            "quantity": p.quantity,
-            "creation_date": p.creation_date,
-            "stock": {
-                "id_stock": p.stock.id_stock,
-                "name": p.stock.name,
-                "city": p.stock.city,
-                "uf": p.stock.uf,
-                "zip_code": p.stock.zip_code,
-                "address": p.stock.address,
-                "creation_date": p.stock.creation_date,
-            } if p.stock else None
+def product_to_dict(p, include_stock_creation_date: bool = True):
+    stock = None
+    if p.stock:
+        stock = {
+            "id_stock": p.stock.id_stock,
+            "name": p.stock.name,
+            "city": p.stock.city,
+            "uf": p.stock.uf,
+            "zip_code": p.stock.zip_code,
+            "address": p.stock.address,
         }
-        for p in products
-    ]
+        if include_stock_creation_date:
+            stock["creation_date"] = p.stock.creation_date
+
+    return {
+        "id_product": p.id_product,
+        "id_stock": p.id_stock,
+        "name": p.name,
+        "image": p.image,
+        "description": p.description,
+        "price": p.price,
+        "sku": p.sku,
+        "category": p.category,
+        "quantity": p.quantity,
+        "creation_date": p.creation_date,
+        "stock": stock,
+    }
+
+def get_all_products_with_stock(db: Session, params: PageParams):
+    query = db.query(models.Product).options(*loading_options("product_with_stock"))
+    page = paginate(query, [models.Product.id_product], params)
+
+    return page._replace(items=[product_to_dict(p) for p in page.items])
+
+async def get_all_products_with_stock_async(db: AsyncSession, params: PageParams):
+    statement = apply_page(
+        select(models.Product).options(*loading_options("product_with_stock")),
+        [models.Product.id_product], params,
+    )
+    result = await db.execute(statement)
+    page = split_page(result.scalars().all(), [models.Product.id_product], params)
+    return page._replace(items=[product_to_dict(p) for p in page.items])
 
 def get_product(db: Session, product_id: int):
     product = (
         db.query(models.Product)
+        .options(*loading_options("product_with_stock"))
         .filter(models.Product.id_product == product_id)
         .first()
     )
@@ -144,26 +154,21 @@ def get_product(db: Session, product_id: int):
     if not product:
         raise HTTPException(status_code=404, detail=f"Produto com ID {product_id} não encontrado")
 
-    return {
-        "id_product": product.id_product,
-        "id_stock": product.id_stock,
-        "name": product.name,
-        "image": product.image,
-        "description": product.description,
-        "price": product.price,
-        "sku": product.sku,
-        "category": product.category,
-        "quantity": product.quantity,
-        "creation_date": product.creation_date,
-        "stock": {
-            "id_stock": product.stock.id_stock,
-            "name": product.stock.name,
-            "city": product.stock.city,
-            "uf": product.stock.uf,
-            "zip_code": product.stock.zip_code,
-            "address": product.stock.address,
-        } if product.stock else None
-    }
+    return product_to_dict(product, include_stock_creation_date=False)
+
+async def get_product_async(db: AsyncSession, product_id: int):
+    # Sem lazy load no modo assíncrono: o estoque vem junto
+    result = await db.execute(
+        select(models.Product)
+        .options(*loading_options("product_with_stock"))
+        .filter(models.Product.id_product == product_id)
+    )
+    product = result.scalars().first()
+
+    if not product:
+        raise HTTPException(status_code=404, detail=f"Produto com ID {product_id} não encontrado")
+
+    return product_to_dict(product, include_stock_creation_date=False)
 
 def update_product(
         db: Session, 
@@ -177,7 +182,7 @@ def update_product(
         category: Optional[str] = None,
         quantity: Optional[int] = None,
         creation_date: Optional[date] = None,
-        image: Optional[UploadFile] = None
+        image: Optional[StagedUpload] = None
         ):
     
 
@@ -211,10 +216,7 @@ def update_product(
 
     # Atualiza imagem
     if image:
-        ext = validate_file(image)
-        filename = f"product_{product_id}.{ext}"
-        filepath = save_upload_file(upload_file=image, folder=UPLOAD_FOLDER, filename=filename, old_image=product.image)
-        product.image = filename
+        product.image = save_upload_file(image)
 
     db.commit()
     db.refresh(product)
@@ -241,14 +243,177 @@ def delete_product(db: Session, product_id: int, user_data: dict):
 
 
 
-def upload_product_image(product_id: int, db: Session, file: UploadFile):
+def upload_product_image(product_id: int, db: Session, file: StagedUpload):
     product = db.query(models.Product).filter(models.Product.id_product == product_id).first()
     if not product:
         raise HTTPException(status_code=404, detail="Produto não encontrado")
-    old_image = product.image or ""
-    ext = validate_file(file)
-    filename = f"product_{product_id}.{ext}"
-    filepath = save_upload_file(upload_file=file, folder=UPLOAD_FOLDER,filename=filename, old_image=old_image)
+    filename = save_upload_file(file)
     product.image = filename
     db.commit()
     return {"message": "Imagem enviada com sucesso", "filename": filename}
+
+
+# -----------------------
+# Importação em lote
+# -----------------------
+IMPORT_COLUMNS = ["id_stock", "name", "description", "price", "sku", "category", "quantity", "creation_date", "created_by"]
+IMPORT_INSERT_BATCH_SIZE = 5000
+MAX_IMPORT_ERRORS_REPORTED = 1000
+
+
+def read_import_records(file, format: str):
+    '''Percorre o arquivo enviado gerando (linha, registro) ou (linha, mensagem de erro).'''
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    if format == "csv":
+        # O line_num do csv não avança quando a linha dá erro: conta à parte
+        lines_read = 0
+
+        def counted_lines():
+            nonlocal lines_read
+            for raw in text:
+                lines_read += 1
+                yield raw
+
+        reader = csv.DictReader(counted_lines())
+        while True:
+            try:
+                record = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as e:
+                # Campo grande demais, aspas sem fechar...: só a linha é descartada
+                yield lines_read, f"CSV inválido: {e}"
+                continue
+            # Campos vazios no CSV usam o valor padrão do schema
+            yield reader.line_num, {k: v for k, v in record.items() if k and v not in ("", None)}
+
+    for line, raw in enumerate(text, start=1):
+        if not raw.strip():
+            continue
+        try:
+            record = json.loads(raw)
+        except ValueError as e:
+            yield line, f"JSON inválido: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield line, "Cada linha deve ser um objeto JSON"
+            continue
+        yield line, record
+
+
+def validation_message(error: ValidationError):
+    return "; ".join(f"{'.'.join(str(p) for p in e['loc'])}: {e['msg']}" for e in error.errors())
+
+
+def copy_products(db: Session, rows):
+    # COPY ... FROM STDIN na mesma transação da sessão (psycopg2). Os ids saem
+    # antes da sequência (uma query) para constarem na auditoria.
+    ids = db.scalars(
+        select(func.nextval(func.pg_get_serial_sequence("product", "id_product")))
+        .select_from(func.generate_series(1, len(rows)))
+    ).all()
+    buffer = io.StringIO()
+    csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC).writerows((id_product, *row) for id_product, row in zip(ids, rows))
+    buffer.seek(0)
+    dbapi_connection = db.connection().connection.dbapi_connection
+    with dbapi_connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY product (id_product, {', '.join(IMPORT_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+    mark_tables_changed(db, models.Product.__tablename__)
+    return ids
+
+
+def insert_products(db: Session, rows):
+    # Fallback para outros bancos/drivers: INSERT multi-linha em lotes
+    ids = []
+    for offset in range(0, len(rows), IMPORT_INSERT_BATCH_SIZE):
+        ids += db.scalars(
+            insert(models.Product).returning(models.Product.id_product, sort_by_parameter_order=True),
+            [dict(zip(IMPORT_COLUMNS, row)) for row in rows[offset:offset + IMPORT_INSERT_BATCH_SIZE]],
+        ).all()
+    return ids
+
+
+def id_ranges(ids):
+    '''[[primeiro, último], ...] dos ids em ordem: ids de uma carga são quase sempre contíguos.'''
+    ranges = []
+    for id_value in sorted(ids):
+        if ranges and ranges[-1][1] == id_value - 1:
+            ranges[-1][1] = id_value
+        else:
+            ranges.append([id_value, id_value])
+    return ranges
+
+
+def import_snapshots(ids, rows):
+    '''Linha completa de cada produto inserido, por id, no formato do INSERT da auditoria.'''
+    empty = dict.fromkeys(column.name for column in models.Product.__table__.columns)
+    return {
+        str(id_product): {**empty, "id_product": id_product, **{k: safe_value(v) for k, v in zip(IMPORT_COLUMNS, row)}}
+        for id_product, row in zip(ids, rows)
+    }
+
+
+def import_products(db: Session, user_data: dict, file, format: str, filename: str = None):
+    '''
+    Importa produtos de um CSV ou NDJSON. Linhas inválidas ou com estoque
+    inexistente são reportadas e as demais são gravadas em uma transação,
+    via COPY no PostgreSQL. Gera um único registro de auditoria (IMPORT), e
+    não um INSERT por produto: ele traz as faixas de ids inseridos e a linha
+    de cada produto, que reconstruct_entity_state usa como estado inicial.
+    '''
+    user_id = int(user_data.get("user_id"))
+    errors = []
+    valid = []
+
+    try:
+        for line, record in read_import_records(file, format):
+            if isinstance(record, str):
+                errors.append((line, record))
+                continue
+            try:
+                row = schemas.ProductImportRow.model_validate(record)
+            except ValidationError as e:
+                errors.append((line, validation_message(e)))
+                continue
+            valid.append((line, row))
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="O arquivo de importação deve estar em UTF-8.")
+
+    # Uma única consulta para validar todos os estoques referenciados
+    stock_ids = {row.id_stock for _, row in valid}
+    existing = set(db.scalars(select(models.Stock.id_stock).where(models.Stock.id_stock.in_(stock_ids)))) if stock_ids else set()
+
+    rows = []
+    for line, row in valid:
+        if row.id_stock not in existing:
+            errors.append((line, f"Estoque {row.id_stock} não encontrado"))
+            continue
+        rows.append((row.id_stock, row.name, row.description, row.price, row.sku, row.category,
+                     row.quantity, row.creation_date, user_id))
+
+    if rows:
+        try:
+            if db.bind.dialect.name == "postgresql" and db.bind.dialect.driver == "psycopg2":
+                ids = copy_products(db, rows)
+            else:
+                ids = insert_products(db, rows)
+            audit_bulk_changes(db, models.Product, "IMPORT", [(None, None, {
+                "rows": len(rows),
+                "id_stocks": sorted({row[0] for row in rows}),
+                "id_ranges": id_ranges(ids),
+                "filename": filename,
+                "snapshots": import_snapshots(ids, rows),
+            })])
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            raise HTTPException(status_code=422, detail=f"Erro ao importar produtos: {str(e)}")
+
+    errors.sort()
+    return {
+        "imported": len(rows),
+        "error_count": len(errors),
+        "errors": [{"line": line, "error": error} for line, error in errors[:MAX_IMPORT_ERRORS_REPORTED]],
+    }
@@ -0,0 +1,110 @@
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models import models
+from app.models.reservation import Reservation
+
+RESERVATION_TTL_MINUTES = int(os.getenv("RESERVATION_TTL_MINUTES", "15"))
+
+# -----------------------
+# Reservas de estoque (holds dos carrinhos)
+# -----------------------
+
+def get_reserved_quantity(db: Session, product_id: int, exclude_order_id: Optional[int] = None):
+    '''Soma das reservas ativas do produto (usa ix_reservation_product_expires).'''
+    query = db.query(func.coalesce(func.sum(Reservation.quantity), 0)).filter(
+        Reservation.id_product == product_id,
+        Reservation.expires_at > datetime.utcnow(),
+    )
+    if exclude_order_id is not None:
+        query = query.filter(Reservation.id_order != exclude_order_id)
+    return query.scalar()
+
+
+def get_reserved_quantities(db: Session, product_ids, exclude_order_id: Optional[int] = None) -> dict:
+    '''Reservas ativas por produto, em uma query (finalização de pedido).'''
+    query = db.query(Reservation.id_product, func.sum(Reservation.quantity)).filter(
+        Reservation.id_product.in_(product_ids),
+        Reservation.expires_at > datetime.utcnow(),
+    )
+    if exclude_order_id is not None:
+        query = query.filter(Reservation.id_order != exclude_order_id)
+    return dict(query.group_by(Reservation.id_product).all())
+
+
+def get_available_quantity(db: Session, product, exclude_order_id: Optional[int] = None):
+    return product.quantity - get_reserved_quantity(db, product.id_product, exclude_order_id)
+
+
+def lock_product(db: Session, product_id: int):
+    # Serializa reservas concorrentes do mesmo produto
+    return (
+        db.query(models.Product)
+        .filter(models.Product.id_product == product_id)
+        .with_for_update()
+        .first()
+    )
+
+
+def hold_stock(db: Session, product, order_id: int, quantity: int,
+               detail: str = "Quantidade solicitada excede o estoque disponível."):
+    '''
+    Cria ou renova a reserva do carrinho para o produto. O produto deve ter
+    sido travado com lock_product na mesma transação. Não faz commit.
+    '''
+    if quantity > get_available_quantity(db, product, exclude_order_id=order_id):
+        raise HTTPException(status_code=400, detail=detail)
+
+    expires_at = datetime.utcnow() + timedelta(minutes=RESERVATION_TTL_MINUTES)
+    reservation = db.query(Reservation).filter(
+        Reservation.id_order == order_id,
+        Reservation.id_product == product.id_product,
+    ).first()
+    if reservation:
+        reservation.quantity = quantity
+        reservation.expires_at = expires_at
+    else:
+        reservation = Reservation(
+            id_product=product.id_product,
+            id_order=order_id,
+            quantity=quantity,
+            expires_at=expires_at,
+        )
+        db.add(reservation)
+    return reservation
+
+
+def release_stock(db: Session, order_id: int, product_id: Optional[int] = None):
+    query = db.query(Reservation).filter(Reservation.id_order == order_id)
+    if product_id is not None:
+        query = query.filter(Reservation.id_product == product_id)
+    query.delete(synchronize_session=False)
+
+
+def delete_expired_reservations(db: Session):
+    deleted = (
+        db.query(Reservation)
+        .filter(Reservation.expires_at <= datetime.utcnow())
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return deleted
+
+
+def get_product_availability(db: Session, product_id: int):
+    product = db.query(models.Product).filter(models.Product.id_product == product_id).first()
+    if not product:
+        raise HTTPException(status_code=404, detail=f"Produto com ID {product_id} não encontrado")
+
+    reserved = get_reserved_quantity(db, product_id)
+    return {
+        "id_product": product.id_product,
+        "quantity": product.quantity,
+        "reserved": reserved,
+        "available": product.quantity - reserved,
+    }
@@ -1,9 +1,11 @@
-from httpx import options
 from sqlalchemy.orm import Session
 from app.schemas import stock as schemas
 from app.models import models
 from fastapi import HTTPException
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.loading import loading_options
+from app.pagination import PageParams, apply_page, paginate, split_page
 # CRUD de Estoque
 # -----------------------
 
@@ -16,11 +18,19 @@ def create_stock(db: Session, stock: schemas.StockCreate, user_data: dict):
     return db_stock
 
 def get_stock(db: Session, stock_id: int):
-    stock = db.query(models.Stock).filter(models.Stock.id_stock == stock_id).first()
+    stock = (
+        db.query(models.Stock)
+        .options(*loading_options("stock_with_products"))
+        .filter(models.Stock.id_stock == stock_id)
+        .first()
+    )
     if not stock:
         raise HTTPException(status_code=404, detail=f"Estoque com ID {stock_id} não encontrado!")
 
-    # Acessa diretamente a relação entre estoque e produtos
+    return stock_to_out(stock, stock.products)
+
+
+def stock_to_out(stock, products):
     products_list = [
         schemas.ProductStockOutInfo(
             id_product=p.id_product,
@@ -29,7 +39,7 @@ def get_stock(db: Session, stock_id: int):
             price=p.price,
             image=p.image
         )
-        for p in stock.products  # relação direta
+        for p in products
     ]
 
     return schemas.StockOut(
@@ -44,107 +54,45 @@ def get_stock(db: Session, stock_id: int):
         products=products_list,
     )
 
+def get_all_stocks(db: Session, params: PageParams):
+    query = db.query(models.Stock).options(*loading_options("stock_with_products"))
+    page = paginate(query, [models.Stock.id_stock], params)
+    # Acessa os produtos relacionados diretamente via relacionamento 'products'
+    results = [stock_to_out(stock, stock.products) for stock in page.items]
+    if not results:
+        raise HTTPException(status_code=404, detail="Nenhum estoque encontrado!")
 
+    return page._replace(items=results)
 
-def get_all_stocks(db: Session, skip: int = 0, limit: int = 100):
-    stocks = (
-        db.query(models.Stock)
-        .options(selectinload(models.Stock.products))
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )         
-    results = []
-
-    for stock in stocks:
-        # Acessa os produtos relacionados diretamente via relacionamento 'products'
-        products_list = [
-            schemas.ProductStockOutInfo(
-                id_product=p.id_product,
-                name=p.name,
-                quantity=p.quantity,
-                price=p.price,
-                image=p.image
-            )
-            for p in stock.products  # aqui acessa diretamente os produtos do estoque
-        ]
-
-        results.append(
-            schemas.StockOut(
-                id_stock=stock.id_stock,
-                id_store=stock.id_store,
-                name=stock.name,
-                city=stock.city,
-                uf=stock.uf,
-                zip_code=stock.zip_code,
-                address=stock.address,
-                creation_date=stock.creation_date,
-                products=products_list,
-            )
-        )
+async def get_all_stocks_async(db: AsyncSession, params: PageParams):
+    statement = apply_page(
+        select(models.Stock).options(*loading_options("stock_with_products")),
+        [models.Stock.id_stock], params,
+    )
+    result = await db.execute(statement)
+    page = split_page(result.scalars().all(), [models.Stock.id_stock], params)
+    results = [stock_to_out(stock, stock.products) for stock in page.items]
     if not results:
         raise HTTPException(status_code=404, detail="Nenhum estoque encontrado!")
 
-    return results
+    return page._replace(items=results)
 
-def get_stocks_for_user(db: Session, user_data: dict, skip: int = 0, limit: int = 100):
+def get_stocks_for_user(db: Session, user_data: dict, params: PageParams):
     user_id = int(user_data.get("user_id"))
-    
-    stocks = (
+
+    # Produtos de todos os estoques da página em uma única query
+    query = (
         db.query(models.Stock)
+        .options(*loading_options("stock_with_products"))
         .filter(models.Stock.created_by == user_id)  # filtro pelo usuário
-        .offset(skip)
-        .limit(limit)
-        .all()
     )
-    
-    results = []
-    for stock in stocks:
-    # Consulta os produtos pertencentes a um estoque específico
-        products = (
-            db.query(
-                models.Product.id_product,
-                models.Product.name,
-                models.Product.quantity,
-                models.Product.image,
-                models.Product.price
-            )
-            .filter(models.Product.id_stock == stock.id_stock)  # Join não é necessário
-            .all()
-        )
+    page = paginate(query, [models.Stock.id_stock], params)
 
-        # Transforma os produtos encontrados em uma lista de schemas de saída
-        products_list = [
-            schemas.ProductStockOutInfo(
-                id_product=p.id_product,
-                name=p.name,
-                quantity=p.quantity,
-                price=p.price,
-                image=p.image
-            )
-            for p in products
-        ]
-
-        # Adiciona o estoque com os produtos ao resultado final
-        results.append(
-            schemas.StockOut(
-                id_stock=stock.id_stock,
-                id_store=stock.id_store,
-                name=stock.name,
-                city=stock.city,
-                uf=stock.uf,
-                zip_code=stock.zip_code,
-                address=stock.address,
-                creation_date=stock.creation_date,
-                products=products_list,
-            )
-        )
-
-    
+    results = [stock_to_out(stock, stock.products) for stock in page.items]
     if not results:
         raise HTTPException(status_code=404, detail="Nenhum estoque encontrado!")
-    
-    return results
+
+    return page._replace(items=results)
 
 def delete_stock(db: Session, stock_id: int, user_data: dict):
     stock = db.query(models.Stock).filter(models.Stock.id_stock == stock_id).first()
@@ -1,40 +1,142 @@
+import hashlib
 import os
+import threading
+import time
+from collections import OrderedDict
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import jwt, JWTError
-from starlette.middleware.base import BaseHTTPMiddleware
-from datetime import datetime
+from prometheus_client import Counter, Gauge
+from starlette.datastructures import Headers
 
 SECRET_KEY = os.getenv("SECRET_KEY", "dev-unsafe-secret-key")
-ALGORITHM = os.getenv("ALGORITHM", "HS256")  
+ALGORITHM = os.getenv("ALGORITHM", "HS256")
 bearer_scheme = HTTPBearer()
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)):
+JWT_CACHE_MAX_ENTRIES = int(os.getenv("JWT_CACHE_MAX_ENTRIES", "10000"))
+# Limite para tokens sem exp
+JWT_CACHE_MAX_TTL_S = float(os.getenv("JWT_CACHE_MAX_TTL_S", "3600"))
+
+JWT_CACHE_HITS = Counter("jwt_cache_hits_total", "Tokens encontrados no cache de verificação")
+JWT_CACHE_MISSES = Counter("jwt_cache_misses_total", "Tokens verificados (assinatura + claims) por falta no cache")
+JWT_CACHE_EVICTIONS = Counter("jwt_cache_evictions_total", "Tokens removidos do cache de verificação", ["reason"])
+JWT_CACHE_ENTRIES = Gauge("jwt_cache_entries", "Tokens no cache de verificação")
+
+
+class TokenCache:
+    '''
+    LRU dos claims de tokens já verificados, indexado pelo hash do token
+    (assinatura incluída, então outro token nunca acerta a entrada). A
+    entrada vale até o exp do token; só tokens válidos entram.
+    '''
+
+    def __init__(self, max_entries: int = JWT_CACHE_MAX_ENTRIES, max_ttl: float = JWT_CACHE_MAX_TTL_S):
+        self.max_entries = max_entries
+        self.max_ttl = max_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(token: str) -> bytes:
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+    def get(self, key: bytes):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, claims = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                JWT_CACHE_EVICTIONS.labels("exp").inc()
+                JWT_CACHE_ENTRIES.set(len(self._entries))
+                return None
+            self._entries.move_to_end(key)
+            return claims
+
+    def put(self, key: bytes, claims: dict):
+        expires_at = time.time() + self.max_ttl
+        if isinstance(claims.get("exp"), (int, float)):
+            expires_at = min(expires_at, claims["exp"])
+        with self._lock:
+            self._entries[key] = (expires_at, claims)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                JWT_CACHE_EVICTIONS.labels("lru").inc()
+            JWT_CACHE_ENTRIES.set(len(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            JWT_CACHE_ENTRIES.set(0)
+
+
+token_cache = TokenCache()
+
+
+def verify_token(token: str) -> dict:
+    '''
+    Claims do token verificado; JWTError se inválido ou expirado (o jose
+    confere o exp, e o cache descarta a entrada no exp). Repetições saem do
+    cache; cada chamada recebe sua cópia, que pode alterar sem afetar as outras.
+    '''
+    key = TokenCache.key(token)
+    claims = token_cache.get(key)
+    if claims is not None:
+        JWT_CACHE_HITS.inc()
+        return dict(claims)
+    JWT_CACHE_MISSES.inc()
+    claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    token_cache.put(key, claims)
+    return dict(claims)
+
+
+def bearer_token(authorization: str):
+    if authorization and authorization.startswith("Bearer "):
+        return authorization.split(" ")[1]
+    return None
+
+
+def get_current_user(request: Request, credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)):
     token = credentials.credentials
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = payload.get("user_id") or payload.get("sub") or payload.get("id")
-        if not user_id:
-            raise HTTPException(status_code=401, detail="Usuário inválido no token.")
-        expiration = payload.get("exp")
-        if expiration and expiration < datetime.utcnow().timestamp():
-            raise HTTPException(status_code=401, detail="Token expirado.")
-        return {"user_id": user_id}
-    except JWTError:
+    # O AuthUserMiddleware já verificou o token desta requisição
+    if getattr(request.state, "token", None) == token:
+        payload = request.state.token_claims
+    else:
+        try:
+            payload = verify_token(token)
+        except JWTError:
+            payload = None
+    if payload is None:
         raise HTTPException(status_code=401, detail="Token inválido ou expirado.")
+    user_id = payload.get("user_id") or payload.get("sub") or payload.get("id")
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Usuário inválido no token.")
+    return {"user_id": user_id}
+
+class AuthUserMiddleware:
+    '''
+    Middleware ASGI puro: verifica o token uma vez por requisição e deixa o
+    resultado no estado da requisição (request.state), que get_current_user
+    e a sessão do banco (auditoria) reaproveitam.
+    '''
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            token = bearer_token(Headers(scope=scope).get("authorization"))
+            claims = None
+            if token:
+                try:
+                    claims = verify_token(token)
+                except JWTError:
+                    pass
 
-class AuthUserMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        auth_header = request.headers.get("Authorization")
-        user_id = None
-        if auth_header and auth_header.startswith("Bearer "):
-            token = auth_header.split(" ")[1]
-            try:
-                payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-                user_id = payload.get("user_id")
-            except JWTError as e:
-                pass
-
-        request.state.user_id = user_id
-        response = await call_next(request)
-        return response
+            state = scope.setdefault("state", {})
+            state["token"] = token
+            state["token_claims"] = claims
+            state["user_id"] = claims.get("user_id") if claims else None
+        await self.app(scope, receive, send)
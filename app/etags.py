@@ -0,0 +1,149 @@
+import hashlib
+import logging
+
+from fastapi import Request, Response
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+
+from app.change_tracking import on_tables_committed_connection
+from app.database import async_engine, engine
+from app.dependencies.auth import bearer_scheme, get_current_user
+from app.models.table_version import TableVersion
+from app.upload_limit import BodyLimitRoute
+
+logger = logging.getLogger("uvicorn")
+
+# Tabelas lidas por alguma rota @versioned; só elas têm contador
+VERSIONED_TABLES = set()
+
+
+@on_tables_committed_connection
+def bump_table_versions(conn, tables):
+    '''
+    Incrementa a versão das tabelas alteradas logo depois do COMMIT da
+    escrita, em uma transação curta na mesma conexão e em ordem fixa. Fica no
+    banco para valer entre workers; a linha do contador só fica travada por
+    esses UPDATEs, e não durante a transação de quem escreveu.
+    '''
+    tables = sorted(set(tables) & VERSIONED_TABLES)
+    if not tables:
+        return
+    try:
+        updated = conn.execute(
+            update(TableVersion)
+            .where(TableVersion.table_name.in_(tables))
+            .values(version=TableVersion.version + 1)
+            .returning(TableVersion.table_name)
+        ).scalars().all()
+        for table in sorted(set(tables) - set(updated)):
+            try:
+                with conn.begin_nested():
+                    conn.execute(insert(TableVersion).values(table_name=table, version=1))
+            except IntegrityError:
+                # Outro processo criou o contador ao mesmo tempo
+                conn.execute(
+                    update(TableVersion)
+                    .where(TableVersion.table_name == table)
+                    .values(version=TableVersion.version + 1)
+                )
+        conn.commit()
+    except Exception as e:
+        # A escrita já foi confirmada: no pior caso o ETag demora uma escrita a mudar
+        conn.rollback()
+        logger.error(f"Erro ao incrementar versões de {tables}: {e}")
+
+
+def table_versions_query(tables):
+    return select(TableVersion.table_name, TableVersion.version).where(TableVersion.table_name.in_(tables))
+
+
+def load_table_versions(tables):
+    with engine.connect() as conn:
+        versions = dict(conn.execute(table_versions_query(tables)).all())
+    return tuple(versions.get(table, 0) for table in tables)
+
+
+async def load_table_versions_async(tables):
+    async with async_engine.connect() as conn:
+        versions = dict((await conn.execute(table_versions_query(tables))).all())
+    return tuple(versions.get(table, 0) for table in tables)
+
+
+def request_key(request: Request):
+    # Rota + parâmetros + usuário (o token identifica quem fez a leitura)
+    return (
+        request.url.path,
+        tuple(sorted(request.query_params.multi_items())),
+        request.headers.get("authorization"),
+    )
+
+
+def compute_etag(request: Request, versions) -> str:
+    # Mesma URL, parâmetros e usuário com as mesmas versões => mesma resposta
+    digest = hashlib.blake2b(repr((request_key(request), versions)).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # Comparação fraca: ignora o prefixo W/. Sem atalho para "*": o 304 sai
+    # antes da rota, que é quem sabe se o recurso existe.
+    return etag.removeprefix("W/") in [c.removeprefix("W/") for c in candidates]
+
+
+def requires_user(dependant) -> bool:
+    return any(dep.call is get_current_user or requires_user(dep) for dep in dependant.dependencies)
+
+
+async def check_user(request: Request):
+    '''
+    Roda a autenticação da rota (mesmo 401/403 de get_current_user) antes de
+    uma resposta que não passa pelas dependências: 304 ou cache.
+    '''
+    get_current_user(request, await bearer_scheme(request))
+
+
+def versioned(*tables: str):
+    '''
+    Marca uma rota GET para responder com ETag derivado da versão das tabelas
+    declaradas. Deve ficar abaixo do decorator do router, cuja route_class
+    deriva de ConditionalRoute.
+    '''
+    VERSIONED_TABLES.update(tables)
+
+    def decorator(endpoint):
+        endpoint.etag_tables = tables
+        return endpoint
+    return decorator
+
+
+class ConditionalRoute(BodyLimitRoute):
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        tables = getattr(self.endpoint, "etag_tables", None)
+        if not tables:
+            return handler
+        authenticated = requires_user(self.dependant)
+
+        async def conditional_handler(request: Request) -> Response:
+            if authenticated:
+                await check_user(request)
+            # Uma consulta à tabela de versões antes de qualquer trabalho da
+            # rota; no engine assíncrono, quando habilitado, sem ocupar thread
+            if async_engine is not None:
+                versions = await load_table_versions_async(tables)
+            else:
+                versions = await run_in_threadpool(load_table_versions, tables)
+            etag = compute_etag(request, versions)
+            if etag_matches(request.headers.get("if-none-match"), etag):
+                return Response(status_code=304, headers={"ETag": etag})
+
+            response = await handler(request)
+            if response.status_code == 200:
+                response.headers["ETag"] = etag
+            return response
+
+        return conditional_handler
@@ -0,0 +1,68 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from prometheus_client import Counter, Histogram
+
+from app.utils.file_utils import load_image_codecs, make_image_variants
+
+logger = logging.getLogger("uvicorn")
+
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+
+IMAGES_PROCESSED = Counter("image_variants_processed_total", "Imagens com miniaturas geradas", ["status"])
+IMAGE_PROCESSING_SECONDS = Histogram("image_variants_processing_seconds", "Tempo para gerar as miniaturas de uma imagem")
+
+
+class ImageProcessor:
+    '''
+    Gera as miniaturas das imagens enviadas em um pool de processos. As rotas
+    agendam o processamento como background task, depois que a resposta do
+    upload já foi enviada; o redimensionamento não disputa o loop de eventos
+    nem as threads das requisições.
+    '''
+
+    def __init__(self, workers: int = IMAGE_WORKERS):
+        self.workers = workers
+        self._pool = None
+
+    async def start(self):
+        if self._pool is None:
+            # spawn: o fork de um processo com threads (uvicorn, pool do banco) pode travar
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    async def warm(self):
+        '''
+        Sobe todos os processos e carrega o Pillow neles: o primeiro upload não
+        paga o spawn. Tarefas simultâneas, uma por processo. Uma falha só é
+        registrada: os processos sobem de novo no primeiro upload.
+        '''
+        try:
+            await self.start()
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(*(loop.run_in_executor(self._pool, load_image_codecs) for _ in range(self.workers)))
+        except Exception as e:
+            logger.error(f"Erro ao aquecer o pool de miniaturas: {e}")
+
+    async def stop(self):
+        if self._pool is not None:
+            await asyncio.to_thread(self._pool.shutdown, wait=True)
+            self._pool = None
+
+    async def process(self, filename: str):
+        await self.start()
+        start = time.perf_counter()
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._pool, make_image_variants, filename)
+            IMAGES_PROCESSED.labels("ok").inc()
+        except Exception as e:
+            IMAGES_PROCESSED.labels("error").inc()
+            logger.error(f"Erro ao gerar miniaturas de {filename}: {e}")
+        finally:
+            IMAGE_PROCESSING_SECONDS.observe(time.perf_counter() - start)
+
+
+image_processor = ImageProcessor()
@@ -0,0 +1,85 @@
+import mimetypes
+import os
+import re
+
+import anyio
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse
+
+from app.utils.file_utils import MODERN_FORMATS
+
+mimetypes.add_type("image/webp", ".webp")
+mimetypes.add_type("image/avif", ".avif")
+
+# Nomes derivados do hash do conteúdo (original e miniaturas, ver
+# app/image_store.py): a URL muda quando a imagem muda, então a resposta pode
+# ficar em cache para sempre. Nomes antigos (product_<id>.<ext>) revalidam.
+IMMUTABLE_NAME = re.compile(r"^(?P<stem>[0-9a-f]{64}(_[a-z]+)?)\.(?P<ext>[a-z0-9]+)$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+MUTABLE_CACHE_CONTROL = "public, max-age=0, must-revalidate"
+
+# Com nginx na frente: a resposta sai só com os cabeçalhos e o nginx envia o
+# arquivo (sendfile) a partir de um location internal apontando para images/.
+IMAGE_ACCEL_REDIRECT_PREFIX = os.getenv("IMAGE_ACCEL_REDIRECT_PREFIX", "")
+
+
+def accepted_formats(accept: str):
+    '''Formatos pré-codificados aceitos pelo cliente, do mais compacto para o menos.'''
+    accepted = set()
+    for item in accept.split(","):
+        media_type, *params = [part.strip() for part in item.split(";")]
+        quality = next((param[2:] for param in params if param.startswith("q=")), "1")
+        try:
+            if float(quality) > 0:
+                accepted.add(media_type.lower())
+        except ValueError:
+            continue
+    return [fmt for fmt in MODERN_FORMATS if f"image/{fmt}" in accepted]
+
+
+class ImageFiles(StaticFiles):
+    '''
+    StaticFiles das imagens com cache de longa duração para URLs imutáveis,
+    ETag forte derivado do nome, escolha da versão WebP/AVIF pelo Accept e
+    envio pelo nginx quando configurado. Range e 304 vêm do FileResponse do
+    Starlette.
+    '''
+
+    async def get_response(self, path: str, scope) -> Response:
+        match = IMMUTABLE_NAME.match(os.path.basename(path))
+        if scope["method"] in ("GET", "HEAD") and match and match["ext"] not in MODERN_FORMATS:
+            formats = accepted_formats(Headers(scope=scope).get("accept", ""))
+            if formats:
+                full_path, stat_result = await anyio.to_thread.run_sync(self.negotiate, match["stem"], formats)
+                if stat_result is not None:
+                    return self.file_response(full_path, stat_result, scope)
+        return await super().get_response(path, scope)
+
+    def negotiate(self, stem: str, formats):
+        for fmt in formats:
+            full_path, stat_result = self.lookup_path(os.path.join("variants", f"{stem}.{fmt}"))
+            if stat_result is not None:
+                return full_path, stat_result
+        return "", None
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        match = IMMUTABLE_NAME.match(os.path.basename(full_path))
+        headers = {"Cache-Control": MUTABLE_CACHE_CONTROL}
+        if match:
+            headers = {
+                "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+                # Forte: o mesmo nome é sempre o mesmo conteúdo, em qualquer worker
+                "ETag": f'"{match["stem"]}.{match["ext"]}"',
+                "Vary": "Accept",
+            }
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result, headers=headers)
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        if IMAGE_ACCEL_REDIRECT_PREFIX and status_code == 200:
+            relative_path = os.path.relpath(full_path, os.path.realpath(self.directory))
+            response.headers["X-Accel-Redirect"] = IMAGE_ACCEL_REDIRECT_PREFIX + relative_path.replace(os.sep, "/")
+            del response.headers["content-length"]
+            return Response(status_code=200, headers=dict(response.headers))
+        return response
@@ -0,0 +1,153 @@
+import os
+import re
+import time
+from collections import Counter
+
+from sqlalchemy import delete, event, func, insert, inspect, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.image_blob import ImageBlob
+from app.models.models import Product
+from app.models.store import Store
+from app.utils.file_utils import UPLOAD_FOLDER, remove_image
+
+# Imagens são gravadas uma única vez com o nome <sha256>.<ext> (ver
+# stage_upload em app/utils/file_utils.py). Produtos e lojas apontam para o
+# mesmo arquivo quando o conteúdo é igual; a tabela image_blob conta as
+# referências e a varredura remove os arquivos que ninguém mais usa. Nomes
+# antigos (product_<id>.<ext>) não entram na contagem nem são apagados.
+BLOB_NAME = re.compile(r"^[0-9a-f]{64}\.[a-z0-9]+$")
+IMAGE_MODELS = (Product, Store)
+
+# Arquivo sem referência só é apagado depois desse tempo sem uso: cobre o
+# intervalo entre gravar o upload e o commit que passa a referenciá-lo.
+IMAGE_GC_GRACE_S = int(os.getenv("IMAGE_GC_GRACE_S", "3600"))
+IMAGE_GC_BATCH_SIZE = 500
+
+
+def is_blob(filename) -> bool:
+    return bool(filename) and bool(BLOB_NAME.match(filename))
+
+
+def adjust_references(session: Session, deltas: Counter):
+    '''Aplica as variações de referência na transação da sessão, em ordem fixa de nome.'''
+    conn = session.connection()
+    for filename in sorted(deltas):
+        delta = deltas[filename]
+        if not delta or not is_blob(filename):
+            continue
+        updated = conn.execute(
+            update(ImageBlob)
+            .where(ImageBlob.filename == filename)
+            .values(ref_count=ImageBlob.ref_count + delta)
+        ).rowcount
+        if updated:
+            continue
+        try:
+            with conn.begin_nested():
+                conn.execute(insert(ImageBlob).values(filename=filename, ref_count=max(delta, 0)))
+        except IntegrityError:
+            # Outro processo criou a linha ao mesmo tempo
+            conn.execute(
+                update(ImageBlob)
+                .where(ImageBlob.filename == filename)
+                .values(ref_count=ImageBlob.ref_count + delta)
+            )
+
+
+def track_image_references(session, flush_context):
+    deltas = Counter()
+    for obj in session.new:
+        if isinstance(obj, IMAGE_MODELS) and obj.image:
+            deltas[obj.image] += 1
+    for obj in session.dirty:
+        if isinstance(obj, IMAGE_MODELS):
+            history = inspect(obj).attrs.image.history
+            for filename in history.added:
+                deltas[filename] += 1
+            for filename in history.deleted:
+                deltas[filename] -= 1
+    for obj in session.deleted:
+        if isinstance(obj, IMAGE_MODELS):
+            history = inspect(obj).attrs.image.history
+            for filename in history.deleted or history.unchanged:
+                deltas[filename] -= 1
+    deltas.pop(None, None)
+    if deltas:
+        adjust_references(session, deltas)
+
+
+def track_bulk_image_deletes(orm_execute_state):
+    # DELETE em massa (ex.: produtos de um estoque) não passa pelo flush
+    mapper = orm_execute_state.bind_mapper
+    if not orm_execute_state.is_delete or mapper is None or mapper.class_ not in IMAGE_MODELS:
+        return
+    model = mapper.class_
+    statement = select(model.image).where(model.image.is_not(None))
+    if orm_execute_state.statement.whereclause is not None:
+        statement = statement.where(orm_execute_state.statement.whereclause)
+    filenames = orm_execute_state.session.execute(statement).scalars().all()
+    adjust_references(orm_execute_state.session, Counter({f: -n for f, n in Counter(filenames).items()}))
+
+
+def register_image_store(Session):
+    event.listen(Session, "after_flush", track_image_references)
+    event.listen(Session, "do_orm_execute", track_bulk_image_deletes)
+
+
+def referenced_images(db: Session, filenames) -> set:
+    referenced = set()
+    for model in IMAGE_MODELS:
+        referenced.update(db.execute(select(model.image).where(model.image.in_(filenames))).scalars())
+    return referenced
+
+
+def collect_unreferenced_images(db: Session, grace_s: int = IMAGE_GC_GRACE_S) -> int:
+    '''
+    Apaga os arquivos sem referência: contador zerado ou arquivo sem linha em
+    image_blob (upload cujo commit falhou). Antes de apagar confere nas
+    tabelas, porque escritas fora do ORM não passam pelo contador.
+    '''
+    if not os.path.isdir(UPLOAD_FOLDER):
+        return 0
+    cutoff = time.time() - grace_s
+    files = {name for name in os.listdir(UPLOAD_FOLDER) if is_blob(name)}
+    known = set(db.execute(select(ImageBlob.filename)).scalars())
+    unreferenced = set(db.execute(select(ImageBlob.filename).where(ImageBlob.ref_count <= 0)).scalars())
+    # O mtime é renovado a cada upload do mesmo conteúdo (ver stage_upload)
+    candidates = sorted(
+        name for name in files
+        if (name not in known or name in unreferenced) and os.path.getmtime(os.path.join(UPLOAD_FOLDER, name)) < cutoff
+    )
+    # Linhas zeradas cujo arquivo já não existe
+    candidates += sorted(unreferenced - files)
+
+    removed = []
+    for start in range(0, len(candidates), IMAGE_GC_BATCH_SIZE):
+        batch = candidates[start:start + IMAGE_GC_BATCH_SIZE]
+        still_used = referenced_images(db, batch)
+        for filename in sorted(still_used):
+            # Contador desatualizado: refaz a partir das tabelas
+            count = sum(
+                db.execute(select(func.count()).select_from(model).where(model.image == filename)).scalar()
+                for model in IMAGE_MODELS
+            )
+            if filename in known:
+                db.execute(update(ImageBlob).where(ImageBlob.filename == filename).values(ref_count=count))
+            else:
+                db.execute(insert(ImageBlob).values(filename=filename, ref_count=count))
+        garbage = [filename for filename in batch if filename not in still_used]
+        db.execute(delete(ImageBlob).where(ImageBlob.filename.in_(garbage), ImageBlob.ref_count <= 0))
+        db.commit()
+        removed += garbage
+
+    collected = 0
+    for filename in removed:
+        path = os.path.join(UPLOAD_FOLDER, filename)
+        # Reenviado durante a varredura: o próximo upload já conta com o arquivo
+        if os.path.exists(path) and os.path.getmtime(path) >= cutoff:
+            continue
+        collected += os.path.exists(path)
+        remove_image(filename)
+    return collected
@@ -0,0 +1,54 @@
+import asyncio
+import logging
+import os
+
+from prometheus_client import Counter
+
+from app.database import SessionLocal
+from app.image_store import collect_unreferenced_images
+
+logger = logging.getLogger("uvicorn")
+
+IMAGE_GC_INTERVAL_S = int(os.getenv("IMAGE_GC_INTERVAL_S", "3600"))
+
+COLLECTED_IMAGES = Counter("image_blobs_collected_total", "Imagens removidas por não terem mais referências")
+
+
+class ImageSweeper:
+    '''Remove periodicamente as imagens que nenhum produto ou loja referencia (task em background).'''
+
+    def __init__(self, interval: int = IMAGE_GC_INTERVAL_S):
+        self.interval = interval
+        self._task = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                collected = await asyncio.to_thread(self._sweep)
+                COLLECTED_IMAGES.inc(collected)
+            except Exception as e:
+                logger.error(f"Erro na coleta de imagens sem referência: {e}")
+
+    def _sweep(self):
+        db = SessionLocal()
+        try:
+            return collect_unreferenced_images(db)
+        finally:
+            db.close()
+
+
+image_sweeper = ImageSweeper()
@@ -0,0 +1,23 @@
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.models import models, order
+
+# Perfis de carregamento: cada leitura declara quais relacionamentos vai
+# serializar e eles vêm junto na consulta, com número de queries constante
+# independente da quantidade de linhas. Coleções usam selectinload (uma query
+# com IN para a página inteira); relacionamentos para um usam joinedload.
+LOADING_PROFILES = {
+    "stock_with_products": [models.Stock.products],
+    "product_with_stock": [models.Product.stock],
+    "order_with_items": [order.Order.items],
+}
+
+
+def loading_options(profile: str):
+    options = []
+    for attribute in LOADING_PROFILES[profile]:
+        if attribute.property.uselist:
+            options.append(selectinload(attribute))
+        else:
+            options.append(joinedload(attribute))
+    return options
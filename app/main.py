@@ -1,82 +1,60 @@
-from fastapi import FastAPI, Depends, logger
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import movement, product, stock, orders, stores
-from fastapi.staticfiles import StaticFiles
-from app.database import engine, Base
-from sqlalchemy.orm import Session
-from app.database import get_db
+from app.routes import movement, product, stock, orders, stores, audit, export
+from app.database import ASYNC_DB_ENABLED
 from prometheus_fastapi_instrumentator import Instrumentator
 from app.models.models import Product, Stock, StockMovement
 from app.models import store, order, order_item, audit_log
 from app.database import SessionLocal
 from app.audit import register_auditing_for_model
+from app.change_tracking import register_change_tracking
 from app.dependencies.auth import AuthUserMiddleware
-from app.models.request_logs import RequestLog
-import time
-from datetime import datetime
-from fastapi import FastAPI, Request
-import logging
-from sqlalchemy import event
-
-
-app = FastAPI(title="Serviço de Estoques")
+from app.request_log_writer import request_log_writer
+from app.reservation_sweeper import reservation_sweeper
+from app.image_processor import image_processor
+from app.image_sweeper import image_sweeper
+from app.image_store import register_image_store
+from app.image_serving import ImageFiles
+from app.warmup import IMAGE_WARMUP, prepare_database
+from contextlib import asynccontextmanager, suppress
+import asyncio
+from app.request_timing import RequestTimingMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Esquema (só no dev, ver app/warmup.py), pool de conexões e SQL compilado
+    await prepare_database()
+    await request_log_writer.start()
+    await reservation_sweeper.start()
+    await image_processor.start()
+    await image_sweeper.start()
+    image_warmup = None
+    if IMAGE_WARMUP:
+        # Em paralelo com as primeiras requisições: o spawn não atrasa a subida
+        image_warmup = asyncio.create_task(image_processor.warm())
+    yield
+    await image_sweeper.stop()
+    if image_warmup is not None:
+        # O pool não pode ser encerrado enquanto o aquecimento sobe processos
+        image_warmup.cancel()
+        with suppress(asyncio.CancelledError):
+            await image_warmup
+    # Termina as miniaturas em andamento
+    await image_processor.stop()
+    await reservation_sweeper.stop()
+    # Grava os logs pendentes antes de encerrar
+    await request_log_writer.stop()
+
+
+app = FastAPI(title="Serviço de Estoques", lifespan=lifespan)
 Instrumentator().instrument(app).expose(app)
 
 
 #----------------------------------------------------
 
-logger = logging.getLogger("uvicorn")
-logger.setLevel(logging.INFO)
-
-
-@app.middleware("http")
-async def log_request_time(request: Request, call_next):
-    start_time = time.time()
-    query_count = 0  # contador local
-
-    # Listener para contar queries SQL
-    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
-        nonlocal query_count
-        query_count += 1
-
-    event.listen(engine, "before_cursor_execute", before_cursor_execute)
-
-    # Executa requisição
-    response = await call_next(request)
-    process_time = (time.time() - start_time) * 1000  # ms
-
-    # Remove listener para evitar contagem acumulada entre requisições
-    event.remove(engine, "before_cursor_execute", before_cursor_execute)
-
-    # Log no console
-    logger.info(
-        f"{request.method} {request.url.path} - {process_time:.2f} ms - {query_count} queries"
-    )
-
-    # Adiciona no header da resposta
-    response.headers["X-Process-Time-ms"] = str(round(process_time, 2))
-    response.headers["X-Query-Count"] = str(query_count)
-
-    # Salva no banco
-    db: Session = SessionLocal()
-    try:
-        log_entry = RequestLog(
-            method=request.method,
-            path=request.url.path,
-            status_code=response.status_code,
-            process_time_ms=round(process_time, 2),
-            query_count=query_count,
-            created_at=datetime.utcnow()
-        )
-        db.add(log_entry)
-        db.commit()
-    except Exception as e:
-        logger.error(f"Erro ao salvar log no banco: {e}")
-        db.rollback()
-    finally:
-        db.close()
-
-    return response
+# Tempo, queries e log de cada requisição (app/request_timing.py)
+app.add_middleware(RequestTimingMiddleware)
 
 
 #-------------------------------------------------------------------
@@ -87,9 +65,15 @@ app.add_middleware(AuthUserMiddleware)
 for model in [Product, Stock, StockMovement, store.Store, order.Order, order_item.OrderItem]:
     register_auditing_for_model(model, SessionLocal)
 
+# Avisa cache de respostas e versões de ETag a cada commit que altera tabelas
+register_change_tracking(SessionLocal)
 
+# Contagem de referências das imagens armazenadas por conteúdo
+register_image_store(SessionLocal)
 
-app.mount("/images", StaticFiles(directory="images"), name="images")
+
+
+app.mount("/images", ImageFiles(directory="images"), name="images")
 
 # Habilita CORS
 app.add_middleware(
@@ -108,16 +92,16 @@ app.add_middleware(
     allow_headers=["*"],  # Permite todos os cabeçalhos
 )
 
-# Cria as tabelas do banco
-Base.metadata.create_all(bind=engine)
-
 # Registra os routers
+if ASYNC_DB_ENABLED:
+    # Precisa vir antes dos routers síncronos para atender as mesmas URLs.
+    # Importado só aqui: sem o engine assíncrono o módulo não é carregado.
+    from app.routes import async_reads
+    app.include_router(async_reads.router)
 app.include_router(stock.router)
 app.include_router(product.router)
 app.include_router(movement.router)
 app.include_router(orders.router)
 app.include_router(stores.router)
-
-@app.get("/auditoria")
-def listar_auditorias(db: Session = Depends(get_db)):
-    return db.query(audit_log.AuditLog).all()
\ No newline at end of file
+app.include_router(audit.router)
+app.include_router(export.router)
@@ -2,4 +2,7 @@ from .store import *
 from .order import *
 from .order_item import *
 from .audit_log import *
+from .reservation import *
+from .table_version import *
+from .image_blob import *
 from app.database import Base
\ No newline at end of file
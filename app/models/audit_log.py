@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, JSON, String, DateTime
+from sqlalchemy import Column, Integer, JSON, String, DateTime, Index
 from app.database import Base
 from datetime import datetime
 
@@ -7,8 +7,17 @@ class AuditLog(Base):
 
     id = Column(Integer, primary_key=True)
     table_name = Column(String, nullable=False)
-    operation = Column(String, nullable=False)  # INSERT, UPDATE, DELETE
-    old_data = Column(JSON)
-    new_data = Column(JSON)
+    entity_id = Column(Integer)  # chave primária do registro auditado
+    operation = Column(String, nullable=False)  # INSERT, UPDATE, DELETE; IMPORT para cargas em lote
+    old_data = Column(JSON)  # UPDATE: só as colunas alteradas; DELETE: linha completa
+    new_data = Column(JSON)  # UPDATE: só as colunas alteradas; INSERT: linha completa
     user = Column(Integer)  # opcional: ID do usuário, IP etc.
-    timestamp = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    timestamp = Column(DateTime, default=datetime.utcnow)
+
+    # Índices alinhados aos filtros de GET /auditoria (paginação por id desc)
+    __table_args__ = (
+        Index("ix_audit_log_table_entity_id", "table_name", "entity_id", "id"),
+        Index("ix_audit_log_table_operation_id", "table_name", "operation", "id"),
+        Index("ix_audit_log_user_id", "user", "id"),
+        Index("ix_audit_log_timestamp", "timestamp"),
+    )
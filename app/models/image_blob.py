@@ -0,0 +1,10 @@
+from sqlalchemy import Column, String, Integer
+from app.database import Base
+
+# Imagens do armazenamento por conteúdo (app/image_store.py): uma linha por
+# arquivo, com quantos produtos e lojas o referenciam.
+class ImageBlob(Base):
+    __tablename__ = "image_blob"
+
+    filename = Column(String, primary_key=True)
+    ref_count = Column(Integer, nullable=False, default=0)
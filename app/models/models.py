@@ -1,19 +1,19 @@
 from shutil import move
-from sqlalchemy import Column, Integer, String, ForeignKey, Date, Float
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, ForeignKey, Date, Float, Index
+from sqlalchemy.orm import column_property, relationship
 from app.database import Base
 class Stock(Base):
     __tablename__ = "stock"
     
-    id_stock = Column(Integer, primary_key=True, index=True)
+    id_stock = Column(Integer, primary_key=True)
     id_store = Column(Integer, index=True)
-    name = Column(String, index=True)
-    city = Column(String, index=True)
-    uf = Column(String, index=True)
-    zip_code = Column(String, index=True)
-    address = Column(String, index=True)
+    name = Column(String)
+    city = Column(String)
+    uf = Column(String)
+    zip_code = Column(String)
+    address = Column(String)
     creation_date = Column(Date, nullable=False)
-    created_by = Column(Integer, nullable=False)
+    created_by = Column(Integer, nullable=False, index=True)
 
     products = relationship(
         "Product",
@@ -25,21 +25,29 @@ class Stock(Base):
 class Product(Base):
     __tablename__ = "product"
     
-    id_product = Column(Integer, primary_key=True, index=True)
+    id_product = Column(Integer, primary_key=True)
     id_stock = Column(Integer, ForeignKey("stock.id_stock", ondelete="CASCADE"), nullable=False)
-    name = Column(String, index=True)
-    image = Column(String)
-    description = Column(String, index=True)
-    price = Column(Float, index=True)
-    sku = Column(String, index=True)
-    category = Column(String, index=True)
-    quantity = Column(Integer, index=True)
+    name = Column(String)
+    # active_history: o valor antigo entra no histórico do flush (contagem de referências em app/image_store.py)
+    image = column_property(Column(String), active_history=True)
+    description = Column(String)
+    price = Column(Float)
+    sku = Column(String)
+    category = Column(String)
+    quantity = Column(Integer)
     creation_date = Column(Date, nullable=False)
-    created_by = Column(Integer, nullable=False)
+    created_by = Column(Integer, nullable=False, index=True)
 
     # Produto pertence a um estoque (relacionamento filho)
     stock = relationship("Stock", back_populates="products")
 
+    # Índices guiados pelas consultas de app/crud: produtos de um estoque e
+    # produto de destino das transferências (id_stock + sku). Colunas que só
+    # são lidas/atualizadas (quantity, price...) ficam sem índice.
+    __table_args__ = (
+        Index("ix_product_id_stock_sku", "id_stock", "sku"),
+    )
+
 class StockMovement(Base):
     __tablename__ = "stock_movement"
     id_movement = Column(Integer, primary_key=True, index=True)
@@ -51,4 +59,7 @@ class StockMovement(Base):
     creation_date = Column(Date, nullable=False)
     created_by = Column(Integer, nullable=False)
 
-
+    # Movimentações de um produto, em ordem cronológica
+    __table_args__ = (
+        Index("ix_stock_movement_product_date", "id_product", "creation_date"),
+    )
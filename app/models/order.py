@@ -6,7 +6,7 @@ class Order(Base):
     __tablename__ = "order"
 
     id_order = Column(Integer, primary_key=True, index=True)
-    id_user = Column(Integer, nullable=False)
+    id_user = Column(Integer, nullable=False, index=True)
     id_store = Column(Integer, ForeignKey("store.id_store"), nullable=False)
     status = Column(String, nullable=False)
     order_date = Column(Date, nullable=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, Date, ForeignKey
+from sqlalchemy import Column, Integer, Float, Date, ForeignKey, Index
 from app.database import Base
 from sqlalchemy.orm import relationship
 
@@ -16,3 +16,8 @@ class OrderItem(Base):
     date_change = Column(Date, nullable=False)
 
     order = relationship("Order", back_populates="items")
+
+    # Itens de um pedido e item de um produto no carrinho
+    __table_args__ = (
+        Index("ix_order_item_order_product", "id_order", "id_product"),
+    )
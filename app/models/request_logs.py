@@ -11,4 +11,6 @@ class RequestLog(Base):
     status_code = Column(Integer, nullable=False, comment="Código HTTP de resposta")
     process_time_ms = Column(Float, nullable=False, comment="Tempo de processamento em milissegundos")
     query_count = Column(Integer, nullable=False, comment="Número de queries SQL executadas")
+    db_time_ms = Column(Float, nullable=True, comment="Tempo total gasto no banco em milissegundos")
+    rows_returned = Column(Integer, nullable=True, comment="Número de linhas retornadas pelas queries")
     created_at = Column(DateTime, default=datetime.utcnow, comment="Timestamp do registro")
\ No newline at end of file
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index, UniqueConstraint
+from app.database import Base
+from datetime import datetime
+
+class Reservation(Base):
+    __tablename__ = "reservation"
+
+    id_reservation = Column(Integer, primary_key=True, index=True)
+    id_product = Column(Integer, ForeignKey("product.id_product", ondelete="CASCADE"), nullable=False)
+    id_order = Column(Integer, ForeignKey("order.id_order", ondelete="CASCADE"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Uma reserva por produto em cada carrinho
+        UniqueConstraint("id_order", "id_product", name="uq_reservation_order_product"),
+        # Soma das reservas ativas de um produto sem varrer os carrinhos
+        Index("ix_reservation_product_expires", "id_product", "expires_at"),
+        # Varredura das reservas expiradas
+        Index("ix_reservation_expires", "expires_at"),
+    )
@@ -1,4 +1,5 @@
 from sqlalchemy import Column, Integer, String, Date, Numeric
+from sqlalchemy.orm import column_property
 from app.database import Base
 
 class Store(Base):
@@ -10,7 +11,8 @@ class Store(Base):
     creation_date = Column(Date, nullable=False)
     email = Column(String, nullable=False, unique=True)
     phone_number = Column(String, nullable=False)
-    image = Column(String, index=True)
+    # active_history: o valor antigo entra no histórico do flush (contagem de referências em app/image_store.py)
+    image = column_property(Column(String, index=True), active_history=True)
     created_by = Column(Integer, nullable=False)
     balance = Column(
         Numeric(precision=20, scale=2),  # equivale ao max_digits=20, decimal_places=2
@@ -0,0 +1,10 @@
+from sqlalchemy import Column, String, BigInteger
+from app.database import Base
+
+# Contador de alterações por tabela, incrementado a cada commit que a altera.
+# Usado nos ETags das leituras (app/etags.py).
+class TableVersion(Base):
+    __tablename__ = "table_version"
+
+    table_name = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
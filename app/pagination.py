@@ -0,0 +1,101 @@
+import base64
+import json
+from typing import NamedTuple, Optional
+
+from fastapi import HTTPException, Query, Request, Response
+from sqlalchemy import tuple_
+
+# Paginação das listagens. Com `cursor` a página é buscada por keyset
+# (WHERE chave > último visto ORDER BY chave), com custo constante em
+# qualquer profundidade; sem cursor continua valendo o modo offset (`skip`)
+# dos clientes antigos. Nos dois modos o corpo segue sendo a lista e o
+# próximo cursor vai nos cabeçalhos Link (rel="next") e X-Next-Cursor.
+MAX_PAGE_SIZE = 1000
+
+
+class PageParams(NamedTuple):
+    skip: int
+    limit: int
+    cursor: Optional[str]
+
+
+class Page(NamedTuple):
+    items: list
+    next_cursor: Optional[str]
+
+
+def page_params(
+        skip: int = Query(0, ge=0),
+        limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = None,
+    ) -> PageParams:
+    return PageParams(skip=skip, limit=limit, cursor=cursor)
+
+
+def encode_cursor(values) -> str:
+    raw = json.dumps(list(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        values = None
+    if not isinstance(values, list) or not values:
+        raise HTTPException(status_code=400, detail="Cursor de paginação inválido")
+    return values
+
+
+def cursor_value(column, value):
+    '''Confere o valor do cursor com o tipo da coluna: um tipo errado viraria erro do banco.'''
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if python_type is float and isinstance(value, int) and not isinstance(value, bool):
+        return float(value)
+    if python_type in (int, float, str) and (type(value) is not python_type):
+        raise HTTPException(status_code=400, detail="Cursor de paginação inválido")
+    return value
+
+
+def apply_page(query, key_columns, params: PageParams):
+    '''
+    Aplica ordenação pela chave e o modo de paginação a uma Query ou select().
+    Busca limit + 1 linhas para saber se existe próxima página.
+    '''
+    query = query.order_by(*key_columns)
+    if params.cursor is not None:
+        values = decode_cursor(params.cursor)
+        if len(values) != len(key_columns):
+            raise HTTPException(status_code=400, detail="Cursor de paginação inválido")
+        values = [cursor_value(column, value) for column, value in zip(key_columns, values)]
+        if len(key_columns) == 1:
+            query = query.filter(key_columns[0] > values[0])
+        else:
+            query = query.filter(tuple_(*key_columns) > tuple_(*values))
+    else:
+        query = query.offset(params.skip)
+    return query.limit(params.limit + 1)
+
+
+def split_page(rows, key_columns, params: PageParams) -> Page:
+    items = list(rows[:params.limit])
+    next_cursor = None
+    if len(rows) > params.limit:
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, column.key) for column in key_columns)
+    return Page(items=items, next_cursor=next_cursor)
+
+
+def paginate(query, key_columns, params: PageParams) -> Page:
+    return split_page(apply_page(query, key_columns, params).all(), key_columns, params)
+
+
+def set_page_headers(request: Request, response: Response, page: Page):
+    if page.next_cursor is None:
+        return
+    url = request.url.remove_query_params(["skip", "cursor"]).include_query_params(cursor=page.next_cursor)
+    response.headers["Link"] = f'<{url}>; rel="next"'
+    response.headers["X-Next-Cursor"] = page.next_cursor
@@ -0,0 +1,50 @@
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Tempo de espera para obter uma conexão do pool",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Conexões em uso no momento")
+POOL_OVERFLOW = Gauge("db_pool_overflow", "Conexões de overflow abertas além do pool_size")
+POOL_SIZE = Gauge("db_pool_size", "Tamanho configurado do pool")
+POOL_CONNECTS = Counter("db_pool_connections_opened_total", "Conexões DBAPI abertas pelo pool")
+POOL_CLOSES = Counter("db_pool_connections_closed_total", "Conexões DBAPI fechadas pelo pool")
+POOL_INVALIDATIONS = Counter("db_pool_connections_invalidated_total", "Conexões invalidadas (erro ou pre-ping)")
+
+
+class TimedQueuePool(QueuePool):
+    '''QueuePool que mede o tempo de espera de cada checkout.'''
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+
+
+def install_pool_metrics(engine):
+    pool = engine.pool
+    if hasattr(pool, "checkedout"):
+        POOL_CHECKED_OUT.set_function(lambda: engine.pool.checkedout())
+    if hasattr(pool, "overflow"):
+        POOL_OVERFLOW.set_function(lambda: max(engine.pool.overflow(), 0))
+    if hasattr(pool, "size"):
+        POOL_SIZE.set_function(lambda: engine.pool.size())
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        POOL_CONNECTS.inc()
+
+    @event.listens_for(engine, "close")
+    def on_close(dbapi_connection, connection_record):
+        POOL_CLOSES.inc()
+
+    @event.listens_for(engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        POOL_INVALIDATIONS.inc()
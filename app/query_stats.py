@@ -0,0 +1,49 @@
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import event
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    db_time_ms: float = 0.0
+    rows: int = 0
+
+
+# Estatísticas da requisição atual. O objeto é mutável, então as queries
+# executadas no threadpool (rotas sync) somam no mesmo contador do middleware.
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+
+def start_query_stats() -> QueryStats:
+    stats = QueryStats()
+    current_query_stats.set(stats)
+    return stats
+
+
+def install_query_stats(engine):
+    '''
+    Registra uma única vez os listeners no engine. Cada statement é atribuído
+    à requisição corrente via contextvar, sem interferência entre requisições.
+    '''
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if current_query_stats.get() is not None:
+            conn.info["query_start_time"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = current_query_stats.get()
+        if stats is None:
+            return
+        start = conn.info.pop("query_start_time", None)
+        if start is None:
+            return
+        stats.count += 1
+        stats.db_time_ms += (time.perf_counter() - start) * 1000
+        if cursor.description is not None and cursor.rowcount > 0:
+            stats.rows += cursor.rowcount
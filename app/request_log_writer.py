@@ -0,0 +1,191 @@
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import time
+from datetime import datetime
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import insert
+
+from app.database import SessionLocal
+from app.models.request_logs import RequestLog
+
+logger = logging.getLogger("uvicorn")
+
+REQUEST_LOG_BATCH_SIZE = int(os.getenv("REQUEST_LOG_BATCH_SIZE", "200"))
+REQUEST_LOG_FLUSH_INTERVAL_MS = int(os.getenv("REQUEST_LOG_FLUSH_INTERVAL_MS", "1000"))
+REQUEST_LOG_QUEUE_MAXSIZE = int(os.getenv("REQUEST_LOG_QUEUE_MAXSIZE", "10000"))
+REQUEST_LOG_OVERFLOW = os.getenv("REQUEST_LOG_OVERFLOW", "spill")  # "spill" ou "drop"
+REQUEST_LOG_SPILL_PATH = os.getenv("REQUEST_LOG_SPILL_PATH", "request_logs.spill.ndjson")
+
+QUEUE_DEPTH = Gauge("request_log_queue_depth", "Entradas de log aguardando gravação no banco")
+FLUSH_LATENCY = Histogram("request_log_flush_seconds", "Tempo de cada gravação em lote de request_logs")
+FLUSHED_ROWS = Counter("request_log_flushed_rows_total", "Linhas de request_logs gravadas no banco")
+DROPPED_ROWS = Counter("request_log_dropped_total", "Entradas de log descartadas por fila cheia")
+SPILLED_ROWS = Counter("request_log_spilled_total", "Entradas de log enviadas para o arquivo de spill")
+REPLAY_SKIPPED_ROWS = Counter("request_log_replay_skipped_total", "Linhas do spill ilegíveis, ignoradas ao reenviar")
+
+# Marca de fim na fila: o loop grava o lote parcial e termina
+_STOP = object()
+
+
+class RequestLogWriter:
+    '''
+    Fila em memória para os logs de requisição. O middleware apenas enfileira;
+    uma task em background grava em lote (insert multi-linha) a cada
+    `batch_size` entradas ou `flush_interval_ms` milissegundos.
+    '''
+
+    def __init__(
+        self,
+        batch_size: int = REQUEST_LOG_BATCH_SIZE,
+        flush_interval_ms: int = REQUEST_LOG_FLUSH_INTERVAL_MS,
+        maxsize: int = REQUEST_LOG_QUEUE_MAXSIZE,
+        overflow: str = REQUEST_LOG_OVERFLOW,
+        spill_path: str = REQUEST_LOG_SPILL_PATH,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.spill_path = spill_path
+        self._queue = None
+        self._task = None
+
+    @property
+    def queue(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.maxsize)
+        return self._queue
+
+    def enqueue(self, entry: dict):
+        entry.setdefault("created_at", datetime.utcnow())
+        try:
+            self.queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            if self.overflow == "spill":
+                self._spill([entry])
+            else:
+                DROPPED_ROWS.inc()
+        QUEUE_DEPTH.set(self.queue.qsize())
+
+    async def start(self):
+        if self._task is None:
+            try:
+                await asyncio.to_thread(self._replay_spill)
+            except Exception as e:
+                # O spill fica em disco para a próxima subida; não impede esta
+                logger.error(f"Erro ao reenviar spill de logs: {e}")
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        # Pede ao loop que grave o lote em andamento e termine; depois grava o
+        # que ainda chegou na fila
+        if self._task is not None:
+            await self.queue.put(_STOP)
+            await self._task
+            self._task = None
+        batch = []
+        while not self.queue.empty():
+            entry = self.queue.get_nowait()
+            if entry is not _STOP:
+                batch.append(entry)
+        if batch:
+            await asyncio.to_thread(self._flush, batch)
+        QUEUE_DEPTH.set(0)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            entry = await self.queue.get()
+            if entry is _STOP:
+                break
+            batch = [entry]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    entry = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if entry is _STOP:
+                    stopping = True
+                    break
+                batch.append(entry)
+            QUEUE_DEPTH.set(self.queue.qsize())
+            await asyncio.to_thread(self._flush, batch)
+
+    def _flush(self, batch: list):
+        start = time.perf_counter()
+        db = SessionLocal()
+        try:
+            db.execute(insert(RequestLog), batch)
+            db.commit()
+            FLUSHED_ROWS.inc(len(batch))
+        except Exception as e:
+            logger.error(f"Erro ao salvar logs no banco: {e}")
+            db.rollback()
+            if self.overflow == "spill":
+                self._spill(batch)
+            else:
+                DROPPED_ROWS.inc(len(batch))
+        finally:
+            db.close()
+            FLUSH_LATENCY.observe(time.perf_counter() - start)
+
+    def _spill(self, entries: list):
+        try:
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                for entry in entries:
+                    f.write(json.dumps(entry, default=str) + "\n")
+            SPILLED_ROWS.inc(len(entries))
+        except OSError as e:
+            logger.error(f"Erro ao gravar spill de logs: {e}")
+            DROPPED_ROWS.inc(len(entries))
+
+    def _replay_spill(self):
+        # Reenvia para o banco o que foi salvo em disco sob pressão. Os
+        # workers sobem juntos e dividem o arquivo: só quem pega a trava
+        # reenvia, os outros seguem sem esperar. Um .replay que sobrou de uma
+        # subida interrompida vai primeiro (pode repetir linhas já gravadas,
+        # mas não perde nenhuma).
+        with open(f"{self.spill_path}.lock", "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return
+            replay_path = f"{self.spill_path}.replay"
+            if os.path.exists(replay_path):
+                self._replay_file(replay_path)
+            if os.path.exists(self.spill_path):
+                os.replace(self.spill_path, replay_path)
+                self._replay_file(replay_path)
+
+    def _replay_file(self, replay_path: str):
+        batch = []
+        with open(replay_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    entry["created_at"] = datetime.fromisoformat(entry["created_at"])
+                except (ValueError, KeyError, TypeError):
+                    # Linha cortada por uma queda no meio da escrita
+                    REPLAY_SKIPPED_ROWS.inc()
+                    continue
+                batch.append(entry)
+                if len(batch) >= self.batch_size:
+                    self._flush(batch)
+                    batch = []
+        if batch:
+            self._flush(batch)
+        try:
+            os.remove(replay_path)
+        except FileNotFoundError:
+            pass
+
+request_log_writer = RequestLogWriter()
@@ -0,0 +1,64 @@
+import logging
+import time
+from datetime import datetime
+
+from starlette.datastructures import MutableHeaders
+
+from app.query_stats import start_query_stats
+from app.request_log_writer import request_log_writer
+
+logger = logging.getLogger("uvicorn")
+logger.setLevel(logging.INFO)
+
+
+class RequestTimingMiddleware:
+    '''
+    Middleware ASGI puro (sem BaseHTTPMiddleware: nenhuma task nem stream
+    intermediário por requisição). Os cabeçalhos de tempo e queries são
+    preenchidos no início da resposta; o log e a linha em request_log saem
+    quando a resposta termina, incluindo o corpo em streaming.
+    '''
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        # Contador da requisição atual (listener fixo em app/query_stats.py)
+        stats = start_query_stats()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                process_time = (time.perf_counter() - start_time) * 1000  # ms
+                headers = MutableHeaders(scope=message)
+                headers["X-Process-Time-ms"] = str(round(process_time, 2))
+                headers["X-Query-Count"] = str(stats.count)
+                headers["X-DB-Time-ms"] = str(round(stats.db_time_ms, 2))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            process_time = (time.perf_counter() - start_time) * 1000
+            path = scope["path"]
+            logger.info(
+                f"{scope['method']} {path} - {process_time:.2f} ms - {stats.count} queries - {stats.db_time_ms:.2f} ms no banco"
+            )
+            # Enfileira para gravação em lote (ver app/request_log_writer.py)
+            request_log_writer.enqueue({
+                "method": scope["method"],
+                "path": path,
+                "status_code": status_code,
+                "process_time_ms": round(process_time, 2),
+                "query_count": stats.count,
+                "db_time_ms": round(stats.db_time_ms, 2),
+                "rows_returned": stats.rows,
+                "created_at": datetime.utcnow(),
+            })
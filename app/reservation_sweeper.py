@@ -0,0 +1,54 @@
+import asyncio
+import logging
+import os
+
+from prometheus_client import Counter
+
+from app.crud.reservation import delete_expired_reservations
+from app.database import SessionLocal
+
+logger = logging.getLogger("uvicorn")
+
+RESERVATION_SWEEP_INTERVAL_S = int(os.getenv("RESERVATION_SWEEP_INTERVAL_S", "60"))
+
+EXPIRED_RESERVATIONS = Counter("reservation_expired_total", "Reservas de carrinho removidas por expiração")
+
+
+class ReservationSweeper:
+    '''Remove periodicamente as reservas vencidas (task em background).'''
+
+    def __init__(self, interval: int = RESERVATION_SWEEP_INTERVAL_S):
+        self.interval = interval
+        self._task = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                deleted = await asyncio.to_thread(self._sweep)
+                EXPIRED_RESERVATIONS.inc(deleted)
+            except Exception as e:
+                logger.error(f"Erro ao remover reservas expiradas: {e}")
+
+    def _sweep(self):
+        db = SessionLocal()
+        try:
+            return delete_expired_reservations(db)
+        finally:
+            db.close()
+
+
+reservation_sweeper = ReservationSweeper()
@@ -0,0 +1,130 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import Request, Response
+from prometheus_client import Counter, Gauge
+
+from app.change_tracking import on_tables_committed
+from app.etags import ConditionalRoute, check_user, etag_matches, request_key, requires_user
+
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2000"))
+RESPONSE_CACHE_TTL_S = float(os.getenv("RESPONSE_CACHE_TTL_S", "60"))
+
+CACHE_HITS = Counter("response_cache_hits_total", "Respostas servidas do cache", ["route"])
+CACHE_MISSES = Counter("response_cache_misses_total", "Respostas geradas por falta no cache", ["route"])
+CACHE_EVICTIONS = Counter("response_cache_evictions_total", "Entradas removidas do cache", ["reason"])
+CACHE_ENTRIES = Gauge("response_cache_entries", "Entradas no cache de respostas")
+
+
+class ResponseCache:
+    '''
+    Cache em memória das respostas de leitura (LRU com TTL). Cada entrada
+    guarda a versão das tabelas de que depende no momento em que a consulta
+    começou; um commit que altera uma dessas tabelas incrementa a versão e
+    a entrada deixa de valer. Só invalida o processo atual: com vários
+    workers, o TTL limita quanto tempo os outros podem servir dado antigo.
+    '''
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES, ttl: float = RESPONSE_CACHE_TTL_S):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def versions(self, tables):
+        with self._lock:
+            return tuple(self._versions.get(table, 0) for table in tables)
+
+    def invalidate(self, tables):
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+
+    def get(self, key, tables):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, versions, body, headers = entry
+            if expires_at < time.monotonic():
+                reason = "ttl"
+            elif versions != tuple(self._versions.get(table, 0) for table in tables):
+                reason = "write"
+            else:
+                self._entries.move_to_end(key)
+                return body, headers
+            del self._entries[key]
+            CACHE_EVICTIONS.labels(reason).inc()
+            CACHE_ENTRIES.set(len(self._entries))
+            return None
+
+    def put(self, key, versions, body, headers):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, versions, body, headers)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                CACHE_EVICTIONS.labels("lru").inc()
+            CACHE_ENTRIES.set(len(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            CACHE_ENTRIES.set(0)
+
+
+response_cache = ResponseCache()
+# Um commit que altera as tabelas lidas invalida as entradas que dependem delas
+on_tables_committed(response_cache.invalidate)
+
+
+def cached(*tables: str):
+    '''
+    Marca uma rota GET como cacheável, declarando as tabelas que a resposta
+    lê. Deve ficar abaixo do decorator do router, que usa CachedRoute.
+    '''
+    def decorator(endpoint):
+        endpoint.cache_tables = tables
+        return endpoint
+    return decorator
+
+
+class CachedRoute(ConditionalRoute):
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        tables = getattr(self.endpoint, "cache_tables", None)
+        if not tables or not RESPONSE_CACHE_ENABLED:
+            return handler
+        route = self.path
+        authenticated = requires_user(self.dependant)
+
+        async def cached_handler(request: Request) -> Response:
+            if authenticated:
+                await check_user(request)
+            key = request_key(request)
+            # Cache-Control: no-cache força gerar a resposta de novo
+            if "no-cache" not in request.headers.get("cache-control", ""):
+                hit = response_cache.get(key, tables)
+                if hit is not None:
+                    CACHE_HITS.labels(route).inc()
+                    body, headers = hit
+                    # A entrada guarda o ETag gerado junto com o corpo
+                    if "etag" in headers and etag_matches(request.headers.get("if-none-match"), headers["etag"]):
+                        return Response(status_code=304, headers={"ETag": headers["etag"], "X-Cache": "HIT"})
+                    return Response(content=body, headers={**headers, "X-Cache": "HIT"})
+
+            CACHE_MISSES.labels(route).inc()
+            # Versões lidas antes da consulta: um commit durante a leitura invalida a entrada
+            versions = response_cache.versions(tables)
+            response = await handler(request)
+            if request.method == "GET" and response.status_code == 200 and hasattr(response, "body"):
+                headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+                response_cache.put(key, versions, response.body, headers)
+            response.headers["X-Cache"] = "MISS"
+            return response
+
+        return cached_handler
@@ -0,0 +1,74 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud import product as product_crud
+from app.crud import stock as stock_crud
+from app.database import get_async_db
+from app.loading import loading_options
+from app.pagination import PageParams, apply_page, page_params, set_page_headers, split_page
+from app.etags import versioned
+from app.response_cache import CachedRoute, cached
+from app.models import store, order
+from app.schemas import product as product_schemas
+from app.schemas import stock as stock_schemas
+from app.schemas.order import OrderDetailOut
+from app.schemas.store import StoreOut
+
+# Versões assíncronas das leituras mais acessadas. Só é registrado quando
+# ASYNC_DB_ENABLED=true e vem antes dos routers síncronos em app/main.py,
+# então as mesmas URLs passam a ser atendidas sem ocupar o threadpool. Os ids
+# são {id:int}: caminhos fixos dos routers síncronos, como /api/orders/my/,
+# não podem ser capturados por uma rota daqui.
+router = APIRouter(route_class=CachedRoute)
+
+
+@router.get("/api/products/all", response_model=list[product_schemas.ProductOut])
+@cached("product", "stock")
+@versioned("product", "stock")
+async def read_all_products(request: Request, response: Response, params: PageParams = Depends(page_params), db: AsyncSession = Depends(get_async_db)):
+    page = await product_crud.get_all_products_with_stock_async(db, params)
+    set_page_headers(request, response, page)
+    return page.items
+
+
+@router.get("/api/products/{id:int}", response_model=product_schemas.ProductOut)
+@cached("product", "stock")
+@versioned("product", "stock")
+async def read_product(id: int, db: AsyncSession = Depends(get_async_db)):
+    return await product_crud.get_product_async(db, id)
+
+
+@router.get("/api/stocks/all/", response_model=list[stock_schemas.StockOut])
+@cached("stock", "product")
+@versioned("stock", "product")
+async def read_all_stocks(request: Request, response: Response, params: PageParams = Depends(page_params), db: AsyncSession = Depends(get_async_db)):
+    page = await stock_crud.get_all_stocks_async(db, params)
+    set_page_headers(request, response, page)
+    return page.items
+
+
+@router.get("/api/stores/all", response_model=List[StoreOut])
+@cached("store")
+@versioned("store")
+async def list_stores(request: Request, response: Response, params: PageParams = Depends(page_params), db: AsyncSession = Depends(get_async_db)):
+    result = await db.execute(apply_page(select(store.Store), [store.Store.id_store], params))
+    page = split_page(result.scalars().all(), [store.Store.id_store], params)
+    set_page_headers(request, response, page)
+    return page.items
+
+
+@router.get("/api/orders/{id:int}/", response_model=OrderDetailOut)
+@versioned("order", "order_item")
+async def get_order(id: int = Path(..., gt=0), db: AsyncSession = Depends(get_async_db)):
+    result = await db.execute(
+        select(order.Order)
+        .options(*loading_options("order_with_items"))
+        .filter(order.Order.id_order == id)
+    )
+    db_order = result.scalars().first()
+    if not db_order:
+        raise HTTPException(status_code=404, detail="Pedido não encontrado")
+    return db_order
@@ -0,0 +1,52 @@
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.crud import audit as crud
+from app.database import get_db, SessionLocal
+from app.schemas.audit import AuditLogOut, AuditLogPage
+
+router = APIRouter()
+
+# ------------------------
+# ROTAS DE AUDITORIA
+# ------------------------
+
+#Consultar auditoria com filtros e paginação por cursor
+@router.get("/auditoria", response_model=AuditLogPage)
+def list_audit_logs(
+    table_name: Optional[str] = None,
+    operation: Optional[str] = None,
+    user: Optional[int] = None,
+    entity_id: Optional[int] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    cursor: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    db: Session = Depends(get_db),
+):
+    filters = dict(table_name=table_name, operation=operation, user=user, entity_id=entity_id, start=start, end=end)
+
+    if format == "ndjson":
+        # Sessão própria: a do get_db é fechada antes do fim do streaming
+        def generate():
+            stream_db = SessionLocal()
+            try:
+                for log in crud.stream_audit_logs(stream_db, cursor=cursor, **filters):
+                    yield AuditLogOut.model_validate(log, from_attributes=True).model_dump_json() + "\n"
+            finally:
+                stream_db.close()
+
+        return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+    return crud.list_audit_logs(db, cursor=cursor, limit=limit, **filters)
+
+
+#Reconstrói o estado de um registro em um instante, reaplicando os diffs
+@router.get("/auditoria/{table_name}/{entity_id}/estado")
+def read_entity_state(table_name: str, entity_id: int, at: Optional[datetime] = None, db: Session = Depends(get_db)):
+    return crud.reconstruct_entity_state(db, table_name, entity_id, at)
@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+
+from app.crud import export as crud
+from app.database import SessionLocal
+
+router = APIRouter(prefix="/api")
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# ------------------------
+# ROTAS DE EXPORTAÇÃO
+# ------------------------
+
+#Exporta uma tabela inteira em NDJSON ou CSV, em streaming
+@router.get("/export/{name}")
+def export_table(name: str, format: str = Query("ndjson", pattern="^(ndjson|csv)$")):
+    # Valida antes de iniciar o streaming, para responder 404 normalmente
+    crud.export_statement(name)
+
+    # Sessão própria: a do get_db é fechada antes do fim do streaming
+    def generate():
+        stream_db = SessionLocal()
+        try:
+            yield from crud.stream_export(stream_db, name, format)
+        finally:
+            stream_db.close()
+
+    return StreamingResponse(
+        generate(),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{format}"'},
+    )
@@ -2,10 +2,11 @@
 from app.crud import movement as crud
 from sqlalchemy.orm import Session
 from app.schemas import movement as schemas
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from app import database
 from app.dependencies.auth import get_current_user
 from app.database import get_db
+from app.pagination import PageParams, page_params, set_page_headers
 router = APIRouter(prefix="/api")
 
 # ------------------------
@@ -16,13 +17,19 @@ router = APIRouter(prefix="/api")
 def create_movement(movement: schemas.StockMovementCreate, db: Session = Depends(get_db),  user_data: dict = Depends(get_current_user)):
     return crud.create_stock_movement(db, movement, user_data=user_data)
 
+#Criar várias movimentações em uma única transação
+@router.post("/stocks/movements/batch", response_model=list[schemas.StockMovementBatchResult])
+def create_movements_batch(batch: schemas.StockMovementBatchCreate, db: Session = Depends(get_db), user_data: dict = Depends(get_current_user)):
+    return crud.create_stock_movements_batch(db, batch.movements, user_data=user_data)
+
 #Consultar Movimentações
 @router.get("/stocks/movements/", response_model=list[schemas.StockMovementOut])
-def read_all_movements(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    movements = crud.get_all_stock_movements(db, skip, limit)
-    if not movements:
+def read_all_movements(request: Request, response: Response, params: PageParams = Depends(page_params), db: Session = Depends(get_db)):
+    page = crud.get_all_stock_movements(db, params)
+    if not page.items:
         raise HTTPException(status_code=404, detail="Nenhuma movimentação Encontrada!")
-    return movements
+    set_page_headers(request, response, page)
+    return page.items
 
 #Consultar movimentação específica
 @router.get("/stocks/movements/{id}", response_model=schemas.StockMovementOut)
@@ -1,39 +1,52 @@
 from decimal import Decimal
-from fastapi import Depends, HTTPException, Path, status, APIRouter
+from fastapi import Depends, HTTPException, Path, status, APIRouter, Request, Response
 from sqlalchemy.orm import Session
+from sqlalchemy import case, func
 from typing import List
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
 from app.models import store, order, order_item
-from app.schemas.order import OrderCreate, OrderOut, OrderItemPatch, OrderStatus
+from app.schemas.order import OrderCreate, OrderDetailOut, OrderOut, OrderItemPatch, OrderStatus
 from app.crud.product import get_product
 from app.dependencies.auth import get_current_user
 from app.schemas.order_item import OrderItemCreate, OrderItemOut
 from app.database import get_db
+from app.etags import ConditionalRoute, versioned
+from app.loading import loading_options
+from app.pagination import PageParams, page_params, paginate, set_page_headers
+from app.audit import audit_bulk_changes
+from app.crud.reservation import lock_product, hold_stock, release_stock, get_reserved_quantities
 from app.models import models
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
 from app.strategies.order_total_value import OrderTotalCalculationStrategy, RegularOrderTotalCalculation, DiscountedOrderTotalCalculation
 
-router = APIRouter()
+router = APIRouter(route_class=ConditionalRoute)
 
 def recalculate_order_total(order_id: int, db: Session, strategy: OrderTotalCalculationStrategy):
+    # Fallback: recalcula o total inteiro via SUM no banco. As rotas de itens
+    # usam os ajustes incrementais da strategy (um UPDATE por alteração).
     total_value = strategy.calculate_total(db, order_id)
-    db_order = db.query(order.Order).filter(order.Order.id_order == order_id).first()
-    db_order.total_value = total_value
+    db.query(order.Order).filter(order.Order.id_order == order_id).update(
+        {order.Order.total_value: total_value}, synchronize_session=False
+    )
     db.commit()
 
 @router.get("/api/orders/my/", response_model=List[OrderOut])
-def list_my_orders(db: Session = Depends(get_db), user_data: dict = Depends(get_current_user)):
+@versioned("order")
+def list_my_orders(request: Request, response: Response, params: PageParams = Depends(page_params), db: Session = Depends(get_db), user_data: dict = Depends(get_current_user)):
     user_id = user_data["user_id"]
-    orders = db.query(order.Order).filter(order.Order.id_user == user_id).all()
-    return orders
+    page = paginate(db.query(order.Order).filter(order.Order.id_user == user_id), [order.Order.id_order], params)
+    set_page_headers(request, response, page)
+    return page.items
 
 @router.get("/api/orders/", response_model=List[OrderOut])
-def list_orders(db: Session = Depends(get_db)):
-    return db.query(order.Order).all()
+def list_orders(request: Request, response: Response, params: PageParams = Depends(page_params), db: Session = Depends(get_db)):
+    page = paginate(db.query(order.Order), [order.Order.id_order], params)
+    set_page_headers(request, response, page)
+    return page.items
 
 @router.post("/api/orders/", response_model=OrderOut)
 def create_order(order_data: OrderCreate, db: Session = Depends(get_db), user_data: dict = Depends(get_current_user)):
@@ -50,13 +63,32 @@ def create_order(order_data: OrderCreate, db: Session = Depends(get_db), user_da
     return new_order
 
 
+@router.patch("/api/orders/{id}/recalculate/", response_model=OrderOut)
+def recalculate_order(id: int, db: Session = Depends(get_db)):
+    db_order = db.query(order.Order).filter(order.Order.id_order == id).first()
+    if not db_order:
+        raise HTTPException(status_code=404, detail="Pedido não encontrado")
+
+    # Verificação de consistência: só regrava se o total incremental divergiu
+    strategy = RegularOrderTotalCalculation()
+    if not strategy.is_consistent(db, id):
+        recalculate_order_total(id, db, strategy)
+        db.refresh(db_order)
+    return db_order
+
 @router.patch("/api/orders/{id}/finalize/", response_model=OrderOut)
 def finalize_order(id: int, db: Session = Depends(get_db)):
     return finalize_order_logic(id, db)
 
-@router.get("/api/orders/{id}/", response_model=OrderOut)
+@router.get("/api/orders/{id}/", response_model=OrderDetailOut)
+@versioned("order", "order_item")
 def get_order(id: int = Path(..., gt=0), db: Session = Depends(get_db)):
-    db_order = db.query(order.Order).filter(order.Order.id_order == id).first()
+    db_order = (
+        db.query(order.Order)
+        .options(*loading_options("order_with_items"))
+        .filter(order.Order.id_order == id)
+        .first()
+    )
     if not db_order:
         raise HTTPException(status_code=404, detail="Pedido não encontrado")
     return db_order
@@ -104,7 +136,7 @@ def delete_order(id: int, db: Session = Depends(get_db), user_data: dict = Depen
 
 @router.post("/api/orders/{id}/items/", response_model=OrderItemOut)
 def create_order_item(id: int, item_data: OrderItemCreate, db: Session = Depends(get_db), user_data: dict = Depends(get_current_user)):
-    product = db.query(models.Product).filter(models.Product.id_product == item_data.id_product).first()
+    product = lock_product(db, item_data.id_product)
     if not product:
         raise HTTPException(status_code=400, detail="Produto não encontrado.")
 
@@ -116,37 +148,47 @@ def create_order_item(id: int, item_data: OrderItemCreate, db: Session = Depends
     requested_quantity = item_data.quantity
     existing_quantity = existing_item.quantity if existing_item else 0
 
-    if requested_quantity + existing_quantity > product.quantity:
-        raise HTTPException(status_code=400, detail="Quantidade total no carrinho excede o estoque disponível.")
+    # Reserva o total do carrinho contra o disponível (estoque - reservas de outros carrinhos)
+    hold_stock(db, product, id, requested_quantity + existing_quantity,
+               detail="Quantidade total no carrinho excede o estoque disponível.")
 
     try:
+        #strategy = DiscountedOrderTotalCalculation()
+        strategy = RegularOrderTotalCalculation()
         if existing_item:
+            old_subtotal = existing_item.subtotal
             existing_item.quantity += item_data.quantity
             existing_item.subtotal = existing_item.unit_price * existing_item.quantity
+            strategy.item_changed(db, id, old_subtotal, existing_item.subtotal)
             db.commit()
             db.refresh(existing_item)
         else:
             new_item = order_item.OrderItem(**item_data.dict(), id_order=id)
             db.add(new_item)
+            strategy.item_added(db, id, new_item.subtotal)
             db.commit()
             db.refresh(new_item)
 
-        #strategy = DiscountedOrderTotalCalculation()
-        strategy = RegularOrderTotalCalculation()
-        recalculate_order_total(id, db, strategy)
-
         return new_item if not existing_item else existing_item
     except Exception as e:
         raise HTTPException(status_code=422, detail=f"Erro ao adicionar item ao pedido: {str(e)}")
 
 
 @router.get("/api/orders/", response_model=List[OrderOut])
-def list_orders(db: Session = Depends(get_db)):
-    return db.query(order.Order).all()
+def list_orders(request: Request, response: Response, params: PageParams = Depends(page_params), db: Session = Depends(get_db)):
+    page = paginate(db.query(order.Order), [order.Order.id_order], params)
+    set_page_headers(request, response, page)
+    return page.items
 
-@router.get("/api/orders/{id}/", response_model=OrderOut)
+@router.get("/api/orders/{id}/", response_model=OrderDetailOut)
+@versioned("order", "order_item")
 def get_order(id: int = Path(..., gt=0), db: Session = Depends(get_db)):
-    db_order = db.query(order.Order).filter(order.Order.id_order == id).first()
+    db_order = (
+        db.query(order.Order)
+        .options(*loading_options("order_with_items"))
+        .filter(order.Order.id_order == id)
+        .first()
+    )
     if not db_order:
         raise HTTPException(status_code=404, detail="Pedido não encontrado")
     return db_order
@@ -188,8 +230,11 @@ def delete_order(id: int, db: Session = Depends(get_db),  user_data: dict = Depe
     return
 
 @router.get("/api/orders/{id}/items/", response_model=List[OrderItemOut])
-def list_order_items(id: int, db: Session = Depends(get_db)):
-    return db.query(order_item.OrderItem).filter(order_item.OrderItem.id_order == id).all()
+def list_order_items(id: int, request: Request, response: Response, params: PageParams = Depends(page_params), db: Session = Depends(get_db)):
+    query = db.query(order_item.OrderItem).filter(order_item.OrderItem.id_order == id)
+    page = paginate(query, [order_item.OrderItem.id_order_item], params)
+    set_page_headers(request, response, page)
+    return page.items
 
 @router.put("/api/orders/items/{id}/", response_model=OrderItemOut)
 def update_order_item(id: int, item_data: OrderItemCreate, db: Session = Depends(get_db), user_data: dict = Depends(get_current_user)):
@@ -197,15 +242,23 @@ def update_order_item(id: int, item_data: OrderItemCreate, db: Session = Depends
     if not item:
         raise HTTPException(status_code=404, detail="Item do pedido não encontrado")
 
+    old_subtotal = item.subtotal
+    old_product_id = item.id_product
     for field, value in item_data.dict().items():
         setattr(item, field, value)
 
-    db.commit()
-    db.refresh(item)
+    if item.id_product != old_product_id:
+        release_stock(db, item.id_order, old_product_id)
+    product = lock_product(db, item.id_product)
+    if not product:
+        raise HTTPException(status_code=400, detail="Produto não encontrado.")
+    hold_stock(db, product, item.id_order, item.quantity)
 
     #strategy = DiscountedOrderTotalCalculation()
     strategy = RegularOrderTotalCalculation()
-    recalculate_order_total(item.id_order, db, strategy)
+    strategy.item_changed(db, item.id_order, old_subtotal, item.subtotal)
+    db.commit()
+    db.refresh(item)
     return item
 
 @router.delete("/api/orders/items/{id}/", status_code=status.HTTP_204_NO_CONTENT)
@@ -214,13 +267,12 @@ def delete_order_item(id: int, db: Session = Depends(get_db), user_data: dict =
     if not item:
         raise HTTPException(status_code=404, detail="Item do pedido não encontrado")
 
-    order_id = item.id_order
-    db.delete(item)
-    db.commit()
-
     #strategy = DiscountedOrderTotalCalculation()
     strategy = RegularOrderTotalCalculation()
-    recalculate_order_total(order_id, db, strategy)
+    strategy.item_removed(db, item.id_order, item.subtotal)
+    release_stock(db, item.id_order, item.id_product)
+    db.delete(item)
+    db.commit()
     return {"detail": "Item do pedido deletado com sucesso"}
 
 @router.patch("/api/orders/items/{id}/", response_model=OrderItemOut)
@@ -229,26 +281,31 @@ def patch_order_item(id: int, item_data: OrderItemPatch, db: Session = Depends(g
     if not item:
         raise HTTPException(status_code=404, detail="Item do pedido não encontrado")
 
-    product = db.query(models.Product).filter(models.Product.id_product == item.id_product).first()
+    data = item_data.dict(exclude_unset=True)
+    old_product_id = item.id_product
+    product_id = data.get("id_product") or old_product_id
+    # A reserva acompanha o item quando ele troca de produto
+    if product_id != old_product_id:
+        release_stock(db, item.id_order, old_product_id)
+    product = lock_product(db, product_id)
     if not product:
         raise HTTPException(status_code=400, detail="Produto não encontrado.")
 
-    if item_data.quantity and item_data.quantity > product.quantity:
-        raise HTTPException(status_code=400, detail="Quantidade solicitada excede o estoque disponível.")
+    if product_id != old_product_id or item_data.quantity:
+        hold_stock(db, product, item.id_order, item_data.quantity or item.quantity)
 
-    data = item_data.dict(exclude_unset=True)
+    old_subtotal = item.subtotal
     for field, value in data.items():
         setattr(item, field, value)
 
     if 'quantity' in data:
         item.subtotal = item.unit_price * item.quantity
 
-    db.commit()
-    db.refresh(item)
-
     #strategy = DiscountedOrderTotalCalculation()
     strategy = RegularOrderTotalCalculation()
-    recalculate_order_total(item.id_order, db, strategy)
+    strategy.item_changed(db, item.id_order, old_subtotal, item.subtotal)
+    db.commit()
+    db.refresh(item)
     return item
 
 @router.delete("/api/orders/items/{id}/", status_code=status.HTTP_204_NO_CONTENT)
@@ -257,47 +314,103 @@ def delete_order_item(id: int, db: Session = Depends(get_db), user_data: dict =
     if not item:
         raise HTTPException(status_code=404, detail="Item do pedido não encontrado")
 
-    order_id = item.id_order
-    db.delete(item)
-    db.commit()
-
     #strategy = DiscountedOrderTotalCalculation()
     strategy = RegularOrderTotalCalculation()
-    recalculate_order_total(order_id, db, strategy)
+    strategy.item_removed(db, item.id_order, item.subtotal)
+    release_stock(db, item.id_order, item.id_product)
+    db.delete(item)
+    db.commit()
     return {"detail": "Item do pedido deletado com sucesso"}
 
 def finalize_order_logic(id: int, db: Session):
-    db_order = db.query(order.Order).filter(order.Order.id_order == id).first()
+    '''
+    Finaliza o pedido em uma única transação com número constante de queries:
+    itens agregados por produto, produtos travados em ordem de id (evita
+    deadlock entre finalizações concorrentes) e baixas aplicadas em um UPDATE.
+    '''
+    db_order = db.query(order.Order).filter(order.Order.id_order == id).with_for_update().first()
     if not db_order:
         raise HTTPException(status_code=404, detail="Pedido não encontrado")
+    # Com o pedido travado, um envio duplicado ou concorrente já vê o status pago
+    if db_order.status != OrderStatus.DRAFT:
+        raise HTTPException(status_code=409, detail="Pedido já finalizado.")
+
+    items = (
+        db.query(
+            order_item.OrderItem.id_product,
+            func.sum(order_item.OrderItem.quantity),
+            func.sum(order_item.OrderItem.subtotal),
+        )
+        .filter(order_item.OrderItem.id_order == id)
+        .group_by(order_item.OrderItem.id_product)
+        .all()
+    )
+    quantities = {id_product: quantity for id_product, quantity, _ in items}
+    total = sum(Decimal(str(subtotal)) for _, _, subtotal in items)
 
-    db_order.status = OrderStatus.PAID
-    db.commit()
-
-    items = db.query(order_item.OrderItem).filter(order_item.OrderItem.id_order == id).all()
-    loja = db.query(store.Store).filter(store.Store.id_store == db_order.id_store).first()
-    for item in items: #Problema N+1 não resolvido
-        product = db.query(models.Product).filter(models.Product.id_product == item.id_product).first()
-        if not product:
-            raise HTTPException(status_code=404, detail="Produto não encontrado")
-
-        new_balance = loja.balance + Decimal(item.subtotal)
-        loja.balance = new_balance
-        new_quantity = product.quantity - item.quantity
-        product.quantity = new_quantity
+    try:
+        if quantities:
+            products = (
+                db.query(models.Product.id_product, models.Product.quantity)
+                .filter(models.Product.id_product.in_(quantities))
+                .order_by(models.Product.id_product)
+                .with_for_update()
+                .all()
+            )
+            if len(products) != len(quantities):
+                raise HTTPException(status_code=404, detail="Produto não encontrado")
+            # Confere contra as reservas ativas dos outros carrinhos: a deste
+            # pedido pode ter expirado e outro carrinho reservado as mesmas unidades
+            reserved = get_reserved_quantities(db, quantities, exclude_order_id=id)
+            short = [
+                id_product for id_product, quantity in products
+                if quantities[id_product] > (quantity or 0) - reserved.get(id_product, 0)
+            ]
+            if short:
+                raise HTTPException(status_code=409, detail=f"Quantidade solicitada excede o estoque disponível para os produtos {short}.")
+
+            decrement = case(quantities, value=models.Product.id_product, else_=0)
+            updated = db.query(models.Product).filter(
+                models.Product.id_product.in_(quantities),
+                # Nunca deixa a quantidade negativa, mesmo fora do lock acima
+                models.Product.quantity >= decrement,
+            ).update({models.Product.quantity: models.Product.quantity - decrement}, synchronize_session=False)
+            if updated != len(quantities):
+                raise HTTPException(status_code=409, detail="Estoque insuficiente para finalizar o pedido.")
+            audit_bulk_changes(db, models.Product, "UPDATE", [
+                (id_product, {"quantity": quantity}, {"quantity": quantity - quantities[id_product]})
+                for id_product, quantity in products
+            ])
+
+            loja = db.query(store.Store).filter(store.Store.id_store == db_order.id_store).with_for_update().first()
+            if not loja:
+                raise HTTPException(status_code=404, detail="Loja não encontrada")
+            db.query(store.Store).filter(store.Store.id_store == db_order.id_store).update(
+                {store.Store.balance: store.Store.balance + total},
+                synchronize_session=False,
+            )
+            audit_bulk_changes(db, store.Store, "UPDATE", [
+                (loja.id_store, {"balance": loja.balance}, {"balance": (loja.balance or 0) + total})
+            ])
+
+        db_order.status = OrderStatus.PAID
+        # As reservas do carrinho viram baixa efetiva
+        release_stock(db, id)
+
+        now_brazil = datetime.now(ZoneInfo("America/Sao_Paulo"))
+        new_order = order.Order(
+            id_user=db_order.id_user,
+            id_store=db_order.id_store,
+            status=OrderStatus.DRAFT,
+            order_date=now_brazil,
+            total_value=0.0,
+            creation_date=now_brazil
+        )
+        db.add(new_order)
         db.commit()
-
-    now_brazil = datetime.now(ZoneInfo("America/Sao_Paulo"))
-    new_order = order.Order(
-        id_user=db_order.id_user,
-        id_store=db_order.id_store,
-        status=OrderStatus.DRAFT,
-        order_date=now_brazil,
-        total_value=0.0,
-        creation_date=now_brazil
-    )
-    db.add(new_order)
-    db.commit()
+    except Exception:
+        db.rollback()
+        raise
     db.refresh(new_order)
 
     return new_order
@@ -312,7 +425,11 @@ def create_order(order_data: OrderCreate, db: Session = Depends(get_db), user_da
 
 
 @router.get("/api/orders/my", response_model=List[OrderOut])
+@versioned("order")
 def list_user_orders(
+    request: Request,
+    response: Response,
+    params: PageParams = Depends(page_params),
     user_data: dict = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
@@ -320,8 +437,10 @@ def list_user_orders(
     if not user_id:
         raise HTTPException(status_code=401, detail="Usuário não autenticado")
     
-    orders = db.query(order.Order).filter(
+    query = db.query(order.Order).filter(
         order.Order.id_user == user_id,
         order.Order.status == "paid"
-    ).all()
-    return orders
+    )
+    page = paginate(query, [order.Order.id_order], params)
+    set_page_headers(request, response, page)
+    return page.items
@@ -2,15 +2,23 @@ from app.dependencies.auth import get_current_user
 from app.schemas import product as schemas
 from sqlalchemy.orm import Session
 from app.crud import product as crud
+from app.crud import reservation as reservation_crud
 from sqlalchemy.orm import Session
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile, File, Form, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from app.database import get_db
+from app.pagination import PageParams, page_params, set_page_headers
+from app.etags import versioned
+from app.response_cache import CachedRoute, cached
 from fastapi.responses import JSONResponse
 from typing import Optional
 from datetime import date
-from app.utils.file_utils import save_upload_file, validate_file, UPLOAD_FOLDER
+import os
+from app.upload_limit import limit_body
+from app.utils.file_utils import MAX_UPLOAD_BODY_BYTES, discard_upload, stage_upload
+from app.image_processor import image_processor
 
-router = APIRouter(prefix="/api")
+router = APIRouter(prefix="/api", route_class=CachedRoute)
 
 # ------------------------
 # ROTAS DE PRODUTOS
@@ -18,8 +26,12 @@ router = APIRouter(prefix="/api")
 
 
 #Cadastrar produto
+# Rotas com upload são async: a imagem é copiada em blocos sem ocupar thread,
+# o banco roda no threadpool e as miniaturas são geradas depois da resposta.
 @router.post("/products/", response_model=schemas.ProductOut)
-def create_product(
+@limit_body(MAX_UPLOAD_BODY_BYTES)
+async def create_product(
+        background_tasks: BackgroundTasks,
         db: Session = Depends(get_db),
         user_data: dict = Depends(get_current_user),
         id_stock: int = Form(...),
@@ -32,31 +44,65 @@ def create_product(
         creation_date: date = Form(...),
         image: Optional[UploadFile] = File(None),
     ):
-    return crud.create_product(
-        db=db, 
-        id_stock=id_stock,
-        user_data=user_data, 
-        name=name, image=image, 
-        description=description, 
-        price=price, sku=sku, 
-        category=category, 
-        quantity=quantity, 
-        creation_date=creation_date)    
+    staged = await stage_upload(image) if image else None
+    try:
+        product = await run_in_threadpool(
+            crud.create_product,
+            db=db, 
+            id_stock=id_stock,
+            user_data=user_data, 
+            name=name, image=staged, 
+            description=description, 
+            price=price, sku=sku, 
+            category=category, 
+            quantity=quantity, 
+            creation_date=creation_date)
+    finally:
+        discard_upload(staged)
+    if staged and staged.path:
+        background_tasks.add_task(image_processor.process, product.image)
+    return product
+
+
+IMPORT_FORMATS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+
+#Importar produtos em lote (CSV ou NDJSON)
+@router.post("/products/import", response_model=schemas.ProductImportResult)
+def import_products(
+        file: UploadFile = File(...),
+        format: Optional[str] = Form(None),
+        db: Session = Depends(get_db),
+        user_data: dict = Depends(get_current_user),
+    ):
+    if format is None:
+        format = IMPORT_FORMATS.get(os.path.splitext(file.filename or "")[1].lower())
+    if format not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="Formato de importação inválido. Use csv ou ndjson.")
+    return crud.import_products(db, user_data, file.file, format, filename=file.filename)
 
 
 #Consultar todos os produtos
 @router.get("/products/all", response_model=list[schemas.ProductOut])
-def read_all_products(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)): 
-    return crud.get_all_products_with_stock(db, skip, limit)
+@cached("product", "stock")
+@versioned("product", "stock")
+def read_all_products(request: Request, response: Response, params: PageParams = Depends(page_params), db: Session = Depends(get_db)):
+    page = crud.get_all_products_with_stock(db, params)
+    set_page_headers(request, response, page)
+    return page.items
 
 
 #Consultar produtos com base no user id
 @router.get("/products/", response_model=list[schemas.ProductOut])
-def read_products_with_user_id(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), user_data: dict = Depends(get_current_user)): 
-    return crud.get_products_with_userid(db=db, skip=skip, limit=limit, user_data=user_data)
+@versioned("product", "stock")
+def read_products_with_user_id(request: Request, response: Response, params: PageParams = Depends(page_params), db: Session = Depends(get_db), user_data: dict = Depends(get_current_user)):
+    page = crud.get_products_with_userid(db=db, params=params, user_data=user_data)
+    set_page_headers(request, response, page)
+    return page.items
 
 #Consultar produto específico
 @router.get("/products/{id}", response_model=schemas.ProductOut)
+@cached("product", "stock")
+@versioned("product", "stock")
 def read_product(id: int, db: Session = Depends(get_db)):
     product = crud.get_product(db, id)
     if not product:
@@ -64,10 +110,18 @@ def read_product(id: int, db: Session = Depends(get_db)):
     return product
 
 
+#Consultar disponibilidade (estoque - reservas ativas dos carrinhos)
+@router.get("/products/{id}/availability")
+def read_product_availability(id: int, db: Session = Depends(get_db)):
+    return reservation_crud.get_product_availability(db, id)
+
+
 #Alterar produto
 @router.put("/products/{id}", response_model=schemas.ProductOut)
-def update_product(
+@limit_body(MAX_UPLOAD_BODY_BYTES)
+async def update_product(
     id: int,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     id_stock: Optional[int] = Form(None),
     name: Optional[str] = Form(None),
@@ -80,20 +134,27 @@ def update_product(
     image: Optional[UploadFile] = File(None),
     user_data: dict = Depends(get_current_user)
 ):
-    updated_product = crud.update_product(
-        db=db,
-        product_id=id,
-        id_stock=id_stock,
-        name=name,
-        description=description,
-        price=price,
-        sku=sku,
-        category=category,
-        quantity=quantity,
-        creation_date=creation_date,
-        user_data=user_data,
-        image=image
-    )
+    staged = await stage_upload(image) if image else None
+    try:
+        updated_product = await run_in_threadpool(
+            crud.update_product,
+            db=db,
+            product_id=id,
+            id_stock=id_stock,
+            name=name,
+            description=description,
+            price=price,
+            sku=sku,
+            category=category,
+            quantity=quantity,
+            creation_date=creation_date,
+            user_data=user_data,
+            image=staged
+        )
+    finally:
+        discard_upload(staged)
+    if staged and staged.path:
+        background_tasks.add_task(image_processor.process, updated_product.image)
 
     return updated_product
 
@@ -3,9 +3,12 @@ from app.schemas import stock as schemas
 from app.schemas import product
 from app.crud import stock as crud
 from sqlalchemy.orm import Session
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from app.database import get_db
-router = APIRouter(prefix="/api")
+from app.pagination import PageParams, page_params, set_page_headers
+from app.etags import versioned
+from app.response_cache import CachedRoute, cached
+router = APIRouter(prefix="/api", route_class=CachedRoute)
 
 # ROTAS DE ESTOQUE
 
@@ -16,6 +19,8 @@ def create_stock(stock: schemas.StockCreate, db: Session = Depends(get_db), user
 
 #Consultar estoque específico
 @router.get("/stocks/{id}", response_model=schemas.StockOut)
+@cached("stock", "product")
+@versioned("stock", "product")
 def read_stock(id: int, db: Session = Depends(get_db)):
     stock = crud.get_stock(db, id)
     if not stock:
@@ -24,14 +29,21 @@ def read_stock(id: int, db: Session = Depends(get_db)):
 
 #Consultar todos os estoques
 @router.get("/stocks/all/", response_model=list[schemas.StockOut])
-def read_all_stocks(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_all_stocks(db, skip, limit)
+@cached("stock", "product")
+@versioned("stock", "product")
+def read_all_stocks(request: Request, response: Response, params: PageParams = Depends(page_params), db: Session = Depends(get_db)):
+    page = crud.get_all_stocks(db, params)
+    set_page_headers(request, response, page)
+    return page.items
 
 
 #Consultar estoques por usuário com base no token fornecido
 @router.get("/stocks/", response_model=list[schemas.StockOut])
-def read_stocks_for_userid(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), user_data: dict = Depends(get_current_user)):
-    return crud.get_stocks_for_user(db=db, skip=skip, limit=limit, user_data=user_data)
+@versioned("stock", "product")
+def read_stocks_for_userid(request: Request, response: Response, params: PageParams = Depends(page_params), db: Session = Depends(get_db), user_data: dict = Depends(get_current_user)):
+    page = crud.get_stocks_for_user(db=db, params=params, user_data=user_data)
+    set_page_headers(request, response, page)
+    return page.items
 
 #Alterar estoque
 @router.put("/stocks/{id}", response_model=schemas.StockOut)
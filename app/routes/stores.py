@@ -1,31 +1,42 @@
 from datetime import date
 from email.mime import image
 import os
-from fastapi import FastAPI, Depends, Form, HTTPException, Path, status, APIRouter, UploadFile, File, Query
+from fastapi import FastAPI, BackgroundTasks, Depends, Form, HTTPException, Path, status, APIRouter, UploadFile, File, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from app.database import Base, engine
 from app.dependencies.auth import get_current_user
 from app.models import store, order, order_item
 from app.schemas.store import StoreCreate, StoreOut
 from app.database import get_db
-from app.utils.file_utils import save_upload_file, validate_file, UPLOAD_FOLDER
+from app.pagination import PageParams, page_params, paginate, set_page_headers
+from app.etags import versioned
+from app.response_cache import CachedRoute, cached
+from app.upload_limit import limit_body
+from app.utils.file_utils import MAX_UPLOAD_BODY_BYTES, StagedUpload, discard_upload, save_upload_file, stage_upload
+from app.image_processor import image_processor
 from sqlalchemy.orm import Session
 from typing import List
 from app.models.models import Product, Stock
 from typing import Optional
 
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
 
 
 @router.get("/api/stores/all", response_model=List[StoreOut])
-def list_stores(db: Session = Depends(get_db)):
-    stores = db.query(store.Store).all()
-    return stores
+@cached("store")
+@versioned("store")
+def list_stores(request: Request, response: Response, params: PageParams = Depends(page_params), db: Session = Depends(get_db)):
+    page = paginate(db.query(store.Store), [store.Store.id_store], params)
+    set_page_headers(request, response, page)
+    return page.items
 
 @router.get("/api/stores/", response_model=List[StoreOut])
-def list_stores(db: Session = Depends(get_db), user_data: dict = Depends(get_current_user)):
+def list_stores(request: Request, response: Response, params: PageParams = Depends(page_params), db: Session = Depends(get_db), user_data: dict = Depends(get_current_user)):
     user_id = int(user_data.get("user_id"))
-    stores = db.query(store.Store).filter(store.Store.created_by == user_id).all()
-    return stores
+    query = db.query(store.Store).filter(store.Store.created_by == user_id)
+    page = paginate(query, [store.Store.id_store], params)
+    set_page_headers(request, response, page)
+    return page.items
 
 @router.get("/api/stores/{id}/", response_model=StoreOut)
 def get_store(id: int = Path(..., description="ID loja"), db:Session = Depends(get_db)):
@@ -34,8 +45,11 @@ def get_store(id: int = Path(..., description="ID loja"), db:Session = Depends(g
         raise HTTPException(status_code=404, detail="Loja não encontrada")
     return store_obj
 
+# Upload em blocos sem ocupar thread; banco no threadpool; miniaturas após a resposta
 @router.post("/api/stores/", response_model=StoreOut)
-def create_store(
+@limit_body(MAX_UPLOAD_BODY_BYTES)
+async def create_store(
+    background_tasks: BackgroundTasks,
     name: str = Form(...),
     email: str = Form(...),
     cnpj: str = Form(...),
@@ -45,6 +59,19 @@ def create_store(
     user_data: dict = Depends(get_current_user),
     image: Optional[UploadFile] = File(None)
 ):
+    staged = await stage_upload(image) if image else None
+    try:
+        new_store = await run_in_threadpool(
+            insert_store, db, user_data, name, email, cnpj, creation_date, phone_number, staged
+        )
+    finally:
+        discard_upload(staged)
+    if staged and staged.path:
+        background_tasks.add_task(image_processor.process, new_store.image)
+    return new_store
+
+def insert_store(db: Session, user_data: dict, name: str, email: str, cnpj: str, creation_date: date,
+                 phone_number: str, image: Optional[StagedUpload]):
     existing_store = db.query(store.Store).filter(
         (store.Store.cnpj == cnpj) | 
         (store.Store.email == email)
@@ -65,16 +92,16 @@ def create_store(
     db.commit()
     db.refresh(new_store)
     if image:
-        ext = validate_file(image)
-        filename = f"store_{new_store.id_store}.{ext}"
-        save_upload_file(upload_file=image, folder=UPLOAD_FOLDER, filename=filename, old_image="")
-        new_store.image = filename
+        new_store.image = save_upload_file(image)
         db.commit()
+        db.refresh(new_store)
     return new_store
 
 @router.put("/api/stores/{id}/", response_model=StoreOut)
-def update_store(
+@limit_body(MAX_UPLOAD_BODY_BYTES)
+async def update_store(
     id: int,
+    background_tasks: BackgroundTasks,
     name: str = Form(...),
     cnpj: str = Form(...),
     creation_date: str = Form(...),  # você pode converter para date depois
@@ -84,7 +111,19 @@ def update_store(
     db: Session = Depends(get_db),
     user_data: dict = Depends(get_current_user)
 ):
+    staged = await stage_upload(image) if image else None
+    try:
+        store_obj = await run_in_threadpool(
+            save_store_changes, db, id, name, cnpj, creation_date, email, phone_number, staged
+        )
+    finally:
+        discard_upload(staged)
+    if staged and staged.path:
+        background_tasks.add_task(image_processor.process, store_obj.image)
+    return store_obj
 
+def save_store_changes(db: Session, id: int, name: str, cnpj: str, creation_date: str, email: str,
+                       phone_number: str, image: Optional[StagedUpload]):
     store_obj = db.query(store.Store).filter(store.Store.id_store == id).first()
     if not store_obj:
         raise HTTPException(status_code=404, detail="Loja não encontrada")
@@ -105,11 +144,7 @@ def update_store(
 
     # Se uma imagem foi enviada, salva e atualiza
     if image:
-        ext = validate_file(image)
-        filename = f"store_{id}.{ext}"
-        print(f"Salvando imagem: {filename}")
-        save_upload_file(upload_file=image, folder=UPLOAD_FOLDER, filename=filename, old_image=store_obj.image)
-        store_obj.image = filename
+        store_obj.image = save_upload_file(image)
 
     db.commit()
     db.refresh(store_obj)
@@ -139,11 +174,6 @@ def delete_store(id: int, db: Session = Depends(get_db), user_data: dict = Depen
         # Deleta o estoque
         db.delete(stk)
 
-    if store_obj.image:
-        caminho_imagem = os.path.join(UPLOAD_FOLDER, store_obj.image)
-        if os.path.exists(caminho_imagem):
-            os.remove(caminho_imagem)
-
     # Deleta a loja
     db.delete(store_obj)
     db.commit()
@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional, List, Dict, Any
+
+
+class AuditLogOut(BaseModel):
+    id: int
+    table_name: str
+    entity_id: Optional[int] = None
+    operation: str
+    old_data: Optional[Dict[str, Any]] = None
+    new_data: Optional[Dict[str, Any]] = None
+    user: Optional[int] = None
+    timestamp: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+
+class AuditLogPage(BaseModel):
+    items: List[AuditLogOut]
+    next_cursor: Optional[int] = None
@@ -14,4 +14,14 @@ class StockMovementOut(StockMovementCreate):
     id_movement: int
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+class StockMovementBatchCreate(BaseModel):
+    movements: List[StockMovementCreate] = Field(..., min_length=1, max_length=1000)
+
+
+class StockMovementBatchResult(BaseModel):
+    index: int
+    success: bool
+    id_movement: Optional[int] = None
+    detail: Optional[str] = None
@@ -1,8 +1,10 @@
 from pydantic import BaseModel
 from datetime import date
-from typing import Optional
+from typing import List, Optional
 from enum import Enum
 
+from app.schemas.order_item import OrderItemOut
+
 class OrderStatus(str, Enum):
     DRAFT = "draft"
     COMPLETED = "completed"
@@ -31,3 +33,9 @@ class OrderOut(OrderCreate):
 
     class Config:
         orm_mode = True
+
+class OrderDetailOut(OrderOut):
+    items: List[OrderItemOut] = []
+
+    class Config:
+        orm_mode = True
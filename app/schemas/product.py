@@ -1,6 +1,7 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, computed_field
 from datetime import date, datetime
 from typing import Optional, List, Dict, Any
+from app.utils import file_utils
 # ---------- PRODUCT ----------
 class ProductStockInfo(BaseModel):
     id_stock: int
@@ -29,11 +30,35 @@ class ProductCreate(BaseModel):
     quantity: Optional[int] = int
     creation_date: date
 
+class ProductImportRow(BaseModel):
+    id_stock: int
+    name: str
+    description: str = ""
+    price: float
+    sku: str
+    category: str = ""
+    quantity: int = Field(1, ge=0)
+    creation_date: date = Field(default_factory=date.today)
+
+class ProductImportError(BaseModel):
+    line: int
+    error: str
+
+class ProductImportResult(BaseModel):
+    imported: int
+    error_count: int
+    errors: List[ProductImportError] = []
+
 class ProductOut(ProductCreate):
     id_product: int
     stocks: Optional[List[ProductStockInfo]] = []
     creation_date: date
 
+    @computed_field
+    @property
+    def image_urls(self) -> Optional[Dict[str, str]]:
+        return file_utils.image_urls(self.image)
+
     class Config:
         orm_mode = True
 
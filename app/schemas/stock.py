@@ -1,12 +1,18 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, computed_field
 from datetime import date
-from typing import Optional, List
+from typing import Dict, Optional, List
+from app.utils import file_utils
 class ProductStockOutInfo(BaseModel):
     id_product: int
     name: str
     quantity: int
     price: float
     image: Optional[str] = str
+
+    @computed_field
+    @property
+    def image_urls(self) -> Optional[Dict[str, str]]:
+        return file_utils.image_urls(self.image)
 # ---------- STOCK ----------
 class StockCreate(BaseModel):
     id_store: int
@@ -1,7 +1,8 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, computed_field
 from decimal import Decimal
 from datetime import date
-from typing import Optional
+from typing import Dict, Optional
+from app.utils import file_utils
 
 class StoreCreate(BaseModel):
     name: str
@@ -16,5 +17,10 @@ class StoreOut(StoreCreate):
     image: Optional[str] = []
     balance: Decimal = Decimal('0.00')
 
+    @computed_field
+    @property
+    def image_urls(self) -> Optional[Dict[str, str]]:
+        return file_utils.image_urls(self.image)
+
     class Config:
         orm_mode = True
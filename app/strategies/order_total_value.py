@@ -1,21 +1,49 @@
 from abc import ABC, abstractmethod
 
-from app.models import order_item
+from sqlalchemy import func
+
+from app.models import order, order_item
 
 class OrderTotalCalculationStrategy(ABC):
+    # Fator aplicado sobre a soma dos subtotais
+    factor = 1.0
+
     @abstractmethod
     def calculate_total(self, db, order_id: int):
         pass
 
+    def apply_delta(self, db, order_id: int, subtotal_delta: float):
+        '''
+        Ajusta o total com um único UPDATE atômico (total = total + delta),
+        sem carregar os itens do pedido. Não faz commit.
+        '''
+        if not subtotal_delta:
+            return
+        db.query(order.Order).filter(order.Order.id_order == order_id).update(
+            {order.Order.total_value: order.Order.total_value + subtotal_delta * self.factor},
+            synchronize_session=False,
+        )
+
+    def item_added(self, db, order_id: int, subtotal: float):
+        self.apply_delta(db, order_id, subtotal)
+
+    def item_removed(self, db, order_id: int, subtotal: float):
+        self.apply_delta(db, order_id, -subtotal)
+
+    def item_changed(self, db, order_id: int, old_subtotal: float, new_subtotal: float):
+        self.apply_delta(db, order_id, new_subtotal - old_subtotal)
+
+    def is_consistent(self, db, order_id: int, tolerance: float = 0.01):
+        stored = db.query(order.Order.total_value).filter(order.Order.id_order == order_id).scalar()
+        return stored is not None and abs(stored - self.calculate_total(db, order_id)) <= tolerance
+
 class RegularOrderTotalCalculation(OrderTotalCalculationStrategy):
     def calculate_total(self, db, order_id: int):
-        items = db.query(order_item.OrderItem).filter(order_item.OrderItem.id_order == order_id).all()
-        total = sum(item.subtotal for item in items)
-        return total
+        # Soma feita no banco; usada como fallback e verificação de consistência
+        total = db.query(func.coalesce(func.sum(order_item.OrderItem.subtotal), 0.0)).filter(
+            order_item.OrderItem.id_order == order_id
+        ).scalar()
+        return total * self.factor
 
-class DiscountedOrderTotalCalculation(OrderTotalCalculationStrategy):
-    def calculate_total(self, db, order_id: int):
-        items = db.query(order_item.OrderItem).filter(order_item.OrderItem.id_order == order_id).all()
-        total = sum(item.subtotal for item in items)
-        total *= 0.90
-        return total
+class DiscountedOrderTotalCalculation(RegularOrderTotalCalculation):
+    factor = 0.90
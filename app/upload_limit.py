@@ -0,0 +1,45 @@
+from fastapi import HTTPException, Request, Response
+from fastapi.routing import APIRoute
+
+
+def limit_body(max_bytes: int):
+    '''
+    Limita o corpo da requisição da rota a `max_bytes`. Deve ficar abaixo do
+    decorator do router, que usa uma route_class derivada de BodyLimitRoute.
+    '''
+    def decorator(endpoint):
+        endpoint.max_body_bytes = max_bytes
+        return endpoint
+    return decorator
+
+
+class BodyLimitRoute(APIRoute):
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        max_bytes = getattr(self.endpoint, "max_body_bytes", None)
+        if max_bytes is None:
+            return handler
+
+        async def limited_handler(request: Request) -> Response:
+            too_large = HTTPException(status_code=413, detail=f"Requisição maior que o limite de {max_bytes} bytes")
+            # Content-Length declarado acima do limite: recusa sem ler o corpo
+            content_length = request.headers.get("content-length")
+            if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+                raise too_large
+
+            # Sem Content-Length (chunked) ou com valor falso: conta os bytes à
+            # medida que chegam e interrompe o parser do formulário no limite
+            received = 0
+
+            async def receive():
+                nonlocal received
+                message = await request.receive()
+                if message["type"] == "http.request":
+                    received += len(message.get("body", b""))
+                    if received > max_bytes:
+                        raise too_large
+                return message
+
+            return await handler(Request(request.scope, receive))
+
+        return limited_handler
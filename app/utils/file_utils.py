@@ -1,11 +1,37 @@
 from fastapi import UploadFile, HTTPException
-import shutil
+from typing import NamedTuple, Optional
+import anyio
+import hashlib
 import os
+import tempfile
 
 UPLOAD_FOLDER = "images/"
 ALLOWED_EXTENSIONS = {"jpg", "jpeg", "png", "gif"}
 ALLOWED_MIME_TYPES = {"image/jpeg", "image/png", "image/gif"}
 
+# Upload gravado em blocos; passando do limite a requisição é recusada com 413
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Corpo inteiro das rotas com imagem: a imagem mais os campos e delimitadores
+# do formulário. Cortado durante a leitura, antes de ir para o disco.
+MAX_UPLOAD_BODY_BYTES = MAX_UPLOAD_BYTES + 64 * 1024
+
+# Miniaturas geradas a partir do original (lado maior, em pixels)
+VARIANTS_FOLDER = os.path.join(UPLOAD_FOLDER, "variants")
+IMAGE_URL_PREFIX = "/images/"
+IMAGE_VARIANTS = {"thumb": 160, "small": 320, "medium": 640}
+# Versões pré-codificadas do original e das miniaturas, escolhidas pelo
+# Accept em app/image_serving.py (mais compacto primeiro)
+MODERN_FORMATS = ["avif", "webp"]
+MODERN_FORMAT_OPTIONS = {"avif": {"quality": 60, "speed": 8}, "webp": {"quality": 80, "method": 4}}
+
+
+class StagedUpload(NamedTuple):
+    filename: str
+    # Temporário com o conteúdo; None quando o arquivo já estava armazenado
+    path: Optional[str]
+
+
 def validate_file(file: UploadFile, allowed_extensions=ALLOWED_EXTENSIONS, allowed_mime=ALLOWED_MIME_TYPES):
     filename = file.filename
     if not filename or "." not in filename:
@@ -20,17 +46,143 @@ def validate_file(file: UploadFile, allowed_extensions=ALLOWED_EXTENSIONS, allow
 
     return ext
 
-def save_upload_file(upload_file: UploadFile, folder: str, filename: str, old_image: str):
-    if old_image:
-        caminho_imagem = os.path.join(UPLOAD_FOLDER, old_image)
-        if os.path.exists(caminho_imagem):
-            os.remove(caminho_imagem)
 
-    os.makedirs(folder, exist_ok=True)
-    filepath = os.path.join(folder, filename)
+async def stage_upload(upload_file: UploadFile) -> StagedUpload:
+    '''
+    Valida o upload e calcula o hash do conteúdo lendo em blocos, sem ocupar
+    uma thread do pool. A imagem é armazenada como <sha256>.<ext>: se esse
+    arquivo já existe, nada é gravado. Senão o conteúdo é copiado, também em
+    blocos, para um temporário na pasta de imagens. Aqui o formulário já foi
+    lido: o que impede um corpo grande de ir inteiro para o disco é o
+    limit_body das rotas (app/upload_limit.py). Este limite vale para a
+    imagem em si, sem os demais campos.
+    '''
+    ext = validate_file(upload_file)
+    ext = "jpg" if ext == "jpeg" else ext
+    too_large = HTTPException(status_code=413, detail=f"Imagem maior que o limite de {MAX_UPLOAD_BYTES} bytes")
+    if upload_file.size is not None and upload_file.size > MAX_UPLOAD_BYTES:
+        raise too_large
+
+    digest = hashlib.sha256()
+    size = 0
+    while chunk := await upload_file.read(UPLOAD_CHUNK_SIZE):
+        size += len(chunk)
+        if size > MAX_UPLOAD_BYTES:
+            raise too_large
+        digest.update(chunk)
+    filename = f"{digest.hexdigest()}.{ext}"
+
+    filepath = os.path.join(UPLOAD_FOLDER, filename)
+    if os.path.exists(filepath):
+        # Renova o mtime: a coleta de lixo não apaga um arquivo recém-reenviado
+        os.utime(filepath)
+        return StagedUpload(filename, None)
+
+    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=UPLOAD_FOLDER, suffix=".part")
+    os.close(fd)
     try:
-        with open(filepath, "wb") as buffer:
-            shutil.copyfileobj(upload_file.file, buffer)
+        await upload_file.seek(0)
+        async with await anyio.open_file(path, "wb") as buffer:
+            while chunk := await upload_file.read(UPLOAD_CHUNK_SIZE):
+                await buffer.write(chunk)
     except Exception as e:
+        os.remove(path)
         raise HTTPException(status_code=500, detail=f"Erro ao salvar arquivo: {str(e)}")
-    return filepath
\ No newline at end of file
+    return StagedUpload(filename, path)
+
+
+def discard_upload(staged: Optional[StagedUpload]):
+    '''Remove o temporário que não chegou a ser usado (ex.: erro no banco).'''
+    if staged and staged.path and os.path.exists(staged.path):
+        os.remove(staged.path)
+
+
+def save_upload_file(staged: StagedUpload) -> str:
+    '''
+    Coloca o upload no armazenamento e devolve o nome a gravar no registro.
+    A imagem anterior não é apagada aqui: pode ser usada por outros produtos
+    e lojas, e sai na coleta de app/image_store.py quando ninguém mais a usa.
+    '''
+    if staged.path:
+        filepath = os.path.join(UPLOAD_FOLDER, staged.filename)
+        if os.path.exists(filepath):
+            # Mesmo conteúdo gravado por outra requisição nesse meio tempo
+            os.remove(staged.path)
+        else:
+            os.replace(staged.path, filepath)
+    return staged.filename
+
+
+def remove_image(filename: str):
+    '''Apaga o original, as miniaturas e as versões WebP/AVIF de todos eles.'''
+    variants = [variant_filename(filename, variant) for variant in IMAGE_VARIANTS]
+    paths = [os.path.join(UPLOAD_FOLDER, filename)] + [os.path.join(VARIANTS_FOLDER, name) for name in variants]
+    for name in [filename] + variants:
+        stem = os.path.splitext(name)[0]
+        paths += [os.path.join(VARIANTS_FOLDER, f"{stem}.{fmt}") for fmt in MODERN_FORMATS]
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def variant_filename(filename: str, variant: str) -> str:
+    stem, ext = os.path.splitext(filename)
+    return f"{stem}_{variant}{ext}"
+
+
+def image_urls(filename: Optional[str]) -> Optional[dict]:
+    '''URLs do original e das miniaturas; as miniaturas ficam prontas logo após o upload.'''
+    if not filename:
+        return None
+    urls = {"original": f"{IMAGE_URL_PREFIX}{filename}"}
+    for variant in IMAGE_VARIANTS:
+        urls[variant] = f"{IMAGE_URL_PREFIX}variants/{variant_filename(filename, variant)}"
+    return urls
+
+
+def make_image_variants(filename: str, upload_folder: str = UPLOAD_FOLDER, sizes: dict = IMAGE_VARIANTS) -> int:
+    '''
+    Gera as miniaturas de uma imagem no formato original e as versões
+    WebP/AVIF do original e de cada miniatura. Roda nos processos de
+    app/image_processor.py, por isso recebe e devolve só valores simples.
+    '''
+    from PIL import Image
+
+    variants_folder = os.path.join(upload_folder, "variants")
+    os.makedirs(variants_folder, exist_ok=True)
+
+    def save(image, name, **options):
+        # Grava em temporário e renomeia: quem pede a URL nunca vê um arquivo pela metade
+        path = os.path.join(variants_folder, name)
+        image.save(path + ".part", **options)
+        os.replace(path + ".part", path)
+
+    written = 0
+    with Image.open(os.path.join(upload_folder, filename)) as image:
+        image.load()
+        renditions = [(filename, image)]
+        for variant, size in sizes.items():
+            thumbnail = image.copy()
+            thumbnail.thumbnail((size, size))
+            save(thumbnail, variant_filename(filename, variant), format=image.format)
+            renditions.append((variant_filename(filename, variant), thumbnail))
+            written += 1
+        # GIF animado perderia a animação: fica só no formato original
+        if image.format == "GIF":
+            return written
+        for name, rendition in renditions:
+            rendition = rendition.convert("RGBA" if "A" in rendition.getbands() or "transparency" in rendition.info else "RGB")
+            stem = os.path.splitext(name)[0]
+            for fmt in MODERN_FORMATS:
+                save(rendition, f"{stem}.{fmt}", format=fmt.upper(), **MODERN_FORMAT_OPTIONS[fmt])
+                written += 1
+    return written
+
+
+def load_image_codecs() -> int:
+    '''Importa o Pillow e registra os codecs; aquece um processo de miniaturas.'''
+    from PIL import Image
+
+    Image.init()
+    return os.getpid()
@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import os
+import time
+from contextlib import ExitStack
+
+from prometheus_client import Gauge
+from sqlalchemy import text
+from sqlalchemy.orm import configure_mappers
+from sqlalchemy.pool import QueuePool
+
+from app.database import DB_PROFILE, Base, SessionLocal, async_engine, engine
+from app.etags import load_table_versions
+from app.loading import loading_options
+from app.models.models import Product, Stock
+from app.pagination import PageParams, paginate
+
+logger = logging.getLogger("uvicorn")
+
+# O esquema vem de `alembic upgrade head`. Só o perfil dev (e os testes) cria
+# as tabelas que faltam na subida, como o create_all que rodava no import.
+SCHEMA_AUTO_CREATE = os.getenv("SCHEMA_AUTO_CREATE", str(DB_PROFILE == "dev")).lower() in ("1", "true", "yes")
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "true").lower() in ("1", "true", "yes")
+# Sobe os processos de miniaturas já na subida. Só compensa com CPU sobrando:
+# o spawn disputa o processador com as primeiras requisições.
+IMAGE_WARMUP = os.getenv("IMAGE_WARMUP", "false").lower() in ("1", "true", "yes")
+# Conexões abertas antes da primeira requisição; padrão: o pool_size do engine.
+# No SQLite, uma: conexões a mais só dividem o cache de páginas entre elas.
+WARMUP_CONNECTIONS = int(os.getenv(
+    "WARMUP_CONNECTIONS",
+    engine.pool.size() if isinstance(engine.pool, QueuePool) and engine.dialect.name != "sqlite" else 1,
+))
+
+# Listagens do catálogo: modelo, chave do keyset e perfil de carregamento
+WARMUP_QUERIES = [
+    (Product, Product.id_product, "product_with_stock"),
+    (Stock, Stock.id_stock, "stock_with_products"),
+]
+
+STARTUP_SECONDS = Gauge("app_startup_seconds", "Duração de cada etapa da subida", ["stage"])
+
+
+def create_schema():
+    Base.metadata.create_all(bind=engine)
+
+
+def warm_pool(connections: int = WARMUP_CONNECTIONS):
+    '''Abre `connections` conexões ao mesmo tempo e as devolve ao pool.'''
+    with ExitStack() as stack:
+        for _ in range(connections):
+            stack.enter_context(engine.connect()).execute(text("SELECT 1"))
+
+
+async def warm_async_pool(connections: int = WARMUP_CONNECTIONS):
+    async def check():
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(check() for _ in range(connections)))
+
+
+def warm_queries():
+    '''
+    Configura os mappers e roda uma vez as consultas das listagens mais
+    acessadas (as mesmas de app/crud): o SQL compilado fica no cache do
+    engine e a primeira requisição não paga isso.
+    '''
+    configure_mappers()
+    first_row = PageParams(skip=0, limit=1, cursor=None)
+    with SessionLocal() as db:
+        for model, key, profile in WARMUP_QUERIES:
+            paginate(db.query(model).options(*loading_options(profile)), [key], first_row)
+    load_table_versions(("product", "stock"))
+
+
+async def run_stage(stage: str, function, *args):
+    start = time.perf_counter()
+    if asyncio.iscoroutinefunction(function):
+        await function(*args)
+    else:
+        await asyncio.to_thread(function, *args)
+    STARTUP_SECONDS.labels(stage).set(time.perf_counter() - start)
+
+
+async def prepare_database():
+    '''Etapas de banco da subida (lifespan), antes de aceitar requisições.'''
+    if SCHEMA_AUTO_CREATE:
+        await run_stage("create_schema", create_schema)
+    if not STARTUP_WARMUP:
+        return
+    try:
+        await run_stage("warm_pool", warm_pool)
+        if async_engine is not None:
+            await run_stage("warm_async_pool", warm_async_pool)
+        await run_stage("warm_queries", warm_queries)
+    except Exception as e:
+        # Banco indisponível não impede a subida; as conexões abrem sob demanda
+        logger.warning(f"Aquecimento do banco falhou: {e}")
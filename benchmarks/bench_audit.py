@@ -0,0 +1,93 @@
+'''
+Mede o custo do after_flush de auditoria em função do número de modelos
+auditados: listener por modelo (implementação antiga) x dispatcher único.
+
+Uso: python -m benchmarks.bench_audit [--rows 500] [--repeat 5]
+'''
+import argparse
+import os
+import time
+from datetime import date
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app import audit
+from app.models.audit_log import AuditLog
+from app.models.models import Product, Stock, StockMovement
+from app.models import store, order, order_item
+
+MODELS = [Product, Stock, StockMovement, store.Store, order.Order, order_item.OrderItem]
+
+
+def register_legacy(model_class, Session):
+    # Reprodução do registro antigo: um listener por modelo, varrendo a sessão inteira
+    @event.listens_for(Session, "after_flush")
+    def after_flush(session, flush_context):
+        for obj in session.new:
+            if isinstance(obj, model_class):
+                session.add(AuditLog(table_name=obj.__tablename__, operation="INSERT",
+                                     new_data=audit.get_model_data(obj), user=1))
+        for obj in session.dirty:
+            if isinstance(obj, model_class) and session.is_modified(obj):
+                session.add(AuditLog(table_name=obj.__tablename__, operation="UPDATE",
+                                     old_data=audit.get_model_data(obj),
+                                     new_data=audit.get_model_data(obj), user=1))
+
+
+def register_consolidated(model_class, Session):
+    audit.register_auditing_for_model(model_class, Session)
+
+
+def run(register, n_models: int, rows: int) -> float:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    audit.AUDITED_MODELS.clear()
+    audit._registered_sessions.clear()
+    for model in MODELS[:n_models]:
+        register(model, Session)
+
+    db = Session()
+    db.info["user"] = 1
+    stock = Stock(name="bench", creation_date=date.today(), created_by=1)
+    db.add(stock)
+    db.flush()
+
+    start = time.perf_counter()
+    products = [
+        Product(id_stock=stock.id_stock, name=f"p{i}", sku=f"sku{i}", quantity=100,
+                price=1.0, creation_date=date.today(), created_by=1)
+        for i in range(rows)
+    ]
+    db.add_all(products)
+    db.flush()
+    for p in products:
+        p.quantity -= 1
+    db.flush()
+    elapsed = time.perf_counter() - start
+
+    db.rollback()
+    db.close()
+    engine.dispose()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'modelos':>8} {'antigo (ms)':>12} {'único (ms)':>12}")
+    for n in range(1, len(MODELS) + 1):
+        legacy = min(run(register_legacy, n, args.rows) for _ in range(args.repeat))
+        consolidated = min(run(register_consolidated, n, args.rows) for _ in range(args.repeat))
+        print(f"{n:>8} {legacy * 1000:>12.2f} {consolidated * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+'''
+Custo de autenticação por requisição: antes o token era decodificado duas
+vezes (AuthUserMiddleware e get_current_user); agora é verificado uma vez
+e, para tokens repetidos, sai do cache de claims (app/dependencies/auth.py).
+
+Uso: python -m benchmarks.bench_auth [--requests 20000]
+'''
+import argparse
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import jwt
+
+from app.dependencies.auth import ALGORITHM, SECRET_KEY, get_current_user, token_cache, verify_token
+
+
+def make_token(user_id: int) -> str:
+    return jwt.encode(
+        {"user_id": str(user_id), "iat": datetime.utcnow(), "exp": datetime.utcnow() + timedelta(hours=5)},
+        SECRET_KEY, algorithm=ALGORITHM,
+    )
+
+
+def legacy_request(token):
+    # Middleware + dependência, cada um com seu jwt.decode
+    jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+
+def cached_request(token):
+    # Middleware verifica (cache) e a dependência reaproveita request.state
+    request = SimpleNamespace(state=SimpleNamespace(token=token, token_claims=verify_token(token)))
+    get_current_user(request, HTTPAuthorizationCredentials(scheme="Bearer", credentials=token))
+
+
+def measure(label, fn, tokens):
+    start = time.perf_counter()
+    for token in tokens:
+        fn(token)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {elapsed / len(tokens) * 1e6:>10.1f} µs/requisição")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=100)
+    args = parser.parse_args()
+
+    # Clientes reaproveitam o token por horas: poucos tokens, muitas requisições
+    tokens = [make_token(i) for i in range(args.users)] * (args.requests // args.users)
+    measure("antes (2 decodes)", legacy_request, tokens)
+    token_cache.clear()
+    measure("depois, tokens novos (1 decode)", cached_request, [make_token(10_000 + i) for i in range(args.users * 20)])
+    token_cache.clear()
+    measure("depois, tokens repetidos (cache)", cached_request, tokens)
+
+
+if __name__ == "__main__":
+    main()
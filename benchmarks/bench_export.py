@@ -0,0 +1,89 @@
+'''
+Exportação de 1M produtos: listagem materializada (como /api/products/all
+com limit grande: entidades + dicts + JSON de uma vez) x streaming de
+app/crud/export.py em NDJSON e CSV. Cada modo roda em um processo próprio
+para medir o pico de RSS isoladamente.
+
+Uso: python -m benchmarks.bench_export [--rows 1000000]
+     DATABASE_URL=postgresql://... python -m benchmarks.bench_export
+'''
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from datetime import date
+
+os.environ.setdefault("DATABASE_URL", "sqlite:////tmp/bench_export.db")
+os.environ.setdefault("DB_PROFILE", "benchmark")
+
+from sqlalchemy import func, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.crud.export import stream_export
+from app.crud.product import product_to_dict
+from app.database import Base, engine
+from app.models import order, order_item, store  # noqa: F401 (registra as tabelas)
+from app.models.models import Product, Stock
+
+Session = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+MODES = ["materializado", "ndjson", "csv"]
+
+
+def seed(rows: int):
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        if conn.execute(func.count(Stock.id_stock).select()).scalar() == 0:
+            conn.execute(insert(Stock), [dict(id_store=1, name="bench", creation_date=date.today(), created_by=1)])
+        existing = conn.execute(func.count(Product.id_product).select()).scalar()
+        for offset in range(existing, rows, 10_000):
+            conn.execute(insert(Product), [
+                dict(id_stock=1, name=f"produto {i}", description=f"descrição do produto {i}", price=i % 500,
+                     sku=f"SKU-{i}", category=f"cat{i % 20}", quantity=i % 100, creation_date=date.today(),
+                     created_by=1)
+                for i in range(offset, min(rows, offset + 10_000))
+            ])
+
+
+def run_mode(mode: str):
+    db = Session()
+    written = 0
+    start = time.perf_counter()
+    if mode == "materializado":
+        products = db.query(Product).all()
+        written = len(json.dumps([product_to_dict(p) for p in products], default=str))
+    else:
+        for chunk in stream_export(db, "products", mode):
+            written += len(chunk)
+    elapsed = time.perf_counter() - start
+    db.close()
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({"mode": mode, "seconds": elapsed, "bytes": written, "peak_rss_mb": peak_mb}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--mode", choices=MODES)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode)
+        return
+
+    seed(args.rows)
+    print(f"{'modo':<14} {'linhas/s':>10} {'MB gerados':>11} {'pico RSS MB':>12}")
+    for mode in MODES:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_export", "--mode", mode],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip().splitlines()[-1]
+        result = json.loads(output)
+        print(f"{mode:<14} {args.rows / result['seconds']:>10.0f} {result['bytes'] / 1e6:>11.1f} "
+              f"{result['peak_rss_mb']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+'''
+Finalização de pedidos com 1 a 1000 itens: laço por item (implementação
+antiga) x finalização set-based. Reporta queries e tempo de cada uma.
+
+Uso: python -m benchmarks.bench_finalize [--sizes 1 10 100 1000]
+     DATABASE_URL=postgresql://... python -m benchmarks.bench_finalize
+'''
+import argparse
+import os
+import time
+from datetime import date
+from decimal import Decimal
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("DB_PROFILE", "benchmark")
+
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, engine
+from app.models import order, order_item, store
+from app.models.models import Product, Stock
+from app.query_stats import start_query_stats, current_query_stats
+from app.routes.orders import finalize_order_logic
+from app.schemas.order import OrderStatus
+
+Session = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+
+def finalize_legacy(id: int, db):
+    # Reprodução da versão antiga: uma query e um commit por item
+    db_order = db.query(order.Order).filter(order.Order.id_order == id).first()
+    db_order.status = OrderStatus.PAID
+    db.commit()
+    items = db.query(order_item.OrderItem).filter(order_item.OrderItem.id_order == id).all()
+    loja = db.query(store.Store).filter(store.Store.id_store == db_order.id_store).first()
+    for item in items:
+        product = db.query(Product).filter(Product.id_product == item.id_product).first()
+        loja.balance = loja.balance + Decimal(item.subtotal)
+        product.quantity = product.quantity - item.quantity
+        db.commit()
+
+
+def seed(db, n_items: int) -> int:
+    loja = store.Store(name="bench", cnpj=f"bench-{time.time_ns()}", email=f"{time.time_ns()}@bench",
+                       phone_number="0", creation_date=date.today(), created_by=1, balance=0)
+    db.add(loja)
+    db.flush()
+    stock = Stock(id_store=loja.id_store, name="bench", creation_date=date.today(), created_by=1)
+    db.add(stock)
+    db.flush()
+    products = [
+        Product(id_stock=stock.id_stock, name=f"p{i}", sku=f"sku{i}", quantity=10_000, price=1.0,
+                creation_date=date.today(), created_by=1)
+        for i in range(n_items)
+    ]
+    db.add_all(products)
+    db.flush()
+    db_order = order.Order(id_user=1, id_store=loja.id_store, status=OrderStatus.DRAFT,
+                           total_value=0.0, creation_date=date.today())
+    db.add(db_order)
+    db.flush()
+    db.add_all([
+        order_item.OrderItem(id_order=db_order.id_order, id_product=p.id_product, id_stock=stock.id_stock,
+                             unit_price=1.0, quantity=1, subtotal=1.0,
+                             creation_date=date.today(), date_change=date.today())
+        for p in products
+    ])
+    db.commit()
+    return db_order.id_order
+
+
+def measure(finalize, n_items: int):
+    db = Session()
+    order_id = seed(db, n_items)
+    db.close()
+
+    db = Session()
+    stats = start_query_stats()
+    start = time.perf_counter()
+    finalize(order_id, db)
+    elapsed = time.perf_counter() - start
+    current_query_stats.set(None)
+    db.close()
+    return stats.count, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100, 1000])
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    print(f"{'itens':>6} {'antigo q':>9} {'antigo ms':>10} {'novo q':>7} {'novo ms':>9}")
+    for n in args.sizes:
+        legacy_q, legacy_t = measure(finalize_legacy, n)
+        new_q, new_t = measure(finalize_order_logic, n)
+        print(f"{n:>6} {legacy_q:>9} {legacy_t * 1000:>10.2f} {new_q:>7} {new_t * 1000:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
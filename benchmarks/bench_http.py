@@ -0,0 +1,81 @@
+'''
+Gerador de carga HTTP simples: dispara N requisições com C conexões
+concorrentes em cada caminho e reporta requisições/s, p50 e p99.
+
+Comparação sync x async das leituras (suba o servidor duas vezes):
+    ASYNC_DB_ENABLED=false uvicorn app.main:app --workers 1
+    python -m benchmarks.bench_http --label sync
+    ASYNC_DB_ENABLED=true uvicorn app.main:app --workers 1
+    python -m benchmarks.bench_http --label async
+'''
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import httpx
+
+BASE_URL = os.getenv("BASE_URL", "http://localhost:8000")
+DEFAULT_PATHS = [
+    "/api/products/all",
+    "/api/products/1",
+    "/api/stocks/all/",
+    "/api/stores/all",
+    "/api/orders/1/",
+]
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_path(client, path, total, concurrency, headers):
+    latencies = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for _ in counter:
+            start = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 500:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "rps": total / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p99": percentile(latencies, 99) * 1000,
+        "errors": errors,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--path", action="append", dest="paths")
+    parser.add_argument("--header", action="append", default=[], help="Nome: valor")
+    parser.add_argument("--label", default="")
+    args = parser.parse_args()
+
+    headers = dict(h.split(": ", 1) for h in args.header)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        print(f"{args.label} concorrência={args.concurrency} requisições={args.requests}")
+        print(f"{'caminho':<30} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10} {'erros':>6}")
+        for path in args.paths or DEFAULT_PATHS:
+            result = await run_path(client, path, args.requests, args.concurrency, headers)
+            print(f"{path:<30} {result['rps']:>10.1f} {result['p50']:>10.2f} {result['p99']:>10.2f} {result['errors']:>6}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,76 @@
+'''
+Imagens servidas por segundo em um worker (app/image_serving.py): original,
+miniatura negociada pelo Accept (AVIF/WebP), revalidação com If-None-Match
+(304) e pedido parcial com Range (206). Envia uma foto, espera as versões
+pré-codificadas e dispara a carga com benchmarks/bench_http.py.
+
+Uso (servidor com um worker): python -m benchmarks.bench_images [--requests 2000] [--concurrency 50]
+'''
+import argparse
+import asyncio
+import io
+import os
+import sys
+import time
+import uuid
+
+import httpx
+from PIL import Image
+
+from benchmarks.bench_http import run_path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "tests"))
+from generate_jwt import create_test_token  # noqa: E402
+
+BASE_URL = os.getenv("BASE_URL", "http://localhost:8000")
+HEADERS = {"Authorization": f"Bearer {create_test_token()}"}
+
+
+def upload_photo():
+    # Gradiente com ruído leve: comprime como uma foto de produto
+    image = Image.linear_gradient("L").resize((1600, 1200)).convert("RGB")
+    image = Image.blend(image, Image.frombytes("RGB", image.size, os.urandom(1600 * 1200 * 3)), 0.1)
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=85)
+    unique_id = uuid.uuid4().hex[:8]
+    store = httpx.post(f"{BASE_URL}/api/stores/", data={
+        "name": f"Loja Bench {unique_id}", "cnpj": f"cnpj-{unique_id}", "creation_date": "2025-08-10",
+        "email": f"bench{unique_id}@loja.com", "phone_number": "+5511999999999",
+    }, files={"image": ("foto.jpg", buffer.getvalue(), "image/jpeg")}, headers=HEADERS)
+    store.raise_for_status()
+    urls = store.json()["image_urls"]
+    # Espera a última versão gerada (AVIF/WebP da miniatura medium)
+    while httpx.get(f"{BASE_URL}{urls['medium']}", headers={"Accept": "image/webp"}).headers.get(
+            "content-type") != "image/webp":
+        time.sleep(0.1)
+    return urls
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    urls = upload_photo()
+    etag = httpx.get(f"{BASE_URL}{urls['thumb']}").headers["etag"]
+    scenarios = [
+        ("original (jpeg)", urls["original"], {}),
+        ("thumb (jpeg)", urls["thumb"], {}),
+        ("thumb Accept avif", urls["thumb"], {"Accept": "image/avif,image/webp,*/*"}),
+        ("medium Accept webp", urls["medium"], {"Accept": "image/webp,*/*"}),
+        ("thumb If-None-Match", urls["thumb"], {"If-None-Match": etag}),
+        ("original Range 64KB", urls["original"], {"Range": "bytes=0-65535"}),
+    ]
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=BASE_URL, limits=limits, timeout=60) as client:
+        print(f"{'cenário':<22} {'status':>6} {'bytes':>9} {'imagens/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+        for label, path, headers in scenarios:
+            sample = await client.get(path, headers=headers)
+            result = await run_path(client, path, args.requests, args.concurrency, headers)
+            print(f"{label:<22} {sample.status_code:>6} {len(sample.content):>9} {result['rps']:>10.1f} "
+                  f"{result['p50']:>8.2f} {result['p99']:>8.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
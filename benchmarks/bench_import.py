@@ -0,0 +1,71 @@
+'''
+Carga de catálogo: um produto por vez (create_product, como no cadastro
+via formulário) x importação em lote (app/crud/product.py: COPY no
+PostgreSQL com psycopg2, INSERT multi-linha nos demais bancos).
+
+Uso: python -m benchmarks.bench_import [--rows 100000] [--legacy-rows 1000]
+     DATABASE_URL=postgresql://... python -m benchmarks.bench_import
+'''
+import argparse
+import io
+import os
+import time
+from datetime import date
+
+os.environ.setdefault("DATABASE_URL", "sqlite:////tmp/bench_import.db")
+os.environ.setdefault("DB_PROFILE", "benchmark")
+
+from sqlalchemy.orm import sessionmaker
+
+from app.crud.product import create_product, import_products
+from app.database import Base, engine
+from app.models import order, order_item, store  # noqa: F401 (registra as tabelas)
+from app.models.models import Stock
+
+Session = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+USER = {"user_id": "1"}
+
+
+def build_csv(id_stock: int, rows: int) -> bytes:
+    lines = ["id_stock,name,description,price,sku,category,quantity,creation_date"]
+    lines += [
+        f"{id_stock},Produto {i},Descrição do produto {i},{i % 500}.90,SKU-{i},cat{i % 20},{i % 100},2025-08-14"
+        for i in range(rows)
+    ]
+    return ("\n".join(lines) + "\n").encode()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--legacy-rows", type=int, default=1000)
+    args = parser.parse_args()
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = Session()
+    stock = Stock(id_store=1, name="bench", creation_date=date.today(), created_by=1)
+    db.add(stock)
+    db.commit()
+    id_stock = stock.id_stock
+
+    start = time.perf_counter()
+    for i in range(args.legacy_rows):
+        create_product(db, USER, name=f"Produto {i}", description="d", price=1.0, sku=f"OLD-{i}",
+                       category="c", creation_date=date.today(), id_stock=id_stock, image=None, quantity=1)
+    legacy = args.legacy_rows / (time.perf_counter() - start)
+
+    payload = build_csv(id_stock, args.rows)
+    start = time.perf_counter()
+    result = import_products(db, USER, io.BytesIO(payload), "csv", filename="bench.csv")
+    elapsed = time.perf_counter() - start
+    db.close()
+
+    print(f"banco={engine.dialect.name}/{engine.dialect.driver}")
+    print(f"um a um:  {legacy:>10.0f} produtos/s ({args.legacy_rows} produtos)")
+    print(f"em lote:  {result['imported'] / elapsed:>10.0f} produtos/s "
+          f"({result['imported']} produtos em {elapsed:.2f}s, {result['error_count']} erros)")
+
+
+if __name__ == "__main__":
+    main()
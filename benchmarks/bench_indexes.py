@@ -0,0 +1,143 @@
+'''
+Perfil de índices antigo (um índice por coluna de product/stock) x novo
+(compostos guiados pelas consultas). Mede vazão de inserts e de baixas de
+quantidade e a latência das buscas que os novos índices atendem.
+
+Uso: python -m benchmarks.bench_indexes [--rows 20000] [--lookups 2000]
+     DATABASE_URL=postgresql://... python -m benchmarks.bench_indexes
+'''
+import argparse
+import os
+import random
+import statistics
+import time
+from datetime import date
+
+os.environ.setdefault("DATABASE_URL", "sqlite:////tmp/bench_indexes.db")
+
+from sqlalchemy import create_engine, insert, select, text, update
+
+from app.database import Base, DATABASE_URL
+from app.models import order, order_item, store  # noqa: F401 (registra as tabelas)
+from app.models.models import Product, Stock, StockMovement
+from app.models.order_item import OrderItem
+
+LEGACY_INDEXES = [
+    ("product", column) for column in ("name", "description", "price", "sku", "category", "quantity")
+] + [
+    ("stock", column) for column in ("name", "city", "uf", "zip_code", "address")
+]
+NEW_ONLY_INDEXES = [
+    "ix_product_id_stock_sku", "ix_product_created_by", "ix_stock_created_by",
+    "ix_order_item_order_product", "ix_stock_movement_product_date",
+]
+
+
+def prepare(engine, profile: str):
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    if profile == "antigo":
+        with engine.begin() as conn:
+            for table, column in LEGACY_INDEXES:
+                conn.execute(text(f"CREATE INDEX ix_{table}_{column} ON {table} ({column})"))
+            for table in Base.metadata.sorted_tables:
+                for index in list(table.indexes):
+                    if index.name in NEW_ONLY_INDEXES:
+                        index.drop(conn)
+
+
+def lookup_ms(conn, statement, repeat: int):
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(statement).all()
+        latencies.append(time.perf_counter() - start)
+    return statistics.median(latencies) * 1000
+
+
+def run(profile: str, rows: int, lookups: int):
+    engine = create_engine(DATABASE_URL)
+    prepare(engine, profile)
+    today = date.today()
+    result = {}
+
+    with engine.begin() as conn:
+        id_store = conn.execute(insert(store.Store).values(
+            name="bench", cnpj="bench", email="bench@bench", phone_number="0",
+            creation_date=today, created_by=1, balance=0,
+        )).inserted_primary_key[0]
+        conn.execute(insert(Stock), [
+            dict(id_store=id_store, name=f"s{i}", city="c", uf="SP", zip_code="0", address="a",
+                 creation_date=today, created_by=i % 50)
+            for i in range(100)
+        ])
+        id_order = conn.execute(insert(order.Order).values(
+            id_user=1, id_store=id_store, status="draft", total_value=0, creation_date=today,
+        )).inserted_primary_key[0]
+
+    products = [
+        dict(id_stock=i % 100 + 1, name=f"produto {i}", description=f"descrição {i}", price=i % 500,
+             sku=f"SKU-{i}", category=f"cat{i % 20}", quantity=1_000_000, creation_date=today,
+             created_by=i % 50)
+        for i in range(rows)
+    ]
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        for offset in range(0, rows, 1000):
+            conn.execute(insert(Product), products[offset:offset + 1000])
+    result["insert/s"] = rows / (time.perf_counter() - start)
+
+    with engine.begin() as conn:
+        conn.execute(insert(OrderItem), [
+            dict(id_order=id_order, id_product=i + 1, id_stock=i % 100 + 1, unit_price=1, quantity=1,
+                 subtotal=1, creation_date=today, date_change=today)
+            for i in range(rows)
+        ])
+        conn.execute(insert(StockMovement), [
+            dict(id_product=i % rows + 1, id_stock_origin=1, id_stock_destination=2, quantity=1,
+                 creation_date=today, created_by=1)
+            for i in range(rows)
+        ])
+
+    ids = [random.randint(1, rows) for _ in range(lookups)]
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        for pid in ids:
+            conn.execute(update(Product).where(Product.id_product == pid)
+                         .values(quantity=Product.quantity - 1))
+    result["update/s"] = lookups / (time.perf_counter() - start)
+
+    with engine.connect() as conn:
+        result["stock+sku ms"] = lookup_ms(
+            conn, select(Product.id_product).where(Product.id_stock == 1, Product.sku == "SKU-100"),
+            lookups)
+        result["created_by ms"] = lookup_ms(
+            conn, select(Stock.id_stock).where(Stock.created_by == 7), lookups)
+        result["pedido+produto ms"] = lookup_ms(
+            conn, select(OrderItem.id_order_item).where(OrderItem.id_order == id_order,
+                                                        OrderItem.id_product == rows // 2),
+            lookups)
+        result["histórico ms"] = lookup_ms(
+            conn, select(StockMovement.id_movement).where(StockMovement.id_product == rows // 3)
+            .order_by(StockMovement.creation_date.desc()).limit(20),
+            lookups)
+
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+
+    results = {profile: run(profile, args.rows, args.lookups) for profile in ("antigo", "novo")}
+    print(f"{'métrica':<20} {'antigo':>12} {'novo':>12}")
+    for metric in results["antigo"]:
+        print(f"{metric:<20} {results['antigo'][metric]:>12.3f} {results['novo'][metric]:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+'''
+Custo da cadeia de middlewares por requisição, sem rede nem banco: a mesma
+rota trivial chamada direto via ASGI (a) sem middleware, (b) com as versões
+BaseHTTPMiddleware que existiam antes (log/tempo + usuário do token) e
+(c) com as versões ASGI puras de app/request_timing.py e
+app/dependencies/auth.py. Requisições concorrentes, como um worker a 1k+ RPS.
+
+Uso: python -m benchmarks.bench_middleware [--requests 20000] [--concurrency 100]
+'''
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("REQUEST_LOG_OVERFLOW", "drop")
+
+from fastapi import FastAPI, Request
+from jose import JWTError, jwt
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.dependencies.auth import ALGORITHM, SECRET_KEY, AuthUserMiddleware, bearer_token, verify_token
+from app.query_stats import start_query_stats
+from app.request_log_writer import request_log_writer
+from app.request_timing import RequestTimingMiddleware, logger
+
+TOKEN = jwt.encode({"user_id": "1", "exp": datetime.utcnow() + timedelta(hours=5)}, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def build_app(stack: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping(request: Request):
+        return {"user_id": request.state.user_id if stack != "nenhum" else None}
+
+    if stack == "BaseHTTPMiddleware":
+        # Como era em app/main.py e app/dependencies/auth.py
+        @app.middleware("http")
+        async def log_request_time(request: Request, call_next):
+            start_time = time.time()
+            stats = start_query_stats()
+            response = await call_next(request)
+            process_time = (time.time() - start_time) * 1000
+            logger.info(f"{request.method} {request.url.path} - {process_time:.2f} ms - {stats.count} queries")
+            response.headers["X-Process-Time-ms"] = str(round(process_time, 2))
+            response.headers["X-Query-Count"] = str(stats.count)
+            response.headers["X-DB-Time-ms"] = str(round(stats.db_time_ms, 2))
+            request_log_writer.enqueue({
+                "method": request.method, "path": request.url.path, "status_code": response.status_code,
+                "process_time_ms": round(process_time, 2), "query_count": stats.count,
+                "db_time_ms": round(stats.db_time_ms, 2), "rows_returned": stats.rows,
+                "created_at": datetime.utcnow(),
+            })
+            return response
+
+        class LegacyAuthUserMiddleware(BaseHTTPMiddleware):
+            async def dispatch(self, request: Request, call_next):
+                token = bearer_token(request.headers.get("Authorization"))
+                claims = None
+                if token:
+                    try:
+                        claims = verify_token(token)
+                    except JWTError:
+                        pass
+                request.state.user_id = claims.get("user_id") if claims else None
+                return await call_next(request)
+
+        app.add_middleware(LegacyAuthUserMiddleware)
+    elif stack == "ASGI puro":
+        app.add_middleware(RequestTimingMiddleware)
+        app.add_middleware(AuthUserMiddleware)
+    return app
+
+
+async def call(app):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": "/ping", "raw_path": b"/ping", "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"bench"), (b"authorization", f"Bearer {TOKEN}".encode())],
+        "client": ("127.0.0.1", 1234), "server": ("bench", 80),
+    }
+    received = False
+
+    async def receive():
+        nonlocal received
+        if received:
+            await asyncio.sleep(3600)
+        received = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    status = None
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    assert status == 200
+
+
+async def measure(app, total, concurrency):
+    counter = iter(range(total))
+
+    async def worker():
+        for _ in counter:
+            await call(app)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'middlewares':<20} {'req/s':>10} {'µs/req':>10} {'custo da cadeia µs':>20}")
+    for stack in ["nenhum", "BaseHTTPMiddleware", "ASGI puro"]:
+        app = build_app(stack)
+        await measure(app, 500, args.concurrency)  # aquecimento
+        elapsed = await measure(app, args.requests, args.concurrency)
+        results[stack] = elapsed / args.requests * 1e6
+        print(f"{stack:<20} {args.requests / elapsed:>10.0f} {results[stack]:>10.1f} "
+              f"{results[stack] - results['nenhum']:>20.1f}")
+    print(f"economia por requisição: {results['BaseHTTPMiddleware'] - results['ASGI puro']:.1f} µs")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
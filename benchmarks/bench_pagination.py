@@ -0,0 +1,76 @@
+'''
+Latência de uma página de movimentações em profundidades crescentes:
+offset (skip) x keyset (cursor). Com offset o banco percorre e descarta
+todas as linhas anteriores; com cursor a página começa direto no índice.
+
+Uso: python -m benchmarks.bench_pagination [--rows 1000000] [--limit 100]
+     DATABASE_URL=postgresql://... python -m benchmarks.bench_pagination
+'''
+import argparse
+import os
+import statistics
+import time
+from datetime import date
+
+os.environ.setdefault("DATABASE_URL", "sqlite:////tmp/bench_pagination.db")
+os.environ.setdefault("DB_PROFILE", "benchmark")
+
+from sqlalchemy import func, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, engine
+from app.models import order, order_item, store  # noqa: F401 (registra as tabelas)
+from app.models.models import StockMovement
+from app.pagination import PageParams, encode_cursor, paginate
+
+Session = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+KEY = [StockMovement.id_movement]
+
+
+def seed(rows: int):
+    with engine.begin() as conn:
+        existing = conn.execute(func.count(StockMovement.id_movement).select()).scalar()
+        today = date.today()
+        for offset in range(existing, rows, 10_000):
+            conn.execute(insert(StockMovement), [
+                dict(id_product=i % 1000 + 1, id_stock_origin=1, id_stock_destination=2, quantity=1,
+                     creation_date=today, created_by=1)
+                for i in range(offset, min(rows, offset + 10_000))
+            ])
+
+
+def page_ms(params: PageParams, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        db = Session()
+        start = time.perf_counter()
+        paginate(db.query(StockMovement), KEY, params)
+        timings.append(time.perf_counter() - start)
+        db.close()
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    seed(args.rows)
+    with engine.connect() as conn:
+        first_id = conn.execute(func.min(StockMovement.id_movement).select()).scalar()
+
+    print(f"{'profundidade':>12} {'offset ms':>10} {'cursor ms':>10}")
+    depths = sorted({d for d in (0, 1000, 10_000, 100_000, args.rows // 2, args.rows - args.limit) if 0 <= d < args.rows})
+    for depth in depths:
+        offset_ms = page_ms(PageParams(skip=depth, limit=args.limit, cursor=None), args.repeat)
+        # O cursor equivalente é o id da última linha da página anterior
+        cursor = encode_cursor([first_id + depth - 1])
+        cursor_ms = page_ms(PageParams(skip=0, limit=args.limit, cursor=cursor), args.repeat)
+        print(f"{depth:>12} {offset_ms:>10.2f} {cursor_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
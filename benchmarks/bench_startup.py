@@ -0,0 +1,143 @@
+'''
+Custo da subida de um worker: tempo de `import app.main`, tempo até a
+primeira resposta 200 de uma rota com banco (desde o spawn do processo) e
+latência dessa primeira requisição comparada às seguintes. Cada rodada sobe
+um uvicorn novo (sem --reload) sobre um banco já migrado com
+`alembic upgrade head`.
+
+Modos:
+  legado  SCHEMA_AUTO_CREATE=true  STARTUP_WARMUP=false (create_all na subida, nada aquecido)
+  rápido  SCHEMA_AUTO_CREATE=false STARTUP_WARMUP=true  (esquema pelas migrações, pool e SQL aquecidos)
+
+Sem DATABASE_URL usa um SQLite temporário. --app-dir aponta para outra cópia
+do código (ex.: `git worktree add /tmp/antes HEAD~1`) para comparar versões.
+
+Uso: python -m benchmarks.bench_startup [--runs 5] [--app-dir .]
+'''
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+PATH = "/api/products/all"
+MODES = {
+    "legado": {"SCHEMA_AUTO_CREATE": "true", "STARTUP_WARMUP": "false"},
+    "rápido": {"SCHEMA_AUTO_CREATE": "false", "STARTUP_WARMUP": "true"},
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def prepare_database(env: dict, rows: int):
+    '''Migra com o Alembic (o passo explícito de produção) e semeia produtos.'''
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], cwd=ROOT, env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    seed = f'''
+from datetime import date
+from sqlalchemy import func, insert, select
+from app.database import engine
+from app.models.models import Product, Stock
+with engine.begin() as conn:
+    if conn.execute(select(func.count()).select_from(Product)).scalar() == 0:
+        stock_id = conn.execute(insert(Stock).values(name="Bench", creation_date=date.today(), created_by=1)).inserted_primary_key[0]
+        conn.execute(insert(Product), [
+            {{"id_stock": stock_id, "name": f"Produto {{i}}", "description": "Bench", "sku": f"SKU-{{i}}",
+             "category": "Bench", "price": 10.0, "quantity": 5,
+             "creation_date": date.today(), "created_by": 1}} for i in range({rows})
+        ])
+'''
+    subprocess.run([sys.executable, "-c", seed], cwd=ROOT, env=env, check=True)
+
+
+def import_seconds(env: dict, cwd: str) -> float:
+    code = "import time; start = time.perf_counter(); import app.main; print(time.perf_counter() - start)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env, check=True,
+                            capture_output=True, text=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def boot(env: dict, cwd: str) -> dict:
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(base_url=base_url, timeout=30) as client:
+            # Pronto = o lifespan terminou e o uvicorn aceita conexões
+            while True:
+                try:
+                    if client.get("/metrics").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    time.sleep(0.005)
+            ready = time.perf_counter()
+            response = client.get(PATH)
+            first = time.perf_counter()
+            assert response.status_code == 200, response.text
+            following = []
+            for _ in range(20):
+                request_start = time.perf_counter()
+                client.get(PATH, params={"limit": 99})  # fora do cache de respostas
+                following.append(time.perf_counter() - request_start)
+        return {
+            "ready": ready - start,
+            "first_ok": first - start,
+            "first_request": first - ready,
+            "following": statistics.median(following),
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--app-dir", default=ROOT)
+    args = parser.parse_args()
+    app_dir = os.path.abspath(args.app_dir)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # O ImageFiles exige a pasta images/ no diretório de trabalho
+        os.makedirs(os.path.join(workdir, "images"))
+        env = dict(os.environ)
+        env.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+        env.setdefault("DB_PROFILE", "prod")
+        env.setdefault("SECRET_KEY", "bench")
+        env["PYTHONPATH"] = app_dir
+        prepare_database(env, args.rows)
+
+        print(f"{'modo':<8} {'import ms':>10} {'pronto ms':>10} {'1º 200 ms':>10} {'1ª req ms':>10} {'seguintes ms':>13}")
+        # Modos intercalados a cada rodada: a variação da máquina afeta os dois igual
+        imports = {mode: [] for mode in MODES}
+        boots = {mode: [] for mode in MODES}
+        for _ in range(args.runs):
+            for mode, flags in MODES.items():
+                mode_env = {**env, **flags}
+                imports[mode].append(import_seconds(mode_env, workdir))
+                boots[mode].append(boot(mode_env, workdir))
+
+        for mode in MODES:
+            def median_ms(key):
+                return statistics.median(b[key] for b in boots[mode]) * 1000
+
+            print(f"{mode:<8} {statistics.median(imports[mode]) * 1000:>10.1f} {median_ms('ready'):>10.1f} "
+                  f"{median_ms('first_ok'):>10.1f} {median_ms('first_request'):>10.2f} {median_ms('following'):>13.2f}")
+
+if __name__ == "__main__":
+    main()
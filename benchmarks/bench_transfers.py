@@ -0,0 +1,83 @@
+'''
+Vazão de transferências concorrentes entre os mesmos dois estoques, nos dois
+sentidos, contra um servidor em execução. Ao final confere se a quantidade
+total foi preservada e se nenhum estoque ficou negativo.
+
+Uso: SECRET_KEY=... python -m benchmarks.bench_transfers [--threads 32] [--transfers 2000]
+'''
+import argparse
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "tests"))
+from generate_jwt import create_test_token  # noqa: E402
+
+BASE_URL = os.getenv("BASE_URL", "http://localhost:8000")
+HEADERS = {"Authorization": f"Bearer {create_test_token()}"}
+INITIAL_QUANTITY = 1000
+
+
+def setup(client):
+    unique_id = uuid.uuid4().hex[:8]
+    store = client.post("/api/stores/", data={
+        "name": f"Bench {unique_id}", "cnpj": f"bench-{unique_id}", "creation_date": "2025-08-10",
+        "email": f"bench{unique_id}@loja.com", "phone_number": "0",
+    }, headers=HEADERS).json()
+    stocks = [
+        client.post("/api/stocks/", json={
+            "id_store": store["id_store"], "name": f"Bench {i}", "city": "c", "uf": "SP",
+            "zip_code": "0", "address": "a", "creation_date": "2025-08-10",
+        }, headers=HEADERS).json()["id_stock"]
+        for i in range(2)
+    ]
+    product = client.post("/api/products/", data={
+        "id_stock": stocks[0], "name": "Bench", "description": "bench", "price": 1, "sku": f"BENCH-{unique_id}",
+        "category": "bench", "quantity": INITIAL_QUANTITY, "creation_date": "2025-08-14",
+    }, headers=HEADERS).json()["id_product"]
+    transfer(client, product, stocks[0], stocks[1], INITIAL_QUANTITY // 2)
+    back = client.get(f"/api/stocks/{stocks[1]}", headers=HEADERS).json()["products"][0]["id_product"]
+    return stocks, product, back
+
+
+def transfer(client, id_product, origin, destination, quantity):
+    return client.post("/api/stocks/movements/", json={
+        "id_product": id_product, "id_stock_origin": origin, "id_stock_destination": destination,
+        "quantity": quantity, "creation_date": "2025-08-14",
+    }, headers=HEADERS).status_code
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--transfers", type=int, default=2000)
+    args = parser.parse_args()
+
+    with httpx.Client(base_url=BASE_URL, timeout=120) as client:
+        (origin, destination), product, back = setup(client)
+        jobs = [(product, origin, destination) if i % 2 else (back, destination, origin) for i in range(args.transfers)]
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            statuses = list(pool.map(lambda job: transfer(client, *job, 1), jobs))
+        elapsed = time.perf_counter() - start
+
+        totals = [
+            sum(p["quantity"] for p in client.get(f"/api/stocks/{s}", headers=HEADERS).json()["products"])
+            for s in (origin, destination)
+        ]
+
+    print(f"threads={args.threads} transferências={args.transfers} tempo={elapsed:.2f}s "
+          f"vazão={args.transfers / elapsed:.1f}/s")
+    print(f"status: 200={statuses.count(200)} 4xx={sum(400 <= c < 500 for c in statuses)} "
+          f"5xx={sum(c >= 500 for c in statuses)}")
+    print(f"estoques={totals} soma={sum(totals)} esperado={INITIAL_QUANTITY} "
+          f"{'OK' if sum(totals) == INITIAL_QUANTITY and min(totals) >= 0 else 'INCONSISTENTE'}")
+
+
+if __name__ == "__main__":
+    main()
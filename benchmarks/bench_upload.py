@@ -0,0 +1,95 @@
+'''
+Upload de imagens por tamanho: latência da rota (cópia em blocos, miniaturas
+em background) comparada ao custo de gerar as miniaturas dentro da
+requisição, medido localmente com a mesma função do pool de processos.
+Também mede quanto tempo as miniaturas levam para ficar disponíveis e o
+reenvio de uma imagem já armazenada (só o hash, nada é gravado).
+
+Uso (servidor rodando): python -m benchmarks.bench_upload [--uploads 10]
+'''
+import argparse
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+import httpx
+from PIL import Image
+
+from app.utils.file_utils import make_image_variants
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "tests"))
+from generate_jwt import create_test_token  # noqa: E402
+
+BASE_URL = os.getenv("BASE_URL", "http://localhost:8000")
+HEADERS = {"Authorization": f"Bearer {create_test_token()}"}
+SIZES = [(800, 600), (2000, 1500), (3000, 2250)]
+
+
+def photo_bytes(width, height):
+    # Ruído comprime mal: o JPEG fica com o tamanho de uma foto real
+    buffer = io.BytesIO()
+    Image.frombytes("RGB", (width, height), os.urandom(width * height * 3)).save(buffer, format="JPEG", quality=85)
+    return buffer.getvalue()
+
+
+def inline_variants_ms(payload):
+    with tempfile.TemporaryDirectory() as folder:
+        with open(os.path.join(folder, "foto.jpg"), "wb") as f:
+            f.write(payload)
+        start = time.perf_counter()
+        make_image_variants("foto.jpg", upload_folder=folder)
+        return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--uploads", type=int, default=10)
+    args = parser.parse_args()
+
+    unique_id = uuid.uuid4().hex[:8]
+    store = httpx.post(f"{BASE_URL}/api/stores/", data={
+        "name": f"Loja Bench {unique_id}", "cnpj": f"cnpj-{unique_id}", "creation_date": "2025-08-10",
+        "email": f"bench{unique_id}@loja.com", "phone_number": "+5511999999999",
+    }, headers=HEADERS).json()
+    id_stock = httpx.post(f"{BASE_URL}/api/stocks/", json={
+        "id_store": store["id_store"], "name": "Estoque Bench", "city": "São Paulo", "uf": "SP",
+        "zip_code": "01000-000", "address": "Rua A", "creation_date": "2025-08-10",
+    }, headers=HEADERS).json()["id_stock"]
+    product = httpx.post(f"{BASE_URL}/api/products/", data={
+        "id_stock": id_stock, "name": "Produto Bench", "description": "bench", "price": 1,
+        "sku": f"SKU-{unique_id}", "category": "bench", "quantity": 1, "creation_date": "2025-08-10",
+    }, headers=HEADERS).json()
+
+    print(f"{'imagem':<11} {'MB':>5} {'upload p50 ms':>14} {'miniaturas na requisição ms':>28} "
+          f"{'miniaturas prontas ms':>22} {'reenvio p50 ms':>15}")
+    with httpx.Client(base_url=BASE_URL, headers=HEADERS, timeout=60) as client:
+        for width, height in SIZES:
+            payloads = [photo_bytes(width, height) for _ in range(args.uploads)]
+            latencies, ready, repeats = [], [], []
+            for payload in payloads:
+                start = time.perf_counter()
+                response = client.put(f"/api/products/{product['id_product']}",
+                                      files={"image": ("foto.jpg", payload, "image/jpeg")})
+                latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+                # Conteúdo novo a cada upload: espera as miniaturas aparecerem
+                thumb = response.json()["image_urls"]["medium"]
+                while client.get(thumb).status_code != 200:
+                    time.sleep(0.005)
+                ready.append(time.perf_counter() - start)
+            for _ in range(args.uploads):
+                start = time.perf_counter()
+                client.put(f"/api/products/{product['id_product']}",
+                           files={"image": ("foto.jpg", payloads[0], "image/jpeg")}).raise_for_status()
+                repeats.append(time.perf_counter() - start)
+            print(f"{width}x{height:<6} {len(payloads[0]) / 1e6:>5.1f} {statistics.median(latencies) * 1000:>14.1f} "
+                  f"{inline_variants_ms(payloads[0]):>28.1f} {statistics.median(ready) * 1000:>22.1f} "
+                  f"{statistics.median(repeats) * 1000:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
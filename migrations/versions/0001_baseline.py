@@ -0,0 +1,137 @@
+"""Esquema inicial (o que o create_all criava antes das migrações)
+
+Bancos já existentes: as tabelas presentes são mantidas e apenas as que
+faltarem são criadas. Em seguida rode `alembic upgrade head`.
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001_baseline"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def create_table_if_missing(name, *columns, indexes=()):
+    if sa.inspect(op.get_bind()).has_table(name):
+        return
+    op.create_table(name, *columns)
+    for column in indexes:
+        op.create_index(f"ix_{name}_{column}", name, [column])
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    create_table_if_missing(
+        "stock",
+        sa.Column("id_stock", sa.Integer(), primary_key=True),
+        sa.Column("id_store", sa.Integer()),
+        sa.Column("name", sa.String()),
+        sa.Column("city", sa.String()),
+        sa.Column("uf", sa.String()),
+        sa.Column("zip_code", sa.String()),
+        sa.Column("address", sa.String()),
+        sa.Column("creation_date", sa.Date(), nullable=False),
+        sa.Column("created_by", sa.Integer(), nullable=False),
+        indexes=("id_stock", "id_store", "name", "city", "uf", "zip_code", "address"),
+    )
+    create_table_if_missing(
+        "product",
+        sa.Column("id_product", sa.Integer(), primary_key=True),
+        sa.Column("id_stock", sa.Integer(), sa.ForeignKey("stock.id_stock", ondelete="CASCADE"), nullable=False),
+        sa.Column("name", sa.String()),
+        sa.Column("image", sa.String()),
+        sa.Column("description", sa.String()),
+        sa.Column("price", sa.Float()),
+        sa.Column("sku", sa.String()),
+        sa.Column("category", sa.String()),
+        sa.Column("quantity", sa.Integer()),
+        sa.Column("creation_date", sa.Date(), nullable=False),
+        sa.Column("created_by", sa.Integer(), nullable=False),
+        indexes=("id_product", "name", "description", "price", "sku", "category", "quantity"),
+    )
+    create_table_if_missing(
+        "stock_movement",
+        sa.Column("id_movement", sa.Integer(), primary_key=True),
+        sa.Column("id_product", sa.Integer(), sa.ForeignKey("product.id_product", ondelete="CASCADE"), nullable=False),
+        sa.Column("id_stock_origin", sa.Integer()),
+        sa.Column("id_stock_destination", sa.Integer()),
+        sa.Column("quantity", sa.Integer()),
+        sa.Column("observation", sa.String()),
+        sa.Column("creation_date", sa.Date(), nullable=False),
+        sa.Column("created_by", sa.Integer(), nullable=False),
+        indexes=("id_movement",),
+    )
+    create_table_if_missing(
+        "store",
+        sa.Column("id_store", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("cnpj", sa.String(), nullable=False, unique=True),
+        sa.Column("creation_date", sa.Date(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False, unique=True),
+        sa.Column("phone_number", sa.String(), nullable=False),
+        sa.Column("image", sa.String()),
+        sa.Column("created_by", sa.Integer(), nullable=False),
+        sa.Column("balance", sa.Numeric(precision=20, scale=2)),
+        indexes=("id_store", "image"),
+    )
+    create_table_if_missing(
+        "order",
+        sa.Column("id_order", sa.Integer(), primary_key=True),
+        sa.Column("id_user", sa.Integer(), nullable=False),
+        sa.Column("id_store", sa.Integer(), sa.ForeignKey("store.id_store"), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("order_date", sa.Date()),
+        sa.Column("total_value", sa.Float(), nullable=False),
+        sa.Column("creation_date", sa.Date(), nullable=False),
+        indexes=("id_order",),
+    )
+    create_table_if_missing(
+        "order_item",
+        sa.Column("id_order_item", sa.Integer(), primary_key=True),
+        sa.Column("id_order", sa.Integer(), sa.ForeignKey("order.id_order"), nullable=False),
+        sa.Column("id_product", sa.Integer(), nullable=False),
+        sa.Column("id_stock", sa.Integer(), nullable=False),
+        sa.Column("unit_price", sa.Float(), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("subtotal", sa.Float(), nullable=False),
+        sa.Column("creation_date", sa.Date(), nullable=False),
+        sa.Column("date_change", sa.Date(), nullable=False),
+        indexes=("id_order_item",),
+    )
+    create_table_if_missing(
+        "audit_log",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("table_name", sa.String(), nullable=False),
+        sa.Column("operation", sa.String(), nullable=False),
+        sa.Column("old_data", sa.JSON()),
+        sa.Column("new_data", sa.JSON()),
+        sa.Column("user", sa.Integer()),
+        sa.Column("timestamp", sa.DateTime()),
+    )
+    create_table_if_missing(
+        "request_logs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("method", sa.String(), nullable=False),
+        sa.Column("path", sa.String(), nullable=False),
+        sa.Column("status_code", sa.Integer(), nullable=False),
+        sa.Column("process_time_ms", sa.Float(), nullable=False),
+        sa.Column("query_count", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime()),
+        indexes=("id",),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in ("request_logs", "audit_log", "order_item", "order", "store", "stock_movement", "product", "stock"):
+        op.drop_table(name)
@@ -0,0 +1,69 @@
+"""Colunas de métricas em request_logs, entity_id e índices do audit_log, tabela de reservas
+
+Revision ID: 0002_logs_audit_reservations
+Revises: 0001_baseline
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002_logs_audit_reservations"
+down_revision: Union[str, Sequence[str], None] = "0001_baseline"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+AUDIT_INDEXES = {
+    "ix_audit_log_table_entity_id": ["table_name", "entity_id", "id"],
+    "ix_audit_log_table_operation_id": ["table_name", "operation", "id"],
+    "ix_audit_log_user_id": ["user", "id"],
+    "ix_audit_log_timestamp": ["timestamp"],
+}
+
+
+def add_column_if_missing(table, column):
+    columns = {c["name"] for c in sa.inspect(op.get_bind()).get_columns(table)}
+    if column.name not in columns:
+        op.add_column(table, column)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    add_column_if_missing("request_logs", sa.Column("db_time_ms", sa.Float(), nullable=True))
+    add_column_if_missing("request_logs", sa.Column("rows_returned", sa.Integer(), nullable=True))
+    add_column_if_missing("audit_log", sa.Column("entity_id", sa.Integer(), nullable=True))
+
+    if not sa.inspect(op.get_bind()).has_table("reservation"):
+        op.create_table(
+            "reservation",
+            sa.Column("id_reservation", sa.Integer(), primary_key=True),
+            sa.Column("id_product", sa.Integer(), sa.ForeignKey("product.id_product", ondelete="CASCADE"), nullable=False),
+            sa.Column("id_order", sa.Integer(), sa.ForeignKey("order.id_order", ondelete="CASCADE"), nullable=False),
+            sa.Column("quantity", sa.Integer(), nullable=False),
+            sa.Column("expires_at", sa.DateTime(), nullable=False),
+            sa.Column("created_at", sa.DateTime()),
+            sa.UniqueConstraint("id_order", "id_product", name="uq_reservation_order_product"),
+        )
+        op.create_index("ix_reservation_id_reservation", "reservation", ["id_reservation"])
+        op.create_index("ix_reservation_product_expires", "reservation", ["id_product", "expires_at"])
+        op.create_index("ix_reservation_expires", "reservation", ["expires_at"])
+
+    # audit_log pode ser grande: índices construídos sem bloquear escritas
+    with op.get_context().autocommit_block():
+        for name, columns in AUDIT_INDEXES.items():
+            op.create_index(name, "audit_log", columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name in AUDIT_INDEXES:
+            op.drop_index(name, table_name="audit_log", postgresql_concurrently=True, if_exists=True)
+    op.drop_table("reservation")
+    op.drop_column("audit_log", "entity_id")
+    op.drop_column("request_logs", "rows_returned")
+    op.drop_column("request_logs", "db_time_ms")
@@ -0,0 +1,65 @@
+"""Índices de product/stock guiados pelas consultas de app/crud
+
+Remove os índices de colunas que só são lidas ou atualizadas (cada baixa de
+quantidade atualizava várias B-trees) e cria os compostos que as consultas
+realmente usam. Tudo com CONCURRENTLY no PostgreSQL, sem bloquear escritas.
+
+Revision ID: 0003_index_profile
+Revises: 0002_logs_audit_reservations
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003_index_profile"
+down_revision: Union[str, Sequence[str], None] = "0002_logs_audit_reservations"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Índices de coluna única que deixam de existir (nome, tabela, coluna)
+DROPPED_INDEXES = [
+    ("ix_product_id_product", "product", "id_product"),  # redundante com a PK
+    ("ix_product_name", "product", "name"),
+    ("ix_product_description", "product", "description"),
+    ("ix_product_price", "product", "price"),
+    ("ix_product_sku", "product", "sku"),
+    ("ix_product_category", "product", "category"),
+    ("ix_product_quantity", "product", "quantity"),
+    ("ix_stock_id_stock", "stock", "id_stock"),  # redundante com a PK
+    ("ix_stock_name", "stock", "name"),
+    ("ix_stock_city", "stock", "city"),
+    ("ix_stock_uf", "stock", "uf"),
+    ("ix_stock_zip_code", "stock", "zip_code"),
+    ("ix_stock_address", "stock", "address"),
+]
+
+CREATED_INDEXES = [
+    ("ix_product_id_stock_sku", "product", ["id_stock", "sku"]),
+    ("ix_product_created_by", "product", ["created_by"]),
+    ("ix_stock_created_by", "stock", ["created_by"]),
+    ("ix_order_item_order_product", "order_item", ["id_order", "id_product"]),
+    ("ix_stock_movement_product_date", "stock_movement", ["id_product", "creation_date"]),
+    ("ix_order_id_user", "order", ["id_user"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns in CREATED_INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+        for name, table, _ in DROPPED_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, column in DROPPED_INDEXES:
+            op.create_index(name, table, [column], postgresql_concurrently=True, if_not_exists=True)
+        for name, table, _ in CREATED_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
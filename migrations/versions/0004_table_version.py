@@ -0,0 +1,33 @@
+"""Contadores de versão por tabela para os ETags
+
+Revision ID: 0004_table_version
+Revises: 0003_index_profile
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004_table_version"
+down_revision: Union[str, Sequence[str], None] = "0003_index_profile"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not sa.inspect(op.get_bind()).has_table("table_version"):
+        op.create_table(
+            "table_version",
+            sa.Column("table_name", sa.String(), primary_key=True),
+            sa.Column("version", sa.BigInteger(), nullable=False),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("table_version")
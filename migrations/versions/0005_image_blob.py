@@ -0,0 +1,33 @@
+"""Contagem de referências das imagens armazenadas por conteúdo
+
+Revision ID: 0005_image_blob
+Revises: 0004_table_version
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005_image_blob"
+down_revision: Union[str, Sequence[str], None] = "0004_table_version"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not sa.inspect(op.get_bind()).has_table("image_blob"):
+        op.create_table(
+            "image_blob",
+            sa.Column("filename", sa.String(), primary_key=True),
+            sa.Column("ref_count", sa.Integer(), nullable=False),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("image_blob")
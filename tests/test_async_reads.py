@@ -0,0 +1,63 @@
+from dotenv import load_dotenv
+import httpx
+import os
+import pytest
+import socket
+import subprocess
+import sys
+import time
+from generate_jwt import create_test_token
+
+load_dotenv()
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+AUTH_TOKEN = create_test_token()
+HEADERS = {"Authorization": f"Bearer {AUTH_TOKEN}"}
+
+
+@pytest.fixture(scope="module")
+def async_server(tmp_path_factory):
+    '''Sobe um uvicorn próprio com ASYNC_DB_ENABLED=true sobre um SQLite temporário.'''
+    pytest.importorskip("aiosqlite")
+    workdir = tmp_path_factory.mktemp("async_reads")
+    (workdir / "images").mkdir()
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    env = {
+        **os.environ,
+        "ASYNC_DB_ENABLED": "true",
+        "DATABASE_URL": f"sqlite:///{workdir / 'async.db'}",
+        "SCHEMA_AUTO_CREATE": "true",
+        "PYTHONPATH": ROOT,
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(300):
+            try:
+                httpx.get(f"{base_url}/metrics")
+                break
+            except httpx.TransportError:
+                time.sleep(0.1)
+        yield base_url
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def test_static_order_routes_are_not_captured_by_async_reads(async_server):
+    order = httpx.post(f"{async_server}/api/orders/", json={
+        "id_user": 1000, "id_store": 1, "creation_date": "2025-08-10",
+    }, headers=HEADERS).json()
+
+    mine = httpx.get(f"{async_server}/api/orders/my/", headers=HEADERS)
+    assert mine.status_code == 200, mine.text
+    assert [o["id_order"] for o in mine.json()] == [order["id_order"]]
+
+    # O detalhe por id continua atendido pela rota assíncrona
+    detail = httpx.get(f"{async_server}/api/orders/{order['id_order']}/")
+    assert detail.status_code == 200
+    assert detail.json()["id_order"] == order["id_order"]
@@ -0,0 +1,88 @@
+from dotenv import load_dotenv
+import httpx
+import json
+import os
+import uuid
+from generate_jwt import create_test_token
+
+load_dotenv()
+BASE_URL = os.getenv("BASE_URL", "http://localhost:8000")
+AUTH_TOKEN = create_test_token()
+HEADERS = {"Authorization": f"Bearer {AUTH_TOKEN}"}
+
+
+def test_audit_keyset_pagination():
+    first = httpx.get(f"{BASE_URL}/auditoria", params={"limit": 1})
+    assert first.status_code == 200
+    page = first.json()
+    assert "items" in page and "next_cursor" in page
+
+    if page["next_cursor"]:
+        second = httpx.get(f"{BASE_URL}/auditoria", params={"limit": 1, "cursor": page["next_cursor"]}).json()
+        assert all(item["id"] < page["next_cursor"] for item in second["items"])
+
+
+def test_audit_ndjson_stream():
+    response = httpx.get(f"{BASE_URL}/auditoria", params={"format": "ndjson", "operation": "INSERT"})
+    assert response.status_code == 200
+    for line in response.text.splitlines():
+        assert json.loads(line)["operation"] == "INSERT"
+
+
+def create_product():
+    unique_id = uuid.uuid4().hex[:8]
+    id_stock = httpx.post(f"{BASE_URL}/api/stocks/", json={
+        "id_store": 1, "name": "Estoque Auditoria", "city": "São Paulo", "uf": "SP",
+        "zip_code": "01000-000", "address": "Rua A", "creation_date": "2025-08-10",
+    }, headers=HEADERS).json()["id_stock"]
+    return httpx.post(f"{BASE_URL}/api/products/", data={
+        "id_stock": id_stock, "name": "Produto Auditoria", "description": "auditoria", "price": 5,
+        "sku": f"AUD-{unique_id}", "category": "auditoria", "quantity": 3, "creation_date": "2025-08-10",
+    }, headers=HEADERS).json()
+
+
+def entity_logs(id_product):
+    return httpx.get(f"{BASE_URL}/auditoria", params={"table_name": "product", "entity_id": id_product}).json()["items"][::-1]
+
+
+def entity_state(id_product, at):
+    return httpx.get(f"{BASE_URL}/auditoria/product/{id_product}/estado", params={"at": at}).json()
+
+
+def test_update_stores_only_changed_columns_and_state_is_rebuilt():
+    product = create_product()
+    id_product = product["id_product"]
+    httpx.put(f"{BASE_URL}/api/products/{id_product}", data={"quantity": 8}, headers=HEADERS)
+
+    insert_log, update_log = entity_logs(id_product)
+    assert insert_log["operation"] == "INSERT"
+    assert update_log["operation"] == "UPDATE"
+    assert update_log["old_data"] == {"quantity": 3}
+    assert update_log["new_data"] == {"quantity": 8}
+
+    # O estado em cada registro é a linha naquele momento
+    after_insert = entity_state(id_product, insert_log["timestamp"])["state"]
+    assert after_insert == insert_log["new_data"]
+    assert after_insert["quantity"] == 3
+    after_update = entity_state(id_product, update_log["timestamp"])["state"]
+    assert after_update == {**insert_log["new_data"], "quantity": 8}
+    current = httpx.get(f"{BASE_URL}/api/products/{id_product}").json()
+    assert {k: after_update[k] for k in ("name", "sku", "price", "quantity")} == {
+        k: current[k] for k in ("name", "sku", "price", "quantity")
+    }
+
+
+def test_state_after_delete_is_marked_deleted():
+    product = create_product()
+    id_product = product["id_product"]
+    assert httpx.delete(f"{BASE_URL}/api/products/{id_product}", headers=HEADERS).status_code == 200
+
+    logs = entity_logs(id_product)
+    assert [log["operation"] for log in logs] == ["INSERT", "DELETE"]
+    assert logs[1]["old_data"]["sku"] == product["sku"]
+
+    deleted = entity_state(id_product, logs[1]["timestamp"])
+    assert deleted["deleted"] is True
+    assert deleted["state"] is None
+    # Antes do DELETE o registro ainda existia
+    assert entity_state(id_product, logs[0]["timestamp"])["state"]["sku"] == product["sku"]
@@ -0,0 +1,34 @@
+from dotenv import load_dotenv
+import httpx
+import os
+import re
+from generate_jwt import create_test_token
+
+load_dotenv()
+BASE_URL = os.getenv("BASE_URL", "http://localhost:8000")
+
+
+def metric(name):
+    match = re.search(rf"^{name} (\S+)$", httpx.get(f"{BASE_URL}/metrics").text, re.M)
+    return float(match.group(1)) if match else 0.0
+
+
+def test_token_is_verified_once_and_then_cached():
+    headers = {"Authorization": f"Bearer {create_test_token('4242')}", "Cache-Control": "no-cache"}
+    misses = metric("jwt_cache_misses_total")
+    hits = metric("jwt_cache_hits_total")
+
+    for _ in range(3):
+        assert httpx.get(f"{BASE_URL}/api/orders/my", headers=headers).status_code in (200, 404)
+
+    # Uma verificação completa no primeiro uso; middleware e dependência reaproveitam
+    assert metric("jwt_cache_misses_total") - misses == 1
+    assert metric("jwt_cache_hits_total") - hits == 2
+
+
+def test_invalid_token_is_rejected_and_not_cached():
+    token = create_test_token("4243")
+    tampered = token[:-2] + ("AA" if not token.endswith("AA") else "BB")
+    for _ in range(2):
+        response = httpx.get(f"{BASE_URL}/api/orders/my", headers={"Authorization": f"Bearer {tampered}"})
+        assert response.status_code == 401
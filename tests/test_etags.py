@@ -0,0 +1,65 @@
+from dotenv import load_dotenv
+import httpx
+import os
+import uuid
+from generate_jwt import create_test_token
+
+load_dotenv()
+BASE_URL = os.getenv("BASE_URL", "http://localhost:8000")
+AUTH_TOKEN = create_test_token()
+HEADERS = {"Authorization": f"Bearer {AUTH_TOKEN}"}
+
+
+def create_store():
+    unique_id = uuid.uuid4().hex[:8]
+    return httpx.post(f"{BASE_URL}/api/stores/", data={
+        "name": f"Loja ETag {unique_id}",
+        "cnpj": f"cnpj-{unique_id}",
+        "creation_date": "2025-08-10",
+        "email": f"etag{unique_id}@loja.com",
+        "phone_number": "+5511999999999",
+    }, headers=HEADERS).json()
+
+
+def test_not_modified_until_write():
+    create_store()
+    url = f"{BASE_URL}/api/stores/all?limit=1000"
+    first = httpx.get(url)
+    etag = first.headers["ETag"]
+
+    # Resposta em cache: 304 direto do ETag guardado, sem consultar o banco
+    cached = httpx.get(url, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["X-Query-Count"] == "0"
+
+    # Sem alterações: 304 sem corpo e só a consulta das versões
+    not_modified = httpx.get(url, headers={"If-None-Match": etag, "Cache-Control": "no-cache"})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["X-Query-Count"] == "1"
+
+    create_store()
+    modified = httpx.get(url, headers={"If-None-Match": etag})
+    assert modified.status_code == 200
+    assert modified.headers["ETag"] != etag
+
+
+def test_etag_depends_on_user_and_params():
+    url = f"{BASE_URL}/api/stores/all"
+    assert httpx.get(f"{url}?limit=1").headers["ETag"] != httpx.get(f"{url}?limit=2").headers["ETag"]
+    other_user = {"Authorization": f"Bearer {create_test_token('2000')}"}
+    assert httpx.get(url, headers=HEADERS).headers["ETag"] != httpx.get(url, headers=other_user).headers["ETag"]
+
+
+def test_wildcard_and_missing_auth_do_not_skip_the_route():
+    # If-None-Match: * não vira 304 para um recurso que não existe
+    missing = httpx.get(f"{BASE_URL}/api/products/999999999", headers={"If-None-Match": "*"})
+    assert missing.status_code == 404
+
+    # A autenticação da rota roda antes do 304 e do cache de respostas
+    url = f"{BASE_URL}/api/orders/my/"
+    etag = httpx.get(url, headers=HEADERS).headers["ETag"]
+    assert httpx.get(url, headers={**HEADERS, "If-None-Match": etag}).status_code == 304
+    invalid = {"Authorization": f"Bearer {AUTH_TOKEN[:-2]}xx", "If-None-Match": etag}
+    assert httpx.get(url, headers=invalid).status_code == 401
+    assert httpx.get(url, headers={"If-None-Match": "*"}).status_code in (401, 403)
@@ -0,0 +1,51 @@
+from dotenv import load_dotenv
+import csv
+import httpx
+import io
+import json
+import os
+import uuid
+from generate_jwt import create_test_token
+
+load_dotenv()
+BASE_URL = os.getenv("BASE_URL", "http://localhost:8000")
+AUTH_TOKEN = create_test_token()
+HEADERS = {"Authorization": f"Bearer {AUTH_TOKEN}"}
+
+
+def create_stock():
+    unique_id = uuid.uuid4().hex[:8]
+    store = httpx.post(f"{BASE_URL}/api/stores/", data={
+        "name": f"Loja Export {unique_id}",
+        "cnpj": f"cnpj-{unique_id}",
+        "creation_date": "2025-08-10",
+        "email": f"export{unique_id}@loja.com",
+        "phone_number": "+5511999999999",
+    }, headers=HEADERS).json()
+    return httpx.post(f"{BASE_URL}/api/stocks/", json={
+        "id_store": store["id_store"], "name": f"Estoque Export {unique_id}", "city": "São Paulo",
+        "uf": "SP", "zip_code": "01000-000", "address": "Rua A", "creation_date": "2025-08-10",
+    }, headers=HEADERS).json()
+
+
+def test_export_stocks_ndjson():
+    stock = create_stock()
+    with httpx.stream("GET", f"{BASE_URL}/api/export/stocks") as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in response.iter_lines() if line]
+    assert stock["id_stock"] in [row["id_stock"] for row in rows]
+    assert [row["id_stock"] for row in rows] == sorted(row["id_stock"] for row in rows)
+
+
+def test_export_stocks_csv():
+    stock = create_stock()
+    response = httpx.get(f"{BASE_URL}/api/export/stocks?format=csv")
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert str(stock["id_stock"]) in [row["id_stock"] for row in rows]
+    assert rows[-1]["city"]
+
+
+def test_export_unknown_table():
+    assert httpx.get(f"{BASE_URL}/api/export/nao-existe").status_code == 404
@@ -0,0 +1,121 @@
+from dotenv import load_dotenv
+from PIL import Image
+import httpx
+import io
+import os
+import socket
+import time
+import uuid
+from generate_jwt import create_test_token
+
+load_dotenv()
+BASE_URL = os.getenv("BASE_URL", "http://localhost:8000")
+AUTH_TOKEN = create_test_token()
+HEADERS = {"Authorization": f"Bearer {AUTH_TOKEN}"}
+
+
+def png_bytes(width=1200, height=800):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 30, 30)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def create_store(files=None):
+    unique_id = uuid.uuid4().hex[:8]
+    return httpx.post(f"{BASE_URL}/api/stores/", data={
+        "name": f"Loja Imagem {unique_id}",
+        "cnpj": f"cnpj-{unique_id}",
+        "creation_date": "2025-08-10",
+        "email": f"imagem{unique_id}@loja.com",
+        "phone_number": "+5511999999999",
+    }, files=files, headers=HEADERS)
+
+
+def test_upload_exposes_variant_urls_and_generates_thumbnails():
+    response = create_store(files={"image": ("logo.png", png_bytes(), "image/png")})
+    assert response.status_code == 200, response.text
+    urls = response.json()["image_urls"]
+    assert set(urls) == {"original", "thumb", "small", "medium"}
+    assert httpx.get(f"{BASE_URL}{urls['original']}").status_code == 200
+
+    # Miniaturas são geradas em background, logo depois da resposta
+    for _ in range(50):
+        thumb = httpx.get(f"{BASE_URL}{urls['thumb']}")
+        if thumb.status_code == 200:
+            break
+        time.sleep(0.2)
+    assert thumb.status_code == 200
+    assert max(Image.open(io.BytesIO(thumb.content)).size) == 160
+
+
+def test_upload_over_size_limit_is_rejected():
+    store = create_store().json()
+    oversized = b"\0" * (10 * 1024 * 1024 + 1)
+    response = httpx.put(f"{BASE_URL}/api/stores/{store['id_store']}/", data={
+        "name": store["name"], "cnpj": store["cnpj"], "creation_date": "2025-08-10",
+        "email": store["email"], "phone_number": store["phone_number"],
+    }, files={"image": ("grande.png", oversized, "image/png")}, headers=HEADERS, timeout=30)
+    assert response.status_code == 413
+    assert httpx.get(f"{BASE_URL}/api/stores/{store['id_store']}/").json()["image_urls"] is None
+
+
+def test_identical_images_are_stored_once_and_shared():
+    payload = png_bytes(640, 480)
+    first = create_store(files={"image": ("a.png", payload, "image/png")}).json()
+    second = create_store(files={"image": ("b.png", payload, "image/png")}).json()
+    assert first["image"] == second["image"]
+    assert first["image_urls"]["original"].endswith(f"{first['image']}")
+
+    # Apagar uma loja não leva a imagem que a outra ainda usa
+    assert httpx.delete(f"{BASE_URL}/api/stores/{first['id_store']}/", headers=HEADERS).status_code == 204
+    assert httpx.get(f"{BASE_URL}{second['image_urls']['original']}").status_code == 200
+
+
+def test_serving_is_cacheable_negotiated_and_ranged():
+    urls = create_store(files={"image": ("vitrine.png", png_bytes(900, 600), "image/png")}).json()["image_urls"]
+    # As versões WebP/AVIF saem do pool de processos logo depois da resposta
+    for _ in range(100):
+        response = httpx.get(f"{BASE_URL}{urls['small']}", headers={"Accept": "image/avif,image/webp,*/*"})
+        if response.headers.get("content-type") == "image/avif":
+            break
+        time.sleep(0.2)
+    assert response.headers["content-type"] == "image/avif"
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert response.headers["vary"] == "Accept"
+    assert not response.headers["etag"].startswith("W/")
+
+    assert httpx.get(f"{BASE_URL}{urls['small']}").headers["content-type"] == "image/png"
+    revalidated = httpx.get(f"{BASE_URL}{urls['small']}", headers={
+        "Accept": "image/avif", "If-None-Match": response.headers["etag"],
+    })
+    assert revalidated.status_code == 304
+
+    partial = httpx.get(f"{BASE_URL}{urls['original']}", headers={"Range": "bytes=0-99"})
+    assert partial.status_code == 206
+    assert len(partial.content) == 100
+
+
+def test_oversized_body_is_cut_off_while_streaming():
+    store = create_store().json()
+    boundary = "limite"
+    head = (f'--{boundary}\r\nContent-Disposition: form-data; name="image"; filename="grande.png"\r\n'
+            f'Content-Type: image/png\r\n\r\n').encode()
+
+    # Sem Content-Length (chunked): o limite vale para os bytes que chegam
+    def body():
+        yield head
+        for _ in range(40):
+            yield b"\0" * (1024 * 1024)
+
+    headers = {**HEADERS, "Content-Type": f"multipart/form-data; boundary={boundary}"}
+    response = httpx.put(f"{BASE_URL}/api/stores/{store['id_store']}/", content=body(), headers=headers, timeout=30)
+    assert response.status_code == 413
+
+    # Content-Length acima do limite: a resposta chega sem o corpo ter sido enviado
+    url = httpx.URL(BASE_URL)
+    with socket.create_connection((url.host, url.port or 80), timeout=10) as sock:
+        sock.sendall((f"PUT /api/stores/{store['id_store']}/ HTTP/1.1\r\nHost: {url.host}\r\n"
+                      f"Authorization: {HEADERS['Authorization']}\r\n"
+                      f"Content-Type: multipart/form-data; boundary={boundary}\r\n"
+                      f"Content-Length: {64 * 1024 * 1024}\r\n\r\n").encode() + head)
+        assert sock.recv(1024).startswith(b"HTTP/1.1 413")
@@ -0,0 +1,67 @@
+from dotenv import load_dotenv
+import httpx
+import os
+import uuid
+from generate_jwt import create_test_token
+
+load_dotenv()
+BASE_URL = os.getenv("BASE_URL", "http://localhost:8000")
+AUTH_TOKEN = create_test_token()
+HEADERS = {"Authorization": f"Bearer {AUTH_TOKEN}"}
+
+
+def create_cart(quantity_in_stock=10):
+    unique_id = uuid.uuid4().hex[:8]
+    store = httpx.post(f"{BASE_URL}/api/stores/", data={
+        "name": f"Loja Pedido {unique_id}",
+        "cnpj": f"cnpj-{unique_id}",
+        "creation_date": "2025-08-10",
+        "email": f"pedido{unique_id}@loja.com",
+        "phone_number": "+5511999999999",
+    }, headers=HEADERS).json()
+    id_stock = httpx.post(f"{BASE_URL}/api/stocks/", json={
+        "id_store": store["id_store"], "name": "Estoque Pedido", "city": "São Paulo", "uf": "SP",
+        "zip_code": "01000-000", "address": "Rua A", "creation_date": "2025-08-10",
+    }, headers=HEADERS).json()["id_stock"]
+    product = httpx.post(f"{BASE_URL}/api/products/", data={
+        "id_stock": id_stock, "name": "Produto Pedido", "description": "pedido", "price": 5,
+        "sku": f"SKU-{unique_id}", "category": "pedido", "quantity": quantity_in_stock,
+        "creation_date": "2025-08-10",
+    }, headers=HEADERS).json()
+    order = httpx.post(f"{BASE_URL}/api/orders/", json={
+        "id_user": 1000, "id_store": store["id_store"], "creation_date": "2025-08-10",
+    }, headers=HEADERS).json()
+    return {"id_stock": id_stock, "id_product": product["id_product"], "id_order": order["id_order"]}
+
+
+def add_item(cart, quantity):
+    return httpx.post(f"{BASE_URL}/api/orders/{cart['id_order']}/items/", json={
+        "id_product": cart["id_product"], "id_stock": cart["id_stock"], "unit_price": 5, "quantity": quantity,
+        "subtotal": 5 * quantity, "creation_date": "2025-08-10", "date_change": "2025-08-10",
+    }, headers=HEADERS)
+
+
+def test_finalize_twice_is_rejected_and_stock_is_taken_once():
+    cart = create_cart()
+    assert add_item(cart, 3).status_code == 200
+
+    assert httpx.patch(f"{BASE_URL}/api/orders/{cart['id_order']}/finalize/").status_code == 200
+    again = httpx.patch(f"{BASE_URL}/api/orders/{cart['id_order']}/finalize/")
+    assert again.status_code == 409
+    assert httpx.get(f"{BASE_URL}/api/products/{cart['id_product']}").json()["quantity"] == 7
+
+
+def test_patching_item_product_moves_the_hold():
+    cart = create_cart()
+    item = add_item(cart, 8).json()
+    other = create_cart()
+    moved = httpx.patch(f"{BASE_URL}/api/orders/items/{item['id_order_item']}/", json={
+        "id_product": other["id_product"], "id_stock": other["id_stock"],
+    })
+    assert moved.status_code == 200, moved.text
+
+    # O produto antigo volta a ficar livre; o novo fica reservado
+    first = httpx.get(f"{BASE_URL}/api/products/{cart['id_product']}/availability")
+    second = httpx.get(f"{BASE_URL}/api/products/{other['id_product']}/availability")
+    assert first.json()["reserved"] == 0
+    assert second.json()["reserved"] == 8
@@ -0,0 +1,49 @@
+from dotenv import load_dotenv
+import base64
+import httpx
+import os
+import uuid
+from generate_jwt import create_test_token
+
+load_dotenv()
+BASE_URL = os.getenv("BASE_URL", "http://localhost:8000")
+AUTH_TOKEN = create_test_token()
+HEADERS = {"Authorization": f"Bearer {AUTH_TOKEN}"}
+
+
+def create_stores(count):
+    for _ in range(count):
+        unique_id = uuid.uuid4().hex[:8]
+        httpx.post(f"{BASE_URL}/api/stores/", data={
+            "name": f"Loja Página {unique_id}",
+            "cnpj": f"cnpj-{unique_id}",
+            "creation_date": "2025-08-10",
+            "email": f"pagina{unique_id}@loja.com",
+            "phone_number": "+5511999999999",
+        }, headers=HEADERS)
+
+
+def test_cursor_walk_matches_offset():
+    create_stores(5)
+    offset_ids = [s["id_store"] for s in httpx.get(f"{BASE_URL}/api/stores/all?limit=1000").json()]
+
+    cursor_ids = []
+    url = f"{BASE_URL}/api/stores/all?limit=2"
+    while url:
+        response = httpx.get(url)
+        assert response.status_code == 200
+        cursor_ids += [s["id_store"] for s in response.json()]
+        url = response.links.get("next", {}).get("url")
+        assert ("X-Next-Cursor" in response.headers) == (url is not None)
+
+    assert cursor_ids == offset_ids == sorted(offset_ids)
+
+
+def test_invalid_cursor():
+    response = httpx.get(f"{BASE_URL}/api/stores/all?cursor=nao-e-um-cursor")
+    assert response.status_code == 400
+
+    # Bem formado, mas com texto onde a chave é inteira
+    wrong_type = base64.urlsafe_b64encode(b'["abc"]').decode().rstrip("=")
+    response = httpx.get(f"{BASE_URL}/api/stores/all?cursor={wrong_type}")
+    assert response.status_code == 400
@@ -0,0 +1,94 @@
+from dotenv import load_dotenv
+import httpx
+import json
+import os
+import uuid
+from generate_jwt import create_test_token
+
+load_dotenv()
+BASE_URL = os.getenv("BASE_URL", "http://localhost:8000")
+AUTH_TOKEN = create_test_token()
+HEADERS = {"Authorization": f"Bearer {AUTH_TOKEN}"}
+
+
+def create_stock():
+    unique_id = uuid.uuid4().hex[:8]
+    store = httpx.post(f"{BASE_URL}/api/stores/", data={
+        "name": f"Loja Import {unique_id}",
+        "cnpj": f"cnpj-{unique_id}",
+        "creation_date": "2025-08-10",
+        "email": f"import{unique_id}@loja.com",
+        "phone_number": "+5511999999999",
+    }, headers=HEADERS).json()
+    return httpx.post(f"{BASE_URL}/api/stocks/", json={
+        "id_store": store["id_store"], "name": "Estoque Import", "city": "São Paulo", "uf": "SP",
+        "zip_code": "01000-000", "address": "Rua A", "creation_date": "2025-08-10",
+    }, headers=HEADERS).json()["id_stock"]
+
+
+def test_import_csv_reports_row_errors():
+    id_stock = create_stock()
+    content = (
+        "id_stock,name,description,price,sku,category,quantity\n"
+        f"{id_stock},Caneta,Azul,2.5,CAN-1,papelaria,10\n"
+        f"{id_stock},Lápis,,1.2,LAP-1,papelaria,\n"
+        f"{id_stock},Borracha,,abc,BOR-1,papelaria,5\n"
+        "999999999,Régua,,3,REG-1,papelaria,1\n"
+    )
+    response = httpx.post(f"{BASE_URL}/api/products/import", files={"file": ("catalogo.csv", content)}, headers=HEADERS)
+    assert response.status_code == 200
+    result = response.json()
+    assert result["imported"] == 2
+    assert [e["line"] for e in result["errors"]] == [4, 5]
+
+    products = httpx.get(f"{BASE_URL}/api/stocks/{id_stock}").json()["products"]
+    assert sorted(p["name"] for p in products) == ["Caneta", "Lápis"]
+    assert [p["quantity"] for p in products if p["name"] == "Lápis"] == [1]
+
+
+def test_import_ndjson():
+    id_stock = create_stock()
+    lines = [json.dumps({"id_stock": id_stock, "name": f"Item {i}", "price": i, "sku": f"NDJ-{i}"}) for i in range(50)]
+    lines.insert(10, "{nao é json")
+    response = httpx.post(f"{BASE_URL}/api/products/import", files={"file": ("catalogo.ndjson", "\n".join(lines))}, headers=HEADERS)
+    assert response.status_code == 200
+    assert response.json()["imported"] == 50
+    assert response.json()["errors"][0]["line"] == 11
+
+
+def test_import_rejects_unknown_format():
+    response = httpx.post(f"{BASE_URL}/api/products/import", files={"file": ("catalogo.xlsx", b"")}, headers=HEADERS)
+    assert response.status_code == 400
+
+
+def test_import_rejects_bad_encoding_and_reports_bad_csv_rows():
+    id_stock = create_stock()
+    latin1 = f"id_stock,name,price,sku\n{id_stock},Caderno é,3,CAD-1\n".encode("latin-1")
+    response = httpx.post(f"{BASE_URL}/api/products/import", files={"file": ("catalogo.csv", latin1)}, headers=HEADERS)
+    assert response.status_code == 400
+
+    # Campo acima do limite do módulo csv (128 KB)
+    content = f'id_stock,name,price,sku\n{id_stock},"{"x" * 200_000}",3,COL-1\n{id_stock},Tesoura,4,TES-1\n'
+    response = httpx.post(f"{BASE_URL}/api/products/import", files={"file": ("catalogo.csv", content)}, headers=HEADERS)
+    assert response.status_code == 200
+    assert response.json()["imported"] == 1
+    assert response.json()["errors"][0]["line"] == 2
+
+
+def test_imported_product_history_starts_at_the_import():
+    id_stock = create_stock()
+    content = "id_stock,name,price,sku,quantity\n" f"{id_stock},Caderno,12.5,CAD-1,4\n"
+    assert httpx.post(f"{BASE_URL}/api/products/import", files={"file": ("catalogo.csv", content)}, headers=HEADERS).json()["imported"] == 1
+    product = httpx.get(f"{BASE_URL}/api/stocks/{id_stock}").json()["products"][0]
+
+    state = httpx.get(f"{BASE_URL}/auditoria/product/{product['id_product']}/estado")
+    assert state.status_code == 200, state.text
+    assert state.json()["state"]["name"] == "Caderno"
+    assert state.json()["state"]["quantity"] == 4
+
+    # O UPDATE posterior é aplicado sobre a linha da carga, não sobre um estado vazio
+    httpx.put(f"{BASE_URL}/api/products/{product['id_product']}", data={"quantity": 9}, headers=HEADERS)
+    state = httpx.get(f"{BASE_URL}/auditoria/product/{product['id_product']}/estado").json()["state"]
+    assert state["quantity"] == 9
+    assert state["name"] == "Caderno"
+    assert state["sku"] == "CAD-1"
@@ -0,0 +1,89 @@
+from dotenv import load_dotenv
+import httpx
+import os
+import pytest
+import uuid
+from generate_jwt import create_test_token
+
+load_dotenv()
+BASE_URL = os.getenv("BASE_URL", "http://localhost:8000")
+
+# Número máximo de queries por leitura; não pode crescer com a quantidade de linhas.
+# Inclui a consulta das versões das tabelas usada no ETag.
+QUERY_BUDGETS = {
+    "/api/stocks/": 3,
+    "/api/stocks/all/": 3,
+    "/api/stocks/{id_stock}": 3,
+    "/api/products/": 2,
+    "/api/products/all": 2,
+    "/api/products/{id_product}": 2,
+    "/api/orders/{id_order}/": 3,
+    "/api/stores/all": 2,
+}
+
+
+@pytest.fixture
+def dataset():
+    unique_id = uuid.uuid4().hex[:8]
+    # Usuário próprio para que as listagens por usuário só vejam os dados do teste
+    headers = {"Authorization": f"Bearer {create_test_token(str(uuid.uuid4().int % 10**9))}"}
+    store = httpx.post(f"{BASE_URL}/api/stores/", data={
+        "name": f"Loja Budget {unique_id}",
+        "cnpj": f"cnpj-{unique_id}",
+        "creation_date": "2025-08-10",
+        "email": f"budget{unique_id}@loja.com",
+        "phone_number": "+5511999999999",
+    }, headers=headers).json()
+    order = httpx.post(f"{BASE_URL}/api/orders/", json={
+        "id_user": 1000, "id_store": store["id_store"], "creation_date": "2025-08-10",
+    }, headers=headers).json()
+    data = {"headers": headers, "id_store": store["id_store"], "id_order": order["id_order"], "stocks": []}
+    grow(data, stocks=1, products_per_stock=1)
+    return data
+
+
+def grow(data, stocks, products_per_stock):
+    headers = data["headers"]
+    for _ in range(stocks):
+        id_stock = httpx.post(f"{BASE_URL}/api/stocks/", json={
+            "id_store": data["id_store"], "name": "Estoque Budget", "city": "São Paulo", "uf": "SP",
+            "zip_code": "01000-000", "address": "Rua A", "creation_date": "2025-08-10",
+        }, headers=headers).json()["id_stock"]
+        data["stocks"].append(id_stock)
+        for i in range(products_per_stock):
+            product = httpx.post(f"{BASE_URL}/api/products/", data={
+                "id_stock": id_stock, "name": f"Produto {i}", "description": "budget", "price": 1,
+                "sku": f"SKU-{uuid.uuid4().hex[:8]}", "category": "budget", "quantity": 10,
+                "creation_date": "2025-08-10",
+            }, headers=headers).json()
+            httpx.post(f"{BASE_URL}/api/orders/{data['id_order']}/items/", json={
+                "id_product": product["id_product"], "id_stock": id_stock, "unit_price": 1, "quantity": 1,
+                "subtotal": 1, "creation_date": "2025-08-10", "date_change": "2025-08-10",
+            }, headers=headers)
+            data["id_product"] = product["id_product"]
+
+
+def query_counts(data):
+    counts = {}
+    for path in QUERY_BUDGETS:
+        url = path.format(id_stock=data["stocks"][-1], id_product=data["id_product"], id_order=data["id_order"])
+        response = httpx.get(f"{BASE_URL}{url}", headers={**data["headers"], "Cache-Control": "no-cache"})
+        assert response.status_code == 200, url
+        counts[path] = int(response.headers["X-Query-Count"])
+    return counts
+
+
+def test_read_query_budgets(dataset):
+    small = query_counts(dataset)
+    grow(dataset, stocks=5, products_per_stock=4)
+    large = query_counts(dataset)
+
+    for path, budget in QUERY_BUDGETS.items():
+        assert large[path] == small[path], f"{path}: {small[path]} -> {large[path]} queries"
+        assert large[path] <= budget, f"{path}: {large[path]} queries (orçamento {budget})"
+
+
+def test_order_detail_includes_items(dataset):
+    response = httpx.get(f"{BASE_URL}/api/orders/{dataset['id_order']}/", headers=dataset["headers"])
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 1
@@ -0,0 +1,24 @@
+from dotenv import load_dotenv
+import httpx
+import os
+
+load_dotenv()
+BASE_URL = os.getenv("BASE_URL", "http://localhost:8000")
+
+
+def test_request_log_metrics_exposed():
+    # Gera algumas requisições para passar pela fila de logs
+    for _ in range(5):
+        httpx.get(f"{BASE_URL}/api/stores/all")
+
+    response = httpx.get(f"{BASE_URL}/metrics")
+    assert response.status_code == 200
+    assert "request_log_queue_depth" in response.text
+    assert "request_log_flush_seconds" in response.text
+
+
+def test_query_stats_headers():
+    # no-cache: a resposta não pode vir do cache, senão não há queries
+    response = httpx.get(f"{BASE_URL}/api/stores/all", headers={"Cache-Control": "no-cache"})
+    assert int(response.headers["X-Query-Count"]) >= 1
+    assert float(response.headers["X-DB-Time-ms"]) >= 0
@@ -0,0 +1,41 @@
+from dotenv import load_dotenv
+import httpx
+import os
+import uuid
+from generate_jwt import create_test_token
+
+load_dotenv()
+BASE_URL = os.getenv("BASE_URL", "http://localhost:8000")
+AUTH_TOKEN = create_test_token()
+HEADERS = {"Authorization": f"Bearer {AUTH_TOKEN}"}
+
+
+def create_store():
+    unique_id = uuid.uuid4().hex[:8]
+    return httpx.post(f"{BASE_URL}/api/stores/", data={
+        "name": f"Loja Cache {unique_id}",
+        "cnpj": f"cnpj-{unique_id}",
+        "creation_date": "2025-08-10",
+        "email": f"cache{unique_id}@loja.com",
+        "phone_number": "+5511999999999",
+    }, headers=HEADERS).json()
+
+
+def test_cache_hit_and_invalidation_on_write():
+    url = f"{BASE_URL}/api/stores/all?limit=1000"
+    httpx.get(url)
+    cached = httpx.get(url)
+    assert cached.headers["X-Cache"] == "HIT"
+    assert cached.headers["X-Query-Count"] == "0"
+
+    # O commit da nova loja invalida a listagem
+    store = create_store()
+    fresh = httpx.get(url)
+    assert fresh.headers["X-Cache"] == "MISS"
+    assert store["id_store"] in [s["id_store"] for s in fresh.json()]
+
+
+def test_cache_metrics_exposed():
+    response = httpx.get(f"{BASE_URL}/metrics")
+    assert "response_cache_hits_total" in response.text
+    assert "response_cache_misses_total" in response.text
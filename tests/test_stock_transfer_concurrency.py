@@ -0,0 +1,117 @@
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+import httpx
+import os
+import pytest
+import uuid
+from generate_jwt import create_test_token
+
+load_dotenv()
+BASE_URL = os.getenv("BASE_URL", "http://localhost:8000")
+AUTH_TOKEN = create_test_token()
+HEADERS = {"Authorization": f"Bearer {AUTH_TOKEN}"}
+INITIAL_QUANTITY = 100
+
+
+@pytest.fixture
+def two_stocks_with_product():
+    unique_id = uuid.uuid4().hex[:8]
+    store = httpx.post(f"{BASE_URL}/api/stores/", data={
+        "name": f"Loja Concorrência {unique_id}",
+        "cnpj": f"cnpj-{unique_id}",
+        "creation_date": "2025-08-10",
+        "email": f"concorrencia{unique_id}@loja.com",
+        "phone_number": "+5511999999999",
+    }, headers=HEADERS).json()
+
+    stocks = []
+    for name in ("Origem", "Destino"):
+        response = httpx.post(f"{BASE_URL}/api/stocks/", json={
+            "id_store": store["id_store"],
+            "name": f"{name} {unique_id}",
+            "city": "Cidade",
+            "uf": "SP",
+            "zip_code": "00000-000",
+            "address": "Rua",
+            "creation_date": "2025-08-10",
+        }, headers=HEADERS)
+        assert response.status_code == 200, response.text
+        stocks.append(response.json()["id_stock"])
+
+    product = httpx.post(f"{BASE_URL}/api/products/", data={
+        "id_stock": stocks[0],
+        "name": f"Produto Concorrência {unique_id}",
+        "description": "Teste de concorrência",
+        "price": 10,
+        "sku": f"SKU-{unique_id}",
+        "category": "Categoria",
+        "quantity": INITIAL_QUANTITY,
+        "creation_date": "2025-08-14",
+    }, headers=HEADERS)
+    assert product.status_code == 200, product.text
+    return stocks[0], stocks[1], product.json()["id_product"]
+
+
+def transfer(client, id_product, origin, destination, quantity):
+    return client.post(f"{BASE_URL}/api/stocks/movements/", json={
+        "id_product": id_product,
+        "id_stock_origin": origin,
+        "id_stock_destination": destination,
+        "quantity": quantity,
+        "creation_date": "2025-08-14",
+    }, headers=HEADERS).status_code
+
+
+def stock_quantities(origin, destination):
+    quantities = []
+    for id_stock in (origin, destination):
+        products = httpx.get(f"{BASE_URL}/api/stocks/{id_stock}", headers=HEADERS).json()["products"]
+        quantities.append(sum(p["quantity"] for p in products))
+    return quantities
+
+
+def test_concurrent_transfers_never_oversell(two_stocks_with_product):
+    origin, destination, id_product = two_stocks_with_product
+
+    # 40 transferências de 5 disputando 100 unidades: no máximo 20 passam
+    with httpx.Client(timeout=60) as client, ThreadPoolExecutor(max_workers=20) as pool:
+        statuses = list(pool.map(lambda _: transfer(client, id_product, origin, destination, 5), range(40)))
+
+    assert all(code < 500 for code in statuses)
+    origin_quantity, destination_quantity = stock_quantities(origin, destination)
+    assert origin_quantity >= 0
+    assert origin_quantity + destination_quantity == INITIAL_QUANTITY
+    assert statuses.count(200) * 5 == destination_quantity
+
+
+def test_concurrent_transfers_both_directions(two_stocks_with_product):
+    origin, destination, id_product = two_stocks_with_product
+    with httpx.Client(timeout=60) as client:
+        assert transfer(client, id_product, origin, destination, INITIAL_QUANTITY // 2) == 200
+        back_product = httpx.get(f"{BASE_URL}/api/stocks/{destination}", headers=HEADERS).json()["products"][0]["id_product"]
+
+        # Transferências cruzadas entre os mesmos estoques (cenário clássico de deadlock)
+        jobs = [(id_product, origin, destination) if i % 2 else (back_product, destination, origin) for i in range(60)]
+        with ThreadPoolExecutor(max_workers=20) as pool:
+            statuses = list(pool.map(lambda job: transfer(client, *job, 1), jobs))
+
+    assert all(code < 500 for code in statuses)
+    origin_quantity, destination_quantity = stock_quantities(origin, destination)
+    assert origin_quantity >= 0 and destination_quantity >= 0
+    assert origin_quantity + destination_quantity == INITIAL_QUANTITY
+
+
+def test_batch_transfer_to_missing_stock_fails_alone(two_stocks_with_product):
+    origin, destination, id_product = two_stocks_with_product
+    movements = [
+        {"id_product": id_product, "id_stock_origin": origin, "id_stock_destination": stock,
+         "quantity": 1, "creation_date": "2025-08-14"}
+        for stock in (destination, 999999999)
+    ]
+    response = httpx.post(f"{BASE_URL}/api/stocks/movements/batch", json={"movements": movements}, headers=HEADERS)
+    assert response.status_code == 200, response.text
+    results = response.json()
+    assert results[0]["success"]
+    assert not results[1]["success"]
+    assert results[1]["detail"] == "Estoque de destino não encontrado."
+    assert stock_quantities(origin, destination) == [INITIAL_QUANTITY - 1, 1]